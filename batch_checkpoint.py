@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+批量处理检查点
+批量处理时在输出目录中写入 .docproc_checkpoint.json，每完成一个农户立即记录：
+- 已完成的农户及其输出PDF（大小、修改时间）
+- 失败的农户及错误信息
+
+程序被关闭、机器休眠或断电后，选择"继续上次的批量处理"即可跳过已完成的农户；
+输出PDF被删除或改动过的农户会重新处理。
+
+已完成的单个文件转换保存在转换缓存中（关闭缓存时使用检查点目录下的临时缓存），
+中断的农户继续处理时不会重新转换已完成的文件。全部农户成功后检查点自动删除。
+"""
+
+import os
+import json
+import shutil
+from typing import Optional
+
+from conversion_cache import ConversionCache
+
+CHECKPOINT_NAME = '.docproc_checkpoint.json'
+CHECKPOINT_DIR = '.docproc_checkpoint'
+CHECKPOINT_VERSION = 1
+
+
+class BatchCheckpoint:
+    """一次批量处理（父目录 -> 输出目录）的检查点"""
+
+    def __init__(self, parent_dir: str, output_dir: str):
+        self.parent_dir = os.path.abspath(parent_dir)
+        self.output_dir = os.path.abspath(output_dir)
+        self.path = os.path.join(self.output_dir, CHECKPOINT_NAME)
+        self.data = self._load() or self._empty()
+
+    def _empty(self) -> dict:
+        return {
+            'version': CHECKPOINT_VERSION,
+            'parent_dir': self.parent_dir,
+            'done': {},
+            'failed': {},
+        }
+
+    def _load(self) -> Optional[dict]:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get('version') != CHECKPOINT_VERSION or data.get('parent_dir') != self.parent_dir:
+            return None
+        return data
+
+    def exists(self) -> bool:
+        """是否有上次未完成的批量处理记录"""
+        return bool(self.data['done'] or self.data['failed'])
+
+    def reset(self):
+        """重新开始：丢弃上次的记录"""
+        self.data = self._empty()
+        self.remove()
+
+    def is_done(self, folder: str, output_pdf: str) -> bool:
+        """该农户上次已完成，且输出PDF没有被删除或改动"""
+        record = self.data['done'].get(os.path.basename(folder))
+        if not record or record.get('output') != os.path.abspath(output_pdf):
+            return False
+        try:
+            st = os.stat(output_pdf)
+        except OSError:
+            return False
+        return record.get('size') == st.st_size and record.get('mtime') == st.st_mtime_ns
+
+    def mark_done(self, folder: str, output_pdf: str):
+        name = os.path.basename(folder)
+        st = os.stat(output_pdf)
+        self.data['failed'].pop(name, None)
+        self.data['done'][name] = {
+            'output': os.path.abspath(output_pdf), 'size': st.st_size, 'mtime': st.st_mtime_ns,
+        }
+        self._save()
+
+    def mark_failed(self, folder: str, error: str):
+        self.data['failed'][os.path.basename(folder)] = error
+        self._save()
+
+    def _save(self):
+        """写临时文件后原子替换，写到一半断电也不会损坏上一次的记录"""
+        temp_path = self.path + '.tmp'
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.data, f, ensure_ascii=False, indent=1)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"[检查点] ⚠️ 无法保存检查点: {e}")
+
+    def conversion_cache(self) -> ConversionCache:
+        """未启用转换缓存时，用于保存已完成转换的临时缓存"""
+        return ConversionCache(os.path.join(self.output_dir, CHECKPOINT_DIR, 'conversions'))
+
+    def remove(self):
+        """删除检查点文件和临时缓存"""
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+        shutil.rmtree(os.path.join(self.output_dir, CHECKPOINT_DIR), ignore_errors=True)
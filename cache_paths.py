@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本机缓存目录
+转换缓存、处理清单、转换耗时历史和转换器检测结果都保存在 .docproc_cache 下（与授权缓存放在同一位置）：
+Windows为 %LOCALAPPDATA%\\.docproc_cache，macOS/Linux为 ~/.docproc_cache
+"""
+
+import os
+import platform
+
+
+def cache_root() -> str:
+    """本机缓存目录 .docproc_cache"""
+    if platform.system() == 'Windows':
+        base = os.environ.get('LOCALAPPDATA') or os.environ.get('APPDATA') or os.path.expanduser('~')
+    else:
+        base = os.path.expanduser('~')
+    return os.path.join(base, '.docproc_cache')
@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+取消处理
+界面上点击"取消"时调用 CancelToken.cancel()，处理流程的各个阶段（扫描、转换、soffice、合并）
+定期调用 check()，发现已取消时抛出 Cancelled，由 process_folder 清理临时文件和子进程。
+"""
+
+import threading
+
+
+class Cancelled(Exception):
+    """处理已被用户取消"""
+
+    def __init__(self, message: str = "已取消"):
+        super().__init__(message)
+
+
+class CancelToken:
+    """取消标记（线程安全，可以在界面线程中取消、在处理线程中检查）"""
+
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def check(self):
+        """已取消时抛出 Cancelled"""
+        if self._event.is_set():
+            raise Cancelled()
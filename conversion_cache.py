@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+转换结果缓存
+按"源文件内容哈希 + 转换设置"保存 convert_to_pdf 生成的PDF，重新处理同一批文件时直接复用。
+缓存总大小超过上限时，按最近最少使用（LRU）淘汰。
+
+查看缓存: python conversion_cache.py
+清空缓存: python conversion_cache.py --clear
+"""
+
+import os
+import sys
+import json
+import shutil
+import hashlib
+from cache_paths import cache_root
+from progress_events import format_bytes
+
+
+def default_cache_dir() -> str:
+    """默认缓存目录"""
+    return os.path.join(cache_root(), 'conversions')
+
+
+class ConversionCache:
+    """按内容寻址的转换结果缓存（LRU淘汰）"""
+
+    DEFAULT_MAX_BYTES = 2 * 1024 * 1024 * 1024  # 默认上限2GB
+
+    def __init__(self, cache_dir: str = None, max_bytes: int = None):
+        self.cache_dir = cache_dir or default_cache_dir()
+        self.max_bytes = max_bytes or self.DEFAULT_MAX_BYTES
+        self._total_bytes = None  # 第一次写入时统计
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(source_hash: str, settings: dict) -> str:
+        """缓存键：源文件内容哈希 + 转换设置（设置变化后旧结果自动失效）"""
+        raw = source_hash + '|' + json.dumps(settings, sort_keys=True)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + '.pdf')
+
+    def get(self, key: str, output_pdf: str) -> bool:
+        """命中时把缓存的PDF放到output_pdf，返回是否命中"""
+        path = self._path(key)
+        try:
+            try:
+                os.link(path, output_pdf)
+            except OSError:
+                shutil.copyfile(path, output_pdf)
+            # 更新修改时间作为最近使用时间（不依赖atime，很多系统关闭了atime）
+            os.utime(path)
+        except OSError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        return True
+
+    def put(self, key: str, pdf_path: str):
+        """保存一个转换结果（写临时文件后原子替换）"""
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = f"{path}.{os.getpid()}.tmp"
+            shutil.copyfile(pdf_path, temp_path)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"[缓存] ⚠️ 写入失败: {e}")
+            return
+        if self._total_bytes is None:
+            self._total_bytes = self.stats()['bytes']
+        else:
+            self._total_bytes += os.path.getsize(path)
+        if self._total_bytes > self.max_bytes:
+            self._evict()
+
+    def _entries(self):
+        """所有缓存条目: [(最近使用时间, 大小, 路径), ...]"""
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+        for root, dirs, filenames in os.walk(self.cache_dir):
+            for filename in filenames:
+                if filename.endswith('.pdf'):
+                    path = os.path.join(root, filename)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def _evict(self):
+        """淘汰最久未使用的条目，直到低于上限的90%"""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        removed = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                removed += 1
+            except OSError:
+                continue
+        self._total_bytes = total
+        if removed:
+            print(f"[缓存] 已淘汰 {removed} 个最久未使用的条目")
+
+    def stats(self) -> dict:
+        """缓存统计"""
+        entries = self._entries()
+        return {
+            'dir': self.cache_dir,
+            'entries': len(entries),
+            'bytes': sum(size for _, size, _ in entries),
+            'max_bytes': self.max_bytes,
+            'hits': self.hits,
+            'misses': self.misses,
+        }
+
+    def clear(self):
+        """清空缓存"""
+        shutil.rmtree(self.cache_dir, ignore_errors=True)
+        self._total_bytes = 0
+
+
+if __name__ == "__main__":
+    cache = ConversionCache()
+    if '--clear' in sys.argv:
+        cache.clear()
+        print(f"✓ 已清空缓存: {cache.cache_dir}")
+    else:
+        info = cache.stats()
+        print(f"缓存目录: {info['dir']}")
+        print(f"条目数量: {info['entries']}")
+        print(f"占用空间: {format_bytes(info['bytes'])} / {format_bytes(info['max_bytes'])}")
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Word转换器检测
+Windows检测 Microsoft Word（通过COM启动Word读取版本），macOS/Linux检测 LibreOffice（soffice --version）。
+启动Word、运行soffice都要几秒，所以检测结果（程序路径、版本、支持的格式）保存在本机的缓存文件中：
+- 超过有效期（默认7天）后重新检测
+- 程序文件变化（路径、修改时间、大小不同，如升级或卸载）后重新检测
+- 检测不可用的结果不缓存，安装转换器后下次启动即可检测到
+
+查看检测结果: python converter_probe.py
+重新检测: python converter_probe.py --refresh
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import platform
+import subprocess
+from typing import Optional
+from cache_paths import cache_root
+
+CACHE_VERSION = 1
+DEFAULT_TTL = 7 * 24 * 3600  # 缓存有效期（秒）
+
+# Word文档的格式，两种转换器都支持
+WORD_FORMATS = ['doc', 'docx']
+
+WORD_MISSING = ("⚠️ 未检测到 Microsoft Word\n\n程序无法转换 .docx 文件为PDF。\n\n"
+                "解决方案：\n1. 安装 Microsoft Word (Office)\n2. 或手动将 .docx 转换为 .pdf\n\n"
+                "其他文件(PDF、图片)可以正常处理。")
+LIBREOFFICE_MISSING = ("⚠️ 未检测到 LibreOffice\n\n程序无法转换 .docx 文件为PDF。\n\n"
+                       "解决方案：\n安装 LibreOffice:\nbrew install --cask libreoffice\n\n"
+                       "或手动下载：\nhttps://www.libreoffice.org/\n\n其他文件(PDF、图片)可以正常处理。")
+
+# 不在PATH中时查找的LibreOffice安装位置（macOS上LibreOffice通常不在PATH中）
+SOFFICE_FALLBACKS = ['/Applications/LibreOffice.app/Contents/MacOS/soffice']
+
+
+def default_cache_path() -> str:
+    """默认缓存文件"""
+    return os.path.join(cache_root(), 'converter.json')
+
+
+def _word_executable() -> Optional[str]:
+    """从COM注册信息找到WINWORD.EXE的路径（不启动Word）"""
+    try:
+        import winreg
+        with winreg.OpenKey(winreg.HKEY_CLASSES_ROOT, r'Word.Application\CLSID') as key:
+            clsid = winreg.QueryValue(key, None)
+        with winreg.OpenKey(winreg.HKEY_CLASSES_ROOT, rf'CLSID\{clsid}\LocalServer32') as key:
+            command = winreg.QueryValue(key, None)
+    except (ImportError, OSError):
+        return None
+    # 注册的命令形如 "C:\...\WINWORD.EXE" /Automation
+    command = command.strip()
+    if command.startswith('"'):
+        return command[1:].split('"', 1)[0]
+    return command.split(' /', 1)[0]
+
+
+def locate_converter():
+    """
+    返回 (转换器名称, 程序路径)；找不到时路径为None
+    界面的检测结果和处理时实际调用的程序都由这里决定
+    """
+    if platform.system() == 'Windows':
+        return 'word', _word_executable()
+    path = shutil.which('soffice')
+    if path is None:
+        path = next((p for p in SOFFICE_FALLBACKS if os.access(p, os.X_OK)), None)
+    return 'libreoffice', path and os.path.realpath(path)
+
+
+def converter_ready() -> Optional[str]:
+    """
+    不启动Word/LibreOffice，快速检查能否转换Word文档：返回程序路径，不能时返回None
+    Windows上还需要docx2pdf
+    """
+    kind, path = locate_converter()
+    if path is not None and kind == 'word':
+        try:
+            import docx2pdf  # noqa: F401
+        except ImportError:
+            return None
+    return path
+
+
+def fingerprint(path: str) -> Optional[dict]:
+    """程序文件的特征：路径、修改时间和大小，任一变化说明程序被升级、替换或卸载"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return {'path': path, 'mtime': st.st_mtime, 'size': st.st_size}
+
+
+def _probe_word() -> dict:
+    """启动Word读取版本（需要docx2pdf和pywin32）"""
+    try:
+        import docx2pdf  # noqa: F401
+    except ImportError:
+        return {'available': False, 'message': "⚠️ 缺少 docx2pdf 库"}
+    try:
+        import win32com.client
+        word = win32com.client.Dispatch("Word.Application")
+        try:
+            version = str(word.Version)
+        finally:
+            word.Quit()
+    except Exception:
+        return {'available': False, 'message': WORD_MISSING}
+    return {'available': True, 'version': version, 'message': "✅ Microsoft Word 已安装"}
+
+
+def _probe_libreoffice(path: str) -> dict:
+    """运行 soffice --version 读取版本"""
+    try:
+        result = subprocess.run([path, '--version'], capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return {'available': False, 'message': LIBREOFFICE_MISSING}
+    if result.returncode != 0:
+        return {'available': False, 'message': LIBREOFFICE_MISSING}
+    # 输出形如 "LibreOffice 7.6.4.1 e19e193f88cd..."
+    words = result.stdout.split()
+    version = words[1] if len(words) > 1 else ''
+    return {'available': True, 'version': version, 'message': "✅ LibreOffice 已安装"}
+
+
+def probe(kind: str, path: Optional[str]) -> dict:
+    """实际检测转换器（较慢）"""
+    if path is None:
+        return {'available': False, 'message': WORD_MISSING if kind == 'word' else LIBREOFFICE_MISSING}
+    result = _probe_word() if kind == 'word' else _probe_libreoffice(path)
+    if result['available']:
+        result['capabilities'] = list(WORD_FORMATS)
+    return result
+
+
+class ConverterProbe:
+    """带缓存的Word转换器检测"""
+
+    def __init__(self, cache_path: str = None, ttl: float = DEFAULT_TTL):
+        self.cache_path = cache_path or default_cache_path()
+        self.ttl = ttl
+
+    def _load(self) -> Optional[dict]:
+        try:
+            with open(self.cache_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == CACHE_VERSION:
+                return data.get('result')
+        except (OSError, ValueError):
+            pass
+        return None
+
+    def _save(self, result: dict):
+        """写临时文件后原子替换"""
+        temp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': CACHE_VERSION, 'result': result}, f, ensure_ascii=False)
+            os.replace(temp_path, self.cache_path)
+        except OSError as e:
+            print(f"[转换器] ⚠️ 无法保存检测结果: {e}")
+
+    def cached(self, kind: str, stamp: Optional[dict]) -> Optional[dict]:
+        """缓存的检测结果；转换器或程序文件变化、超过有效期时返回None"""
+        result = self._load()
+        if result is None or stamp is None:
+            return None
+        if result.get('kind') != kind or result.get('fingerprint') != stamp:
+            return None
+        if not 0 <= time.time() - result.get('checked_at', 0) < self.ttl:
+            return None
+        return result
+
+    def detect(self, refresh: bool = False) -> dict:
+        """
+        检测Word转换器，返回字典:
+        available, message, kind, path, version, capabilities（支持的格式）, checked_at, cached（是否来自缓存）
+        refresh 为True时忽略缓存重新检测
+        """
+        kind, path = locate_converter()
+        stamp = fingerprint(path) if path else None
+        if not refresh:
+            result = self.cached(kind, stamp)
+            if result is not None:
+                print(f"[转换器] 使用缓存的检测结果: {path} {result.get('version', '')}")
+                return dict(result, cached=True)
+
+        start = time.monotonic()
+        result = probe(kind, path)
+        result.update(kind=kind, path=path, checked_at=time.time(), fingerprint=stamp)
+        result.setdefault('version', '')
+        result.setdefault('capabilities', [])
+        print(f"[转换器] 检测 {kind}: {'可用' if result['available'] else '不可用'}"
+              f"（{time.monotonic() - start:.1f}秒）")
+        if result['available'] and stamp is not None:
+            self._save(result)
+        return dict(result, cached=False)
+
+
+def detect_converter(refresh: bool = False) -> dict:
+    """使用默认缓存文件检测Word转换器"""
+    return ConverterProbe().detect(refresh=refresh)
+
+
+if __name__ == "__main__":
+    info = detect_converter(refresh='--refresh' in sys.argv)
+    print(f"转换器: {info['kind']}")
+    print(f"程序: {info['path'] or '未找到'}")
+    print(f"版本: {info['version'] or '-'}")
+    print(f"支持的格式: {', '.join(info['capabilities']) or '-'}")
+    print(f"来自缓存: {'是' if info['cached'] else '否'}")
+    print(info['message'])
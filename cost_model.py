@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+转换耗时模型
+每次转换完成后记录实际耗时和输入特征（页数、文件大小、需要重新编码的像素数），
+保存在本机的历史文件中。按转换方式（word / reportlab / image / pdf）分别拟合：
+
+    耗时 ≈ a + b×页数 + c×文件MB数 + d×百万像素
+
+拟合结果用于进度条的剩余时间、转换任务的调度顺序和试运行的耗时估算。
+某种转换方式的历史记录不足时返回None，由调用方使用默认估算。
+
+查看模型: python cost_model.py
+"""
+
+import os
+import json
+from typing import List, Optional
+from cache_paths import cache_root
+
+HISTORY_VERSION = 1
+FEATURES = ('pages', 'mb', 'megapixels')
+
+
+def default_history_path() -> str:
+    """默认历史文件"""
+    return os.path.join(cache_root(), 'cost_history.json')
+
+
+def _solve(a: List[List[float]], b: List[float]) -> List[float]:
+    """高斯消元（列主元）解线性方程组"""
+    n = len(b)
+    m = [row[:] + [b[i]] for i, row in enumerate(a)]
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(m[r][col]))
+        m[col], m[pivot] = m[pivot], m[col]
+        if abs(m[col][col]) < 1e-12:
+            continue
+        for r in range(n):
+            if r != col:
+                factor = m[r][col] / m[col][col]
+                for c in range(col, n + 1):
+                    m[r][c] -= factor * m[col][c]
+    return [m[i][n] / m[i][i] if abs(m[i][i]) >= 1e-12 else 0.0 for i in range(n)]
+
+
+class CostModel:
+    """按转换方式从历史记录拟合的耗时模型"""
+
+    MAX_SAMPLES = 500  # 每种转换方式保留最近的记录数
+    MIN_SAMPLES = 5    # 少于此数时不使用拟合结果
+    RIDGE = 1e-3       # 正则化系数，避免特征恒定（如图片总是1页）时方程组奇异
+
+    def __init__(self, path: str = None):
+        self.path = path or default_history_path()
+        self.samples = self._load()  # {转换方式: [[页数, MB, 百万像素, 秒], ...]}
+        self._new = {}               # 本次运行新增、尚未保存的记录
+        self._fits = {}
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get('version') == HISTORY_VERSION:
+                return data.get('samples', {})
+        except (OSError, ValueError):
+            pass
+        return {}
+
+    def record(self, converter: str, features: dict, seconds: float):
+        """记录一次转换的实际耗时"""
+        sample = [float(features.get(name, 0)) for name in FEATURES] + [float(seconds)]
+        self.samples.setdefault(converter, []).append(sample)
+        self.samples[converter] = self.samples[converter][-self.MAX_SAMPLES:]
+        self._new.setdefault(converter, []).append(sample)
+        self._fits.pop(converter, None)
+
+    def _fit(self, converter: str) -> Optional[dict]:
+        """岭回归拟合系数；记录不足时返回None"""
+        if converter in self._fits:
+            return self._fits[converter]
+        samples = self.samples.get(converter, [])
+        fit = None
+        if len(samples) >= self.MIN_SAMPLES:
+            size = len(FEATURES) + 1
+            xtx = [[0.0] * size for _ in range(size)]
+            xty = [0.0] * size
+            for sample in samples:
+                x = [1.0] + sample[:-1]
+                for i in range(size):
+                    xty[i] += x[i] * sample[-1]
+                    for j in range(size):
+                        xtx[i][j] += x[i] * x[j]
+            for i in range(1, size):
+                xtx[i][i] += self.RIDGE * len(samples)
+            times = sorted(sample[-1] for sample in samples)
+            fit = {
+                'coefficients': _solve(xtx, xty),
+                # 预测值的下限：线性拟合在特征很小时可能给出过小甚至负的耗时
+                'floor': times[len(times) // 2] * 0.2,
+                'samples': len(samples),
+            }
+        self._fits[converter] = fit
+        return fit
+
+    def predict(self, converter: str, features: dict) -> Optional[float]:
+        """预测耗时（秒）；该转换方式的历史记录不足时返回None"""
+        fit = self._fit(converter)
+        if fit is None:
+            return None
+        x = [1.0] + [float(features.get(name, 0)) for name in FEATURES]
+        seconds = sum(c * v for c, v in zip(fit['coefficients'], x))
+        return max(seconds, fit['floor'])
+
+    def save(self):
+        """保存新增记录（与其他进程同时写入的记录合并，写临时文件后原子替换）"""
+        if not self._new:
+            return
+        samples = self._load()
+        for converter, new in self._new.items():
+            samples[converter] = (samples.get(converter, []) + new)[-self.MAX_SAMPLES:]
+        temp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump({'version': HISTORY_VERSION, 'samples': samples}, f)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"[耗时模型] ⚠️ 无法保存历史记录: {e}")
+            return
+        self.samples = samples
+        self._new = {}
+        self._fits = {}
+
+
+if __name__ == "__main__":
+    model = CostModel()
+    print(f"历史文件: {model.path}")
+    for converter in sorted(model.samples):
+        fit = model._fit(converter)
+        if fit is None:
+            print(f"  {converter}: {len(model.samples[converter])} 条记录（不足 {CostModel.MIN_SAMPLES} 条，使用默认估算）")
+        else:
+            a, b, c, d = fit['coefficients']
+            print(f"  {converter}: {fit['samples']} 条记录，耗时 ≈ {a:.3f} + {b:.3f}×页数 + {c:.3f}×MB + {d:.3f}×百万像素")
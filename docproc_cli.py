@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+命令行版本（不需要界面，可以在没有显示器的Linux服务器上运行）
+
+用法:
+  python docproc_cli.py 农户文件夹 -o 输出.pdf
+  python docproc_cli.py --batch 村目录 -o /srv/out/{name}_合并.pdf --workers 8 --progress json
+
+--progress json 时每条进度事件输出为标准输出的一行JSON（见 progress_events.ProgressEvent），
+最后一行是处理结果；处理日志（包括转换子进程和soffice的输出）改到标准错误。
+退出码见下面的 EXIT_*。不导入tkinter。
+"""
+
+import os
+import sys
+import json
+import signal
+import argparse
+import multiprocessing
+
+EXIT_OK = 0           # 全部成功
+EXIT_PARTIAL = 1      # 已生成输出，但有文件转换失败或农户处理失败
+EXIT_USAGE = 2        # 参数错误
+EXIT_FAILED = 3       # 处理失败，没有生成输出
+EXIT_LICENSE = 4      # 授权检查未通过
+EXIT_CANCELLED = 130  # 被中断（Ctrl+C、SIGTERM）
+
+DEFAULT_NAME = '{name}_合并.pdf'
+
+
+def parse_args(argv=None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog='docproc_cli',
+        description="按文档类型排序并合并农户文件夹中的文档（命令行版本）",
+    )
+    parser.add_argument('input', help="农户文件夹；使用 --batch 时为包含所有农户文件夹的目录")
+    parser.add_argument('--batch', action='store_true', help="批量处理：input 下的每个子文件夹输出一个PDF")
+    parser.add_argument('-o', '--output',
+                        help="输出PDF路径，{name} 替换为农户文件夹名"
+                             f"（默认: input旁边的 {DEFAULT_NAME}；批量处理时默认在 input 目录下）")
+    parser.add_argument('-j', '--workers', type=int, help="并行转换的进程数（默认按CPU和内存自动决定）")
+    parser.add_argument('--cache-dir', help="转换缓存和耗时历史的目录（默认 ~/.docproc_cache/conversions）")
+    parser.add_argument('--no-cache', action='store_true', help="不使用转换缓存")
+    parser.add_argument('--office-mode', choices=('server', 'batch', 'process'), default='server',
+                        help="Word文档的转换方式（macOS/Linux）")
+    parser.add_argument('--dry-run', action='store_true', help="只打印执行计划和估算，不转换")
+    parser.add_argument('--resume', action='store_true', help="批量处理：跳过上次已完成的农户")
+    parser.add_argument('--progress', choices=('text', 'json', 'none'), default='text',
+                        help="进度输出格式（json: 每行一条JSON）")
+    options = parser.parse_args(argv)
+
+    if not os.path.isdir(options.input):
+        parser.error(f"文件夹不存在: {options.input}")
+    if options.workers is not None and options.workers < 1:
+        parser.error("--workers 至少为1")
+    if options.batch:
+        pattern = options.output or os.path.join(options.input, DEFAULT_NAME)
+        if '{name}' not in os.path.basename(pattern) or '{' in os.path.dirname(pattern):
+            parser.error("批量处理的 --output 需要在文件名中包含 {name}，例如 /srv/out/{name}_合并.pdf")
+    return options
+
+
+def output_paths(options: argparse.Namespace):
+    """单个文件夹: 输出PDF路径；批量处理: (输出目录, 文件名模式)"""
+    if options.batch:
+        pattern = os.path.abspath(options.output or os.path.join(options.input, DEFAULT_NAME))
+        return os.path.dirname(pattern), os.path.basename(pattern)
+    name = os.path.basename(os.path.normpath(os.path.abspath(options.input)))
+    pattern = options.output or os.path.join(os.path.dirname(os.path.abspath(options.input)), DEFAULT_NAME)
+    return pattern.format(name=name)
+
+
+def _json_line(stream, record: dict):
+    stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+    stream.flush()
+
+
+def progress_listener(options: argparse.Namespace, stream):
+    if options.progress == 'json':
+        return lambda event: _json_line(stream, dict(event.to_dict(), event='progress'))
+    if options.progress == 'text':
+        def listener(event):
+            percent = f"{event.percent:3d}%" if event.percent is not None else " .. "
+            stream.write(f"[{percent}] {event}\n")
+            stream.flush()
+        return listener
+    return None
+
+
+def _redirect_logs():
+    """
+    标准输出只用于JSON进度：复制一份标准输出给进度使用，原来的标准输出（文件描述符1）指向标准错误，
+    这样本进程的 print、转换子进程和soffice的输出都进入标准错误
+    """
+    sys.stdout.flush()
+    progress_out = os.fdopen(os.dup(1), 'w', encoding='utf-8')
+    os.dup2(2, 1)
+    return progress_out
+
+
+def run(options: argparse.Namespace, progress_out=None, cancel_token=None) -> int:
+    """执行处理并返回退出码；progress_out 为进度和结果的输出流（默认标准输出）"""
+    from docproc_engine import DocumentProcessor
+    from cancellation import Cancelled
+
+    progress_out = progress_out or sys.stdout
+    listener = progress_listener(options, progress_out)
+    result = {'event': 'result', 'outputs': [], 'failed': [], 'failed_files': []}
+    try:
+        with DocumentProcessor(max_workers=options.workers, office_mode=options.office_mode,
+                               use_cache=not options.no_cache, cache_dir=options.cache_dir) as processor:
+            if options.batch:
+                output_dir, name_pattern = output_paths(options)
+                summary = processor.process_batch(options.input, output_dir, listener, dry_run=options.dry_run,
+                                                  resume=options.resume, cancel_token=cancel_token,
+                                                  name_pattern=name_pattern)
+                result['outputs'] = summary['succeeded']
+                result['failed'] = [{'folder': folder, 'error': error} for folder, error in summary['failed']]
+                failed_files = summary['failed_files']
+                plans = summary.get('plans', [])
+            else:
+                output_pdf = output_paths(options)
+                failed_files = []
+                plan = processor.process_folder(options.input, output_pdf, listener, dry_run=options.dry_run,
+                                                failures=failed_files, cancel_token=cancel_token)
+                result['outputs'] = [output_pdf]
+                plans = [plan] if options.dry_run else []
+        result['failed_files'] = [{'file': path, 'reason': reason} for path, reason in failed_files]
+        if options.dry_run:
+            result['outputs'] = []
+            result['estimate'] = {key: sum(p['estimate'][key] for p in plans)
+                                  for key in ('seconds', 'wall_seconds', 'pages', 'bytes')}
+        if result['failed'] or result['failed_files']:
+            code = EXIT_PARTIAL if result['outputs'] else EXIT_FAILED
+        else:
+            code = EXIT_OK
+    except Cancelled:
+        result['error'] = "已取消"
+        code = EXIT_CANCELLED
+    except Exception as e:
+        print(f"处理失败: {e}", file=sys.stderr)
+        result['error'] = str(e)
+        code = EXIT_FAILED
+    result['exit_code'] = code
+
+    if options.progress == 'json':
+        _json_line(progress_out, result)
+    elif options.progress == 'text':
+        progress_out.write(f"{'完成' if code == EXIT_OK else '结束'}（退出码 {code}）\n")
+        for output in result['outputs']:
+            progress_out.write(f"  输出: {output}\n")
+        for item in result['failed']:
+            progress_out.write(f"  ✗ {item['folder']}: {item['error']}\n")
+        for item in result['failed_files']:
+            progress_out.write(f"  ✗ {item['file']}: {item['reason']}\n")
+        progress_out.flush()
+    return code
+
+
+def main(argv=None) -> int:
+    options = parse_args(argv)
+    progress_out = _redirect_logs() if options.progress == 'json' else sys.stdout
+
+    # 在重定向之后导入：导入时打印的日志也进入标准错误
+    from document_processor import create_license_manager
+    from cancellation import CancelToken
+
+    if not options.dry_run:
+        # 与界面相同：每次处理（批量处理算一次）检查并更新使用次数
+        manager, can_use, message = create_license_manager()
+        if can_use:
+            can_use, message = manager.check_and_update_usage()
+        if not can_use:
+            print(f"授权检查未通过: {message}", file=sys.stderr)
+            return EXIT_LICENSE
+
+    # Ctrl+C / SIGTERM：取消处理（结束转换子进程、清理临时文件），再按一次Ctrl+C立即退出
+    cancel_token = CancelToken()
+
+    def on_signal(signum, frame):
+        if cancel_token.cancelled and signum == signal.SIGINT:
+            raise KeyboardInterrupt
+        print("\n收到中断信号，正在取消...", file=sys.stderr)
+        cancel_token.cancel()
+
+    signal.signal(signal.SIGINT, on_signal)
+    if hasattr(signal, 'SIGTERM'):
+        signal.signal(signal.SIGTERM, on_signal)
+    return run(options, progress_out, cancel_token)
+
+
+if __name__ == "__main__":
+    # 打包为exe后，进程池子进程需要此调用才能正常启动
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -0,0 +1,1498 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文档处理引擎：分类、执行计划、转换和合并（DocumentProcessor）
+不依赖界面和授权，可以在其他程序中直接导入使用:
+
+    from docproc_engine import DocumentProcessor
+    with DocumentProcessor() as processor:
+        processor.process_folder(folder, output_pdf)
+
+导入本模块只加载标准库和本项目的小模块，不输出任何内容；
+PIL、img2pdf、PyPDF2、python-docx、reportlab 等在用到时才导入。
+界面见 document_processor.py，命令行见 docproc_cli.py。
+"""
+
+import os
+import re
+import shutil
+import tempfile
+import subprocess
+import time
+import queue
+import threading
+import collections
+import multiprocessing
+import multiprocessing.util
+import hashlib
+import platform
+from concurrent.futures import Future, ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import List, Tuple
+from office_server import (get_office_server, shutdown_office_server, abort_office_server, kill_process,
+                           OfficeServerUnavailable, kill_listener)
+from conversion_cache import ConversionCache
+from folder_manifest import FolderManifest
+from batch_checkpoint import BatchCheckpoint
+from cost_model import CostModel
+from resource_governor import MemoryGovernor, available_cpus, available_memory
+from worker_pool import IsolatedPool, TaskLimits
+from cancellation import CancelToken, Cancelled
+from progress_events import ProgressStream, format_bytes
+from converter_probe import locate_converter, converter_ready
+
+
+# 进程池子进程专用的LibreOffice配置目录（每个子进程独立，避免多个soffice互相抢占配置锁）
+_soffice_profile_dir = None
+
+# 本进程中正在运行的soffice（单次转换调用），取消处理时结束它们
+_soffice_processes = set()
+_soffice_lock = threading.Lock()
+
+
+def _kill_soffice_processes():
+    """立即结束本进程启动的所有soffice（包括常驻转换服务）"""
+    with _soffice_lock:
+        processes = list(_soffice_processes)
+    for process in processes:
+        kill_process(process)
+    abort_office_server()
+
+
+def _terminate_worker(signum, frame):
+    """转换子进程收到SIGTERM（取消处理）：结束soffice、清理配置目录后立即退出"""
+    _kill_soffice_processes()
+    if _soffice_profile_dir:
+        shutil.rmtree(_soffice_profile_dir, ignore_errors=True)
+    os._exit(1)
+
+
+def _init_convert_worker():
+    """进程池子进程初始化：为本进程准备独立的LibreOffice配置目录"""
+    global _soffice_profile_dir
+    _soffice_profile_dir = os.path.join(tempfile.gettempdir(), f'docproc_lo_{os.getpid()}')
+    # 子进程退出时清理配置目录（multiprocessing子进程不会执行atexit）
+    multiprocessing.util.Finalize(
+        None, shutil.rmtree, args=(_soffice_profile_dir,),
+        kwargs={'ignore_errors': True}, exitpriority=0
+    )
+    if platform.system() != 'Windows':
+        import signal
+        signal.signal(signal.SIGTERM, _terminate_worker)
+
+
+def _cleanup_worker(pid: int):
+    """转换子进程被强制结束后，结束它遗留的常驻soffice，清理它来不及删除的LibreOffice配置目录"""
+    kill_listener(os.path.join(tempfile.gettempdir(), f'docproc_lo_server_{pid}'))
+    for name in (f'docproc_lo_{pid}', f'docproc_lo_server_{pid}'):
+        shutil.rmtree(os.path.join(tempfile.gettempdir(), name), ignore_errors=True)
+
+
+def _convert_worker(filepath: str, output_pdf: str, converter: str, office_mode: str) -> Tuple[bool, float]:
+    """进程池任务：在子进程中转换单个文件，返回 (是否成功, 耗时秒数)"""
+    processor = DocumentProcessor(max_workers=1, office_mode=office_mode, use_cache=False)
+    start = time.perf_counter()
+    ok = processor.convert_to_pdf(filepath, output_pdf, converter)
+    return ok, time.perf_counter() - start
+
+
+def _init_local_thread():
+    """本进程转换线程初始化：Windows上通过COM调用Word需要先初始化COM"""
+    if platform.system() == 'Windows':
+        try:
+            import pythoncom
+            pythoncom.CoInitialize()
+        except ImportError:
+            pass
+
+
+class _CancellableFile:
+    """写入前检查取消的文件包装（PyPDF2逐个对象调用write）"""
+    
+    def __init__(self, f, cancel_token: CancelToken):
+        self._f = f
+        self._cancel_token = cancel_token
+    
+    def write(self, data):
+        self._cancel_token.check()
+        return self._f.write(data)
+    
+    def __getattr__(self, name):
+        return getattr(self._f, name)
+
+
+class PdfPageWriter:
+    """
+    逐个追加PDF、最后一次写出
+    同一个输入（相同key）重复追加时共享内容流、图片和字体，只增加页面字典
+    """
+    
+    def __init__(self):
+        from PyPDF2 import PdfWriter
+        self.writer = PdfWriter()
+        self._readers = {}
+        self.documents = 0
+    
+    def append(self, pdf_file: str, key=None):
+        """追加一个PDF的全部页面"""
+        from PyPDF2 import PdfReader
+        key = pdf_file if key is None else key
+        if key not in self._readers:
+            stream = open(pdf_file, 'rb')
+            self._readers[key] = (stream, PdfReader(stream))
+        # 同一个PdfReader的页面多次加入时，PdfWriter只复制页面字典，下层对象共享
+        for page in self._readers[key][1].pages:
+            self.writer.add_page(page)
+        self.documents += 1
+    
+    def release(self, key):
+        """该输入不会再被追加：关闭文件（页面内容已复制到writer中，源文件可以删除）"""
+        stream, _ = self._readers.pop(key, (None, None))
+        if stream:
+            stream.close()
+    
+    def write(self, output_path: str, cancel_token: CancelToken = None):
+        """
+        写临时文件后原子替换，中途中断不会留下不完整的输出
+        写出是合并中最长的一步：期间每次写入前检查取消，取消后不生成输出文件
+        """
+        temp_path = output_path + '.part'
+        try:
+            with open(temp_path, 'wb') as f:
+                self.writer.write(f if cancel_token is None else _CancellableFile(f, cancel_token))
+            if cancel_token is not None:
+                cancel_token.check()
+            os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    
+    def close(self):
+        for key in list(self._readers):
+            self.release(key)
+
+
+class DocumentProcessor:
+    """文档处理核心类"""
+    
+    # 文档类型关键字匹配规则
+    DOC_PATTERNS = {
+        '申请书': r'申请书',
+        '户主声明书': r'户主声明书',
+        '承包方调查表': r'承包方调查表',
+        '承包地块调查表': r'承包地块调查表',
+        '公示结果归户表': r'公示结果归户表',
+        '公示无异议声明书': r'公示无异议声明书',
+        '土地承包合同书': r'土地承包合同书|合同书',
+        '登记簿': r'登记簿',
+        '地块示意图': r'DKSYT\d{2}',
+        '确权登记声明书': r'确权登记声明书',
+        '承诺书': r'承诺书',
+    }
+    
+    # 输出顺序
+    OUTPUT_ORDER = [
+        '申请书', '户主声明书', '承包方调查表', '承包地块调查表',
+        '公示结果归户表', '公示无异议声明书', '土地承包合同书',
+        '登记簿', '地块示意图', '确权登记声明书', '承诺书'
+    ]
+    
+    # 需要输出多份副本的文档类型
+    COPIES = {'土地承包合同书': 4}
+    
+    # 各扩展名对应的转换方式
+    CONVERTERS = {
+        '.pdf': 'pdf',
+        '.jpg': 'image', '.jpeg': 'image', '.png': 'image', '.bmp': 'image', '.tiff': 'image',
+        '.doc': 'word', '.docx': 'word',
+    }
+    
+    # 没有足够历史记录时的默认转换耗时（秒）: 转换方式 -> (每个文件固定耗时, 每页耗时)
+    COST_ESTIMATES = {
+        'pdf': (0.05, 0.01),
+        'image': (0.1, 0.0),
+        'word': (2.0, 0.2),
+        'reportlab': (0.3, 0.05),
+    }
+    # 图片需要解码重新编码时，每像素额外耗时（秒）
+    PIXEL_SECONDS = 5e-8
+    
+    # 每个转换任务的基础内存占用（字节），图片和PDF另加与文件/像素大小相关的部分
+    MEMORY_ESTIMATES = {
+        'pdf': 30 * 1024 * 1024,
+        'image': 30 * 1024 * 1024,
+        'word': 400 * 1024 * 1024,   # soffice进程
+        'reportlab': 80 * 1024 * 1024,
+    }
+    # 每个进程池子进程的常驻内存（Python解释器 + Pillow等）
+    WORKER_MEMORY = 150 * 1024 * 1024
+    
+    # 单个转换任务的默认限制：CPU时间（秒）、地址空间（字节）、运行时间（秒）
+    # 不适用于调用soffice的Word转换（soffice有自己的超时）
+    TASK_CPU_SECONDS = 600
+    TASK_MEMORY_BYTES = 4 * 1024 * 1024 * 1024
+    TASK_WALL_SECONDS = 900
+    
+    # 转换逻辑变化时加1，使旧的缓存结果失效
+    CONVERTER_VERSION = 2
+    
+    def __init__(self, max_workers: int = None, office_mode: str = 'server',
+                 use_cache: bool = True, cache_dir: str = None, cache_max_bytes: int = None,
+                 memory_budget: int = None, isolate: bool = True, task_limits: TaskLimits = None,
+                 history_path: str = None):
+        self.temp_dir = None
+        # 并行转换的进程数：None表示按可用CPU核心数和内存自动决定，1表示在当前进程中逐个转换
+        self.max_workers = max_workers or self.default_workers()
+        # macOS/Linux的Word转换方式：'server' 常驻LibreOffice服务（不可用时自动退回），
+        # 'batch' 所有Word文档合并为尽量少的soffice调用，'process' 每个文件单独调用soffice
+        self.office_mode = office_mode
+        # 同时运行的转换任务预计内存占用之和的上限（字节），None表示按当前可用内存决定
+        self.memory_budget = memory_budget
+        # 每个文件在独立的子进程中转换（崩溃、超出限制只影响该文件）；
+        # False时单进程模式在当前进程中转换（调试用）
+        self.isolate = isolate
+        self.task_limits = task_limits or TaskLimits(
+            cpu_seconds=self.TASK_CPU_SECONDS,
+            memory_bytes=self.TASK_MEMORY_BYTES,
+            wall_seconds=self.TASK_WALL_SECONDS,
+        )
+        # Word转换器是否可用（第一次需要时检测）
+        self._word_available = None
+        # 转换结果缓存：重新处理时未改动的文件直接复用上次的PDF
+        self.cache = ConversionCache(cache_dir, cache_max_bytes) if use_cache else None
+        # 预转换的暂存区：关闭缓存时预转换结果保存在这里（临时目录，关闭时删除）
+        self._staging = None
+        # 转换耗时模型（历史记录与缓存一样保存在本机，关闭缓存时也不记录）；
+        # 指定了缓存目录时历史记录也保存在其中（命令行的 --cache-dir、测试使用的临时目录）
+        if history_path is None and cache_dir is not None:
+            history_path = os.path.join(cache_dir, 'cost_history.json')
+        self.cost_model = CostModel(history_path) if use_cache else None
+        # 进程池在第一次需要时创建，之后所有文件夹（含批量处理）共用
+        self._executor = None
+        # 只能在本进程中串行转换的文件（Windows上的Word文档、单进程模式）使用的转换线程
+        self._local_executor = None
+    
+    @classmethod
+    def default_workers(cls) -> int:
+        """默认进程数：可用CPU核数（考虑CPU亲和性和容器配额），内存不足以容纳更多子进程时减少"""
+        workers = available_cpus()
+        memory = available_memory()
+        if memory is not None:
+            workers = min(workers, int(memory * MemoryGovernor.BUDGET_RATIO) // cls.WORKER_MEMORY)
+        return max(1, workers)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+    
+    def _get_executor(self) -> IsolatedPool:
+        """获取共享的隔离转换进程池（延迟创建）"""
+        if self._executor is None:
+            # 不使用fork启动子进程：fork会把其他线程此刻打开的文件描述符（如正在启动的soffice的管道）
+            # 带进子进程，导致那个subprocess调用一直等不到管道关闭
+            methods = multiprocessing.get_all_start_methods()
+            context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+            self._executor = IsolatedPool(
+                self.max_workers, mp_context=context, initializer=_init_convert_worker,
+                limits=self.task_limits, on_worker_exit=_cleanup_worker
+            )
+        return self._executor
+    
+    def _get_local_executor(self) -> ThreadPoolExecutor:
+        """获取本进程的单线程转换器（延迟创建）"""
+        if self._local_executor is None:
+            self._local_executor = ThreadPoolExecutor(max_workers=1, initializer=_init_local_thread)
+        return self._local_executor
+    
+    def shutdown(self):
+        """关闭共享进程池和常驻LibreOffice服务（子进程退出时会关闭各自的服务并清理配置目录）"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._local_executor is not None:
+            self._local_executor.shutdown(wait=True)
+            self._local_executor = None
+        if self._staging is not None:
+            shutil.rmtree(self._staging.cache_dir, ignore_errors=True)
+            self._staging = None
+        shutdown_office_server()
+    
+    @staticmethod
+    def check_word_converter(refresh: bool = False):
+        """检测Word转换器是否可用，返回 (是否可用, 提示信息)；检测结果有缓存，见 converter_probe"""
+        from converter_probe import detect_converter
+        info = detect_converter(refresh=refresh)
+        message = info['message']
+        if info['available'] and info['version']:
+            message += f" ({info['version']})"
+        return info['available'], message
+    
+    def render_docx_text(self, word_path: str, pdf_path: str):
+        """用reportlab按纯文字排版生成PDF（没有Word/LibreOffice时的简易转换，只保留段落文字）"""
+        from docx import Document
+        from reportlab.lib.pagesizes import A4
+        from reportlab.pdfbase import pdfmetrics
+        from reportlab.pdfbase.cidfonts import UnicodeCIDFont
+        from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+        from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+        from reportlab.lib.enums import TA_LEFT, TA_CENTER
+        
+        filename = os.path.basename(word_path)
+        
+        # 使用python-docx读取.docx内容
+        doc = Document(word_path)
+        
+        # 创建PDF文档
+        pdf_doc = SimpleDocTemplate(pdf_path, pagesize=A4)
+        story = []
+        
+        # 注册中文字体
+        pdfmetrics.registerFont(UnicodeCIDFont('STSong-Light'))
+        
+        # 创建样式
+        styles = getSampleStyleSheet()
+        chinese_style = ParagraphStyle(
+            'Chinese',
+            parent=styles['Normal'],
+            fontName='STSong-Light',
+            fontSize=12,
+            leading=20,
+            alignment=TA_LEFT,
+        )
+        
+        title_style = ParagraphStyle(
+            'ChineseTitle',
+            parent=styles['Heading1'],
+            fontName='STSong-Light',
+            fontSize=16,
+            leading=24,
+            alignment=TA_CENTER,
+        )
+        
+        # 添加标题
+        story.append(Paragraph(filename, title_style))
+        story.append(Spacer(1, 20))
+        
+        # 添加段落内容
+        for paragraph in doc.paragraphs:
+            if paragraph.text.strip():
+                # 转义特殊字符
+                text = paragraph.text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
+                try:
+                    p = Paragraph(text, chinese_style)
+                    story.append(p)
+                    story.append(Spacer(1, 12))
+                except Exception as e:
+                    # 如果某个段落出错，跳过
+                    print(f"    警告: 段落处理失败，已跳过")
+                    continue
+        
+        # 生成PDF
+        pdf_doc.build(story)
+    
+    def word_converter_available(self) -> bool:
+        """
+        快速检测Word转换器是否存在（不启动Word/LibreOffice）
+        与界面的检测使用同一个查找逻辑（converter_probe），保证提示与实际转换一致
+        """
+        if self._word_available is None:
+            self._word_available = converter_ready() is not None
+        return self._word_available
+    
+    def _is_generated_pdf(self, pdf_path: str) -> bool:
+        """是否是本工具预处理时用reportlab生成的PDF（只读取文档信息）"""
+        try:
+            from PyPDF2 import PdfReader
+            with open(pdf_path, 'rb') as f:
+                producer = (PdfReader(f).metadata or {}).get('/Producer', '')
+            return 'reportlab' in str(producer).lower()
+        except Exception:
+            return False
+    
+    def plan_folder(self, folder_path: str, output_pdf: str = None) -> dict:
+        """
+        扫描一次文件夹，生成执行计划：每个文档只选一个来源，按输出顺序排列
+        - 同目录同名的Word和PDF：PDF是本工具以前生成的则用Word重新转换，否则直接使用PDF
+        - 没有Word转换器时，.docx按纯文字排版转换，.doc无法处理
+        - 排除隐藏文件、Word临时文件（~$开头）和输出文件本身
+        返回: {
+            'documents': [{'doc_type', 'source', 'converter', 'copies'}, ...],  # 输出顺序
+            'excluded': [(文件, 原因), ...],
+            'unclassified': [文件, ...],
+            'files': 扫描到的文件数,
+        }
+        """
+        output_real = os.path.realpath(output_pdf) if output_pdf else None
+        excluded = []
+        groups = {}  # (目录, 小写文件名主干) -> {扩展名: 文件}
+        others = []
+        count = 0
+        for root, dirs, filenames in os.walk(folder_path):
+            for filename in filenames:
+                if filename.startswith('.'):
+                    continue
+                count += 1
+                filepath = os.path.join(root, filename)
+                if filename.startswith('~'):
+                    excluded.append((filepath, 'Word临时文件'))
+                    continue
+                if output_real and os.path.realpath(filepath) == output_real:
+                    excluded.append((filepath, '输出文件'))
+                    continue
+                stem, ext = os.path.splitext(filename)
+                ext = ext.lower()
+                if ext in ('.doc', '.docx', '.pdf'):
+                    groups.setdefault((root, stem.lower()), {})[ext] = filepath
+                else:
+                    others.append(filepath)
+        
+        word_available = None
+        sources = {}  # 选中的文件 -> 转换方式
+        for files in groups.values():
+            pdf = files.get('.pdf')
+            word = files.get('.docx') or files.get('.doc')
+            if word and files.get('.docx') and files.get('.doc'):
+                excluded.append((files['.doc'], '同名.docx已存在'))
+            if pdf and word:
+                if self._is_generated_pdf(pdf):
+                    excluded.append((pdf, '本工具以前生成的PDF'))
+                    pdf = None
+                else:
+                    excluded.append((word, '同名PDF已存在'))
+                    word = None
+            if pdf:
+                sources[pdf] = 'pdf'
+            if word:
+                if word_available is None:
+                    word_available = self.word_converter_available()
+                if word_available:
+                    sources[word] = 'word'
+                elif word.lower().endswith('.docx'):
+                    sources[word] = 'reportlab'
+                else:
+                    excluded.append((word, '没有Word转换器，无法转换.doc'))
+        for filepath in others:
+            converter = self.CONVERTERS.get(os.path.splitext(filepath)[1].lower())
+            if converter:
+                sources[filepath] = converter
+            else:
+                excluded.append((filepath, '不支持的格式'))
+        
+        classified = self.sort_files(sorted(sources))
+        documents = []
+        for doc_type in self.OUTPUT_ORDER:
+            for filepath in classified[doc_type]:
+                documents.append({
+                    'doc_type': doc_type,
+                    'source': filepath,
+                    'converter': sources[filepath],
+                    'copies': self.COPIES.get(doc_type, 1),
+                })
+        
+        return {
+            'folder': folder_path,
+            'documents': documents,
+            'excluded': excluded,
+            'unclassified': classified['未分类'],
+            'files': count,
+        }
+    
+    def _docx_pages(self, filepath: str) -> int:
+        """读取.docx的页数：优先使用文档属性中Word保存的页数，否则按正文大小估算"""
+        import zipfile
+        with zipfile.ZipFile(filepath) as z:
+            try:
+                app = z.read('docProps/app.xml').decode('utf-8', 'ignore')
+                match = re.search(r'<Pages>(\d+)</Pages>', app)
+                if match and int(match.group(1)) > 0:
+                    return int(match.group(1))
+            except KeyError:
+                pass
+            # 没有页数属性时，按document.xml的大小估算（约20KB一页）
+            return max(1, z.getinfo('word/document.xml').file_size // (20 * 1024))
+    
+    def estimate_document(self, item: dict) -> dict:
+        """
+        估算单个文档的转换耗时、页数和输出大小（只读取文件头，不做转换）
+        耗时优先使用历史记录拟合的模型，记录不足时使用默认估算
+        返回: {'seconds', 'pages', 'bytes', 'memory', 'note', 'features'}
+        """
+        filepath, converter = item['source'], item['converter']
+        size = os.path.getsize(filepath)
+        base, per_page = self.COST_ESTIMATES[converter]
+        note = ''
+        pixels = 0
+        memory = self.MEMORY_ESTIMATES[converter]
+        try:
+            if converter == 'pdf':
+                pages = self._pdf_page_count(filepath)
+                output_bytes = size
+                memory += size * 2
+            elif converter == 'image':
+                info = self._image_info(filepath)
+                if info is None:
+                    raise ValueError("无法识别的图片")
+                pages = 1
+                note = f"{info['width']}x{info['height']}"
+                if info['direct']:
+                    # 原样嵌入，输出大小约等于图片文件大小
+                    output_bytes = size
+                    memory += size * 2
+                else:
+                    # 解码后按JPEG重新压缩，耗时与像素数成正比；
+                    # 内存为解码后的像素（按4字节/像素）加上旋转或转RGB时的一份副本
+                    pixels = info['width'] * info['height']
+                    output_bytes = pixels * 3 // 10
+                    memory += pixels * 4 * 2
+                    note += '，需重新编码'
+            else:
+                pages = self._docx_pages(filepath) if filepath.lower().endswith('.docx') else max(1, size // (30 * 1024))
+                output_bytes = pages * (20 * 1024 if converter == 'reportlab' else 50 * 1024)
+        except Exception as e:
+            pages, output_bytes = 1, size
+            memory += size * 2
+            note = f"无法读取文件头: {e}"
+        
+        features = {'pages': pages, 'mb': size / (1024 * 1024), 'megapixels': pixels / 1e6}
+        seconds = self.cost_model.predict(converter, features) if self.cost_model is not None else None
+        if seconds is None:
+            seconds = base + per_page * pages + pixels * self.PIXEL_SECONDS
+        return {'seconds': seconds, 'pages': pages, 'bytes': output_bytes, 'memory': memory,
+                'note': note, 'features': features}
+    
+    @staticmethod
+    def _pdf_page_count(filepath: str) -> int:
+        """
+        PDF的页数：只读取交叉引用表和文档目录中页面树根节点的/Count，不遍历页面
+        （len(reader.pages) 会加载每一个页面对象）；读取失败时按文件大小估算（约100KB一页）
+        """
+        from PyPDF2 import PdfReader
+        try:
+            with open(filepath, 'rb') as f:
+                count = PdfReader(f, strict=False).trailer['/Root']['/Pages']['/Count']
+            return max(1, int(count))
+        except Exception:
+            return max(1, os.path.getsize(filepath) // (100 * 1024))
+    
+    def estimate_plan(self, plan: dict) -> dict:
+        """
+        为执行计划中的每个文档加上估算结果，并汇总
+        副本共用同一次转换和同一份页面内容，只计算一次耗时和大小
+        """
+        total_seconds = 0.0
+        longest = 0.0
+        total_bytes = 0
+        total_pages = 0
+        estimated = {}
+        for item in plan['documents']:
+            source = item['source']
+            if source not in estimated:
+                estimated[source] = self.estimate_document(item)
+                total_seconds += estimated[source]['seconds']
+                longest = max(longest, estimated[source]['seconds'])
+                total_bytes += estimated[source]['bytes']
+            item['estimate'] = estimated[source]
+            total_pages += estimated[source]['pages'] * item['copies']
+        
+        workers = self.max_workers or os.cpu_count() or 1
+        plan['estimate'] = {
+            'seconds': total_seconds,
+            # 并行时的大致耗时：不会少于最慢的单个文件
+            'wall_seconds': max(total_seconds / workers, longest),
+            'pages': total_pages,
+            'bytes': total_bytes,
+        }
+        return plan
+    
+    def print_plan(self, plan: dict):
+        """打印执行计划（试运行时使用）"""
+        print(f"\n执行计划: {plan.get('folder', '')}")
+        print("-" * 50)
+        for item in plan['documents']:
+            est = item['estimate']
+            copies = f" ×{item['copies']}" if item['copies'] > 1 else ''
+            note = f" ({est['note']})" if est['note'] else ''
+            print(f"  {item['doc_type']}{copies}: {os.path.basename(item['source'])} "
+                  f"[{item['converter']}] 约{est['seconds']:.1f}秒, {est['pages']}页, "
+                  f"{format_bytes(est['bytes'])}{note}")
+        for filepath in plan['unclassified']:
+            print(f"  ⚠️ 未分类（不会合并）: {os.path.basename(filepath)}")
+        for filepath, reason in plan['excluded']:
+            print(f"  跳过 {os.path.basename(filepath)}: {reason}")
+        total = plan['estimate']
+        print("-" * 50)
+        print(f"  合计: {len(plan['documents'])} 份文档, {total['pages']} 页, "
+              f"约{format_bytes(total['bytes'])}, 预计耗时约{total['wall_seconds']:.0f}秒"
+              f"（单进程约{total['seconds']:.0f}秒）")
+    
+    def find_files(self, directory: str) -> List[str]:
+        """递归查找所有文件"""
+        files = []
+        for root, dirs, filenames in os.walk(directory):
+            for filename in filenames:
+                if not filename.startswith('.'):
+                    files.append(os.path.join(root, filename))
+        return files
+    
+    def classify_file(self, filepath: str) -> Tuple[str, str]:
+        """分类文件"""
+        filename = os.path.basename(filepath)
+        for doc_type, pattern in self.DOC_PATTERNS.items():
+            if re.search(pattern, filename, re.IGNORECASE):
+                return (doc_type, filepath)
+        return ('未分类', filepath)
+    
+    def sort_files(self, files: List[str]) -> dict:
+        """按要求对文件分类和排序"""
+        classified = {
+            '申请书': [], '户主声明书': [], '承包方调查表': [], '承包地块调查表': [],
+            '公示结果归户表': [], '公示无异议声明书': [], '土地承包合同书': [],
+            '登记簿': [], '地块示意图': [], '确权登记声明书': [], '承诺书': [], '未分类': []
+        }
+        
+        for filepath in files:
+            doc_type, _ = self.classify_file(filepath)
+            classified[doc_type].append(filepath)
+        
+        if classified['地块示意图']:
+            classified['地块示意图'].sort(key=lambda x: self._extract_plot_number(x))
+        
+        return classified
+    
+    def _extract_plot_number(self, filepath: str) -> int:
+        """从地块示意图文件名中提取编号"""
+        filename = os.path.basename(filepath)
+        match = re.search(r'DKSYT(\d{2})', filename, re.IGNORECASE)
+        return int(match.group(1)) if match else 999
+    
+    def convert_to_pdf(self, filepath: str, output_pdf: str, converter: str = None) -> bool:
+        """将文档转换为PDF（converter为'reportlab'时，.docx按纯文字排版转换）"""
+        ext = os.path.splitext(filepath)[1].lower()
+        import platform
+        is_windows = platform.system() == 'Windows'
+        
+        try:
+            if converter == 'reportlab':
+                print(f"  使用简易排版转换Word文档（仅文字）...")
+                self.render_docx_text(filepath, output_pdf)
+                return os.path.exists(output_pdf)
+            elif ext in ['.pdf']:
+                shutil.copy(filepath, output_pdf)
+                return True
+            elif ext in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']:
+                # 快速路径：JPEG和无透明通道的PNG直接嵌入，不解码、不重新压缩
+                if self._embed_image(filepath, output_pdf):
+                    return True
+                from PIL import Image
+                import img2pdf
+                with open(output_pdf, 'wb') as f:
+                    img = Image.open(filepath)
+                    
+                    # 检查图片方向：如果宽度大于高度（横向），则旋转90度使其竖向
+                    width, height = img.size
+                    if width > height:
+                        print(f"检测到横向图片 {os.path.basename(filepath)} ({width}x{height})，旋转90度...")
+                        img = img.rotate(270, expand=True)
+                    else:
+                        print(f"图片 {os.path.basename(filepath)} 已是竖向 ({width}x{height})，无需旋转")
+                    
+                    if img.mode in ('RGBA', 'LA', 'P'):
+                        img = img.convert('RGB')
+                    
+                    # 保存到临时文件后再转换为PDF
+                    temp_img_path = output_pdf.replace('.pdf', '_temp.jpg')
+                    img.save(temp_img_path, 'JPEG', quality=95)
+                    
+                    # 转换为PDF
+                    pdf_bytes = img2pdf.convert(temp_img_path)
+                    f.write(pdf_bytes)
+                    
+                    # 删除临时图片
+                    if os.path.exists(temp_img_path):
+                        os.remove(temp_img_path)
+                return True
+            elif ext in ['.doc', '.docx']:
+                if is_windows:
+                    try:
+                        from docx2pdf import convert
+                        print(f"  [Windows] 使用docx2pdf转换Word文档...")
+                        convert(filepath, output_pdf)
+                        if os.path.exists(output_pdf):
+                            print(f"  ✓ Word转PDF成功")
+                            return True
+                        else:
+                            print(f"  ✗ 转换失败: PDF文件未生成")
+                            return False
+                    except Exception as e:
+                        print(f"  ✗ Word转PDF失败: {str(e)}")
+                        print(f"  提示: 请确保已安装Microsoft Word，docx2pdf需要Word才能工作")
+                        return False
+                else:
+                    # macOS/Linux: 优先交给常驻LibreOffice服务，省去每个文件的冷启动
+                    server = get_office_server() if self.office_mode == 'server' else None
+                    if server is not None:
+                        print(f"  [macOS/Linux] 使用常驻LibreOffice服务转换Word文档...")
+                        try:
+                            if server.convert(filepath, output_pdf):
+                                print(f"  ✓ Word转PDF成功")
+                                return True
+                            return False
+                        except OfficeServerUnavailable:
+                            # 服务启动失败与文档无关，改为单次调用soffice
+                            pass
+                    
+                    print(f"  [macOS/Linux] 使用LibreOffice转换Word文档...")
+                    # soffice按源文件名输出<名称>.pdf：每次调用使用独立的输出目录，
+                    # 否则不同子文件夹中的同名文档同时转换时会互相覆盖
+                    outdir = tempfile.mkdtemp(prefix='soffice_out_', dir=os.path.dirname(output_pdf) or None)
+                    try:
+                        result = self._run_soffice([filepath], outdir, timeout=30)
+                        expected_pdf = os.path.join(outdir, os.path.splitext(os.path.basename(filepath))[0] + '.pdf')
+                        if os.path.exists(expected_pdf):
+                            shutil.move(expected_pdf, output_pdf)
+                            print(f"  ✓ Word转PDF成功")
+                            return True
+                        else:
+                            print(f"  ✗ 转换失败: PDF文件未生成")
+                            if result.stderr:
+                                print(f"  错误信息: {result.stderr}")
+                            print(f"  提示: 请安装LibreOffice: brew install --cask libreoffice")
+                            return False
+                    except FileNotFoundError:
+                        print(f"  ✗ 找不到soffice命令")
+                        print(f"  提示: 请安装LibreOffice: brew install --cask libreoffice")
+                        return False
+                    except subprocess.TimeoutExpired:
+                        print(f"  ✗ 转换超时(30秒)")
+                        return False
+                    except Exception as e:
+                        print(f"  ✗ Word转PDF失败: {str(e)}")
+                        return False
+                    finally:
+                        shutil.rmtree(outdir, ignore_errors=True)
+                return False
+            return False
+        except Exception as e:
+            print(f"转换失败 {filepath}: {str(e)}")
+            return False
+    
+    def _image_info(self, filepath: str):
+        """读取图片文件头：尺寸、格式，以及能否直接嵌入PDF；无法识别时返回None"""
+        from PIL import Image
+        try:
+            # Image.open只读取文件头
+            with Image.open(filepath) as img:
+                fmt = img.format
+                mode = img.mode
+                width, height = img.size
+                has_alpha = 'transparency' in img.info
+        except Exception:
+            return None
+        
+        if fmt == 'JPEG':
+            direct = mode in ('L', 'RGB', 'CMYK')
+        elif fmt == 'PNG':
+            direct = mode in ('1', 'L', 'RGB', 'P') and not has_alpha
+        else:
+            direct = False
+        return {'format': fmt, 'mode': mode, 'width': width, 'height': height, 'direct': direct}
+    
+    def _embed_image(self, filepath: str, output_pdf: str) -> bool:
+        """
+        图片直接嵌入PDF（不解码像素、不重新压缩）
+        JPEG原样写入，PNG按原压缩数据写入；横向图片通过页面的/Rotate属性旋转90度，
+        不旋转像素。页面尺寸与解码后重新编码的方式一致（按96dpi计算）。
+        其他格式或带透明通道的图片返回False，由调用方解码后转换。
+        """
+        info = self._image_info(filepath)
+        if info is None or not info['direct']:
+            return False
+        width, height = info['width'], info['height']
+        
+        # 检查图片方向：如果宽度大于高度（横向），则让页面旋转90度使其竖向
+        rotation = '90' if width > height else '0'
+        if width > height:
+            print(f"检测到横向图片 {os.path.basename(filepath)} ({width}x{height})，页面旋转90度...")
+        else:
+            print(f"图片 {os.path.basename(filepath)} 已是竖向 ({width}x{height})，无需旋转")
+        
+        import img2pdf
+        try:
+            # 明确指定旋转角度，忽略EXIF方向信息（与解码转换时的行为一致）
+            pdf_bytes = img2pdf.convert(
+                filepath,
+                rotation=img2pdf.Rotation[rotation],
+                layout_fun=img2pdf.get_fixed_dpi_layout_fun((96, 96)),
+            )
+        except Exception as e:
+            print(f"  图片无法直接嵌入，改为解码后转换: {e}")
+            return False
+        with open(output_pdf, 'wb') as f:
+            f.write(pdf_bytes)
+        return True
+    
+    def _run_soffice(self, filepaths: List[str], outdir: str, timeout: int) -> subprocess.CompletedProcess:
+        """
+        调用一次soffice把若干文档转换为PDF，输出为 outdir/<文件名>.pdf
+        soffice以独立进程组启动并登记，超时或取消处理时连同子进程一起结束
+        """
+        # 与检测使用同一个程序（macOS上LibreOffice通常不在PATH中）
+        cmd = [locate_converter()[1] or 'soffice', '--headless']
+        if _soffice_profile_dir:
+            from pathlib import Path
+            cmd.append('-env:UserInstallation=' + Path(_soffice_profile_dir).as_uri())
+        cmd += ['--convert-to', 'pdf', '--outdir', outdir] + list(filepaths)
+        process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True,
+                                   start_new_session=(os.name != 'nt'))
+        with _soffice_lock:
+            _soffice_processes.add(process)
+        try:
+            stdout, stderr = process.communicate(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            kill_process(process)
+            process.communicate()
+            raise
+        finally:
+            with _soffice_lock:
+                _soffice_processes.discard(process)
+        return subprocess.CompletedProcess(cmd, process.returncode, stdout, stderr)
+    
+    def convert_word_batch(self, pairs: List[Tuple[str, str]]) -> List[bool]:
+        """
+        用尽量少的soffice调用批量转换Word文档（适用于不允许常驻LibreOffice进程的环境）
+        批量调用没有生成PDF的文件（如另一个文档使soffice中途退出、超时）再单独转换一次
+        pairs: [(源文件, 输出PDF), ...]
+        返回: 与pairs一一对应的转换结果
+        """
+        results = [False] * len(pairs)
+        
+        # soffice按文件名输出<名称>.pdf，同名文件必须分到不同批次
+        rounds = []
+        for n, (filepath, _) in enumerate(pairs):
+            stem = os.path.splitext(os.path.basename(filepath))[0].lower()
+            for names in rounds:
+                if stem not in names:
+                    names[stem] = n
+                    break
+            else:
+                rounds.append({stem: n})
+        
+        for names in rounds:
+            indexes = list(names.values())
+            outdir = tempfile.mkdtemp(prefix='soffice_batch_')
+            try:
+                print(f"  [macOS/Linux] 单次调用LibreOffice批量转换 {len(indexes)} 个Word文档...")
+                try:
+                    result = self._run_soffice([pairs[n][0] for n in indexes], outdir, timeout=30 * len(indexes))
+                    if result.stderr:
+                        print(f"  soffice输出: {result.stderr.strip()}")
+                except FileNotFoundError:
+                    print(f"  ✗ 找不到soffice命令")
+                    print(f"  提示: 请安装LibreOffice: brew install --cask libreoffice")
+                    return results
+                except subprocess.TimeoutExpired:
+                    # 超时前已经生成的PDF仍然可用
+                    print(f"  ✗ 批量转换超时({30 * len(indexes)}秒)")
+                
+                for n in indexes:
+                    filepath, output_pdf = pairs[n]
+                    produced = os.path.join(outdir, os.path.splitext(os.path.basename(filepath))[0] + '.pdf')
+                    if os.path.exists(produced):
+                        shutil.move(produced, output_pdf)
+                        results[n] = True
+            finally:
+                shutil.rmtree(outdir, ignore_errors=True)
+        
+        for n, (filepath, output_pdf) in enumerate(pairs):
+            if not results[n]:
+                print(f"  批量转换未生成 {os.path.basename(filepath)} 的PDF，单独转换...")
+                results[n] = self.convert_to_pdf(filepath, output_pdf, 'word')
+        return results
+    
+    def _source_key(self, filepath: str) -> str:
+        """源文件指纹：扩展名+内容哈希（路径不同但内容相同的文件视为同一文档）"""
+        sha = hashlib.sha256(os.path.splitext(filepath)[1].lower().encode('utf-8'))
+        with open(filepath, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b''):
+                sha.update(chunk)
+        return sha.hexdigest()
+    
+    def _convert_job(self, filepath: str, output: str, converter: str = None) -> Tuple[bool, float]:
+        """在当前进程中转换单个文件（异常视为失败），返回 (是否成功, 耗时秒数)"""
+        start = time.perf_counter()
+        try:
+            ok = self.convert_to_pdf(filepath, output, converter)
+        except Exception as e:
+            print(f"  ✗ 转换出错: {str(e)}")
+            ok = False
+        return ok, time.perf_counter() - start
+    
+    def _conversion_settings(self, filepath: str, converter: str) -> dict:
+        """影响转换结果的设置，作为缓存键的一部分"""
+        ext = os.path.splitext(filepath)[1].lower()
+        settings = {'version': self.CONVERTER_VERSION, 'ext': ext, 'converter': converter}
+        if converter == 'word':
+            settings['converter'] = 'word' if platform.system() == 'Windows' else 'libreoffice'
+        return settings
+    
+    def _run_settings(self) -> dict:
+        """影响整个文件夹输出的设置，记录在处理清单中"""
+        return {
+            'version': self.CONVERTER_VERSION,
+            'word': 'word' if platform.system() == 'Windows' else 'libreoffice',
+        }
+    
+    def _start_jobs(self, jobs: List[Tuple[str, str, str, str]], indexes: List[int]) -> Tuple[dict, set]:
+        """
+        为需要转换的任务准备启动函数：返回 ({任务下标: 启动函数}, 批量转换的任务下标)，
+        调用启动函数提交任务并返回Future，Future的结果为 (是否成功, 转换耗时秒数)
+        批量模式下的Word文档在这里就一次性交给soffice，它们的Future在批量转换完成时一起完成
+        """
+        is_windows = platform.system() == 'Windows'
+        word_jobs = [n for n in indexes if jobs[n][3] == 'word']
+        # 批量模式：所有Word文档合并为尽量少的soffice调用
+        batch = word_jobs if (not is_windows and self.office_mode == 'batch') else []
+        # Word通过COM转换时多个进程会共用同一个Word实例，只能在当前进程中逐个转换
+        local = word_jobs if is_windows else []
+        pooled = sorted(set(indexes) - set(local) - set(batch))
+        
+        if not self.isolate and min(self.max_workers, len(pooled)) <= 1:
+            local, pooled = sorted(set(indexes) - set(batch)), []
+        if pooled:
+            print(f"使用 {min(self.max_workers, len(pooled))} 个进程转换 {len(pooled)} 个文件")
+        
+        starters = {}
+        for n in pooled:
+            # 调用soffice的任务不设资源限制：soffice会继承限制，且有自己的超时
+            starters[n] = lambda n=n: self._get_executor().submit(
+                _convert_worker, jobs[n][1], jobs[n][2], jobs[n][3], self.office_mode,
+                limited=(jobs[n][3] != 'word'))
+        for n in local:
+            starters[n] = lambda n=n: self._get_local_executor().submit(
+                self._convert_job, jobs[n][1], jobs[n][2], jobs[n][3])
+        
+        if batch:
+            batch_futures = {n: Future() for n in batch}
+            
+            def run_batch():
+                start = time.perf_counter()
+                results = self.convert_word_batch([(jobs[n][1], jobs[n][2]) for n in batch])
+                return results, time.perf_counter() - start
+            
+            def finish_batch(future):
+                try:
+                    batch_results, elapsed = future.result()
+                except Exception as e:
+                    print(f"  ✗ 批量转换出错: {str(e)}")
+                    batch_results, elapsed = [False] * len(batch), None
+                # 批量转换无法区分单个文件的耗时，按平均值记录
+                seconds = elapsed / len(batch) if elapsed is not None else None
+                for n, ok in zip(batch, batch_results):
+                    batch_futures[n].set_result((ok, seconds))
+            
+            self._get_local_executor().submit(run_batch).add_done_callback(finish_batch)
+            for n in batch:
+                starters[n] = lambda n=n: batch_futures[n]
+        return starters, set(batch)
+    
+    def _dispatch_order(self, costs: dict, hits: set) -> List[int]:
+        """
+        任务的提交顺序：缓存命中的先提交（不占用进程，合并可以立即开始），
+        其余按预计耗时从长到短（最长任务优先），避免最后只剩一个大文件在单独转换
+        costs: {任务下标: 预计耗时}
+        """
+        pending = [n for n in costs if n not in hits]
+        return sorted(hits) + sorted(pending, key=lambda n: (-costs[n], n))
+    
+    def _convert_and_merge(self, jobs: List[Tuple[str, str, str, str]], source_keys: List[str],
+                           slots: List[int], output_pdf: str, progress: ProgressStream = None,
+                           failures: list = None, cancel_token: CancelToken = None) -> int:
+        """
+        转换并合并（流水线）
+        转换结果经有界队列送入合并线程，合并线程按slots顺序在结果就绪时立即追加页面，
+        合并与剩余的转换同时进行。已提交但尚未开始合并的任务数不超过窗口大小，
+        每个临时PDF在最后一次被追加后立即删除，临时磁盘占用有上限。
+        任务按预计耗时从长到短提交（见_dispatch_order），输出顺序仍由slots决定。
+        
+        jobs: [(文档类型, 源文件, 临时PDF, 转换方式), ...]，按第一次出现在slots中的顺序排列
+        source_keys: 与jobs对应的源文件指纹
+        slots: 输出顺序中的每一份文档对应的任务下标（重复副本指向同一任务）
+        output_pdf: None时只转换（结果保存到缓存或预转换暂存区），不合并
+        progress: 进度事件流，每完成一个文件发出一条 'convert' 事件
+        failures: 转换失败的文件追加到这个列表: [(源文件, 原因), ...]
+        cancel_token: 取消时停止提交、结束正在转换的子进程和soffice，不写出输出文件，抛出Cancelled
+        返回: 合并的文档份数
+        """
+        total = len(jobs)
+        progress = ProgressStream.of(progress)
+        last_slot = {n: position for position, n in enumerate(slots)}
+        window_size = max(4, 2 * self.max_workers)
+        window = threading.Semaphore(window_size)
+        merge_queue = queue.Queue(maxsize=window_size)
+        merged = {'documents': 0, 'error': None}
+        started = set()  # 已开始合并的任务（已归还窗口名额）
+        
+        def merge_worker():
+            """合并线程：按slots顺序追加已完成的转换结果"""
+            page_writer = PdfPageWriter()
+            finished = {}    # 已完成转换的任务 -> 是否成功
+            try:
+                for position, n in enumerate(slots):
+                    if cancel_token is not None:
+                        # 取消后停止合并，继续取走队列中的结果（见下方异常处理），避免转换端阻塞
+                        cancel_token.check()
+                    while n not in finished:
+                        item = merge_queue.get()
+                        if item is None:
+                            return
+                        finished[item[0]] = item[1]
+                    if n not in started:
+                        started.add(n)
+                        window.release()
+                    if finished[n] and output_pdf is not None:
+                        page_writer.append(jobs[n][2], key=n)
+                    if last_slot[n] == position:
+                        # 之后不会再用到：关闭并删除临时PDF
+                        page_writer.release(n)
+                        if os.path.exists(jobs[n][2]):
+                            os.remove(jobs[n][2])
+                if cancel_token is not None:
+                    cancel_token.check()
+                if page_writer.documents:
+                    page_writer.write(output_pdf, cancel_token)
+                    merged['written'] = True
+                merged['documents'] = page_writer.documents
+            except Exception as e:
+                merged['error'] = e
+                # 出错后继续取走队列中的结果并归还窗口名额，避免转换端阻塞
+                for _ in range(len(finished) - len(started)):
+                    window.release()
+                while merge_queue.get() is not None:
+                    window.release()
+            finally:
+                page_writer.close()
+        
+        # 已缓存（或已预转换）的转换结果直接复用，其余的再转换
+        cache = self.cache if self.cache is not None else self._staging
+        hits = set()
+        cache_keys = []
+        if cache is not None:
+            cache_keys = [cache.make_key(key, self._conversion_settings(job[1], job[3]))
+                          for key, job in zip(source_keys, jobs)]
+            hits = {n for n in range(total) if cache.get(cache_keys[n], jobs[n][2])}
+            if hits:
+                print(f"缓存命中 {len(hits)} 个文件，需转换 {total - len(hits)} 个")
+        starters, batch = self._start_jobs(jobs, [n for n in range(total) if n not in hits])
+        
+        # 预计耗时和内存占用（缓存命中的不需要转换），用于调度顺序、进度和剩余时间
+        estimates = {n: self.estimate_document({'source': job[1], 'converter': job[3]})
+                     for n, job in enumerate(jobs) if n not in hits}
+        costs = {n: estimates[n]['seconds'] if n in estimates else 0.0 for n in range(total)}
+        # 批量转换的Word文档已经在一个soffice中一起运行，不再单独占用预算
+        footprints = {n: estimates[n]['memory'] if n in estimates and n not in batch else 0
+                      for n in range(total)}
+        governor = MemoryGovernor(self.memory_budget)
+        cost_total = sum(costs.values()) or 1.0
+        cost_done = 0.0
+        bytes_done = 0
+        pages_done = 0
+        
+        writer = threading.Thread(target=merge_worker, name='pdf-merge', daemon=True)
+        writer.start()
+        
+        # 按预计耗时从长到短提交任务，窗口已满时等待合并线程归还名额
+        waiting = self._dispatch_order(costs, hits)
+        dispatched = set()
+        running = {}
+        done = 0
+        try:
+            while waiting or running:
+                if cancel_token is not None and cancel_token.cancelled:
+                    self._cancel_running(running)
+                    raise Cancelled()
+                while waiting and window.acquire(timeout=0 if running else 0.2):
+                    if len(dispatched - started) >= window_size - 1:
+                        # 最后一个名额留给合并线程正在等待的任务（未提交任务中输出最靠前的），
+                        # 否则窗口可能被排在后面的长任务占满，合并线程永远等不到下一个结果
+                        candidates = [min(waiting)]
+                    else:
+                        candidates = waiting
+                    # 按顺序找第一个内存预算放得下的任务（没有任务在运行时总能放行）
+                    n = None
+                    for m in candidates:
+                        if governor.try_acquire(footprints[m]):
+                            n = m
+                            break
+                    if n is None:
+                        # 内存不够：归还名额，等正在运行的任务结束后再提交
+                        window.release()
+                        break
+                    waiting.remove(n)
+                    dispatched.add(n)
+                    if n in hits:
+                        future = Future()
+                        future.set_result((True, None))
+                    else:
+                        future = starters[n]()
+                    running[future] = n
+                if not running:
+                    continue
+                completed, _ = wait(running, timeout=0.2, return_when=FIRST_COMPLETED)
+                progress.tick()
+                for future in completed:
+                    n = running.pop(future)
+                    governor.release(footprints[n])
+                    reason = "转换失败"
+                    try:
+                        ok, seconds = future.result()
+                        ok = bool(ok)
+                    except Exception as e:
+                        # 包括转换进程崩溃、超出CPU时间/内存/运行时间限制
+                        print(f"  ✗ 转换出错: {str(e)}")
+                        ok, seconds = False, None
+                        reason = str(e) or type(e).__name__
+                    if not ok and failures is not None:
+                        failures.append((jobs[n][1], reason))
+                    if ok and cache is not None and n not in hits:
+                        cache.put(cache_keys[n], jobs[n][2])
+                    if ok and seconds is not None and self.cost_model is not None:
+                        self.cost_model.record(jobs[n][3], estimates[n]['features'], seconds)
+                    
+                    done += 1
+                    cost_done += costs[n]
+                    if n in estimates:
+                        bytes_done += estimates[n]['bytes']
+                        pages_done += estimates[n]['pages']
+                    doc_type, filepath, _, _ = jobs[n]
+                    print(f"  {'✓ 转换成功' if ok else '✗ 转换失败'}: {os.path.basename(filepath)}")
+                    # 进度按预计耗时计算，而不是按文件个数
+                    remaining = total - done
+                    progress.emit(
+                        'convert', f"正在处理: {doc_type}... ({done}/{total})",
+                        fraction=cost_done / cost_total, item=filepath, done=done, total=total,
+                        bytes=bytes_done, pages=pages_done,
+                        eta=(cost_total - cost_done) / max(1, min(self.max_workers, remaining)) if remaining else None)
+                    merge_queue.put((n, ok))
+        finally:
+            merge_queue.put(None)
+            if output_pdf is not None and not (cancel_token is not None and cancel_token.cancelled):
+                progress.emit('merge', "正在合并PDF...", done=done, total=total, bytes=bytes_done, pages=pages_done)
+            writer.join()
+            if self.cost_model is not None:
+                self.cost_model.save()
+        
+        if merged['error'] is not None:
+            raise merged['error']
+        if cancel_token is not None and cancel_token.cancelled:
+            # 写出完成后才取消：删除本次写出的文件，取消的处理不留下输出
+            if merged.get('written'):
+                os.remove(output_pdf)
+            raise Cancelled()
+        return merged['documents']
+    
+    def _cancel_running(self, running: dict):
+        """取消处理：结束所有正在进行的转换（子进程、本进程启动的soffice），排队中的任务不再执行"""
+        for future in running:
+            future.cancel()
+        if self._executor is not None:
+            self._executor.cancel_all()
+        # 批量模式和单进程模式下soffice由本进程启动
+        _kill_soffice_processes()
+    
+    def merge_pdfs(self, pdf_files: List[str], output_path: str):
+        """
+        合并多个PDF文件
+        内容相同的输入只读取一次，重复出现的页面共享同一份内容流、图片和字体，
+        多份副本只增加页面而几乎不增加文件大小
+        """
+        page_writer = PdfPageWriter()
+        keys = {}
+        try:
+            for pdf_file in pdf_files:
+                if not os.path.exists(pdf_file):
+                    continue
+                if pdf_file not in keys:
+                    keys[pdf_file] = self._source_key(pdf_file)
+                page_writer.append(pdf_file, key=keys[pdf_file])
+            if len(set(keys.values())) < len(pdf_files):
+                print(f"合并: {len(pdf_files)} 份文档，其中 {len(set(keys.values()))} 份内容不同")
+            page_writer.write(output_path)
+        finally:
+            page_writer.close()
+    
+    def process_folder(self, folder_path: str, output_pdf: str, progress_callback=None, dry_run: bool = False,
+                       failures: list = None, cancel_token: CancelToken = None):
+        """
+        处理文件夹的主流程
+        dry_run为True时只生成并打印执行计划（含耗时、页数、大小估算），不转换，返回计划
+        progress_callback: 进度监听函数 callback(ProgressEvent)（或 ProgressStream），见 progress_events.py
+        failures: 转换失败（跳过）的文件追加到这个列表: [(源文件, 原因), ...]
+        cancel_token: 取消后尽快停止并清理临时文件和子进程，抛出 Cancelled（不生成输出文件）
+        """
+        progress = ProgressStream.of(progress_callback)
+        pdf_temp_dir = None
+        try:
+            if not os.path.isdir(folder_path):
+                raise Exception("选择的路径不是有效的文件夹")
+            
+            progress.emit('scan', "正在扫描文件...", fraction=0.0)
+            
+            # 一次扫描生成执行计划（每个文档只有一个来源）
+            plan = self.plan_folder(folder_path, output_pdf)
+            print(f"找到 {plan['files']} 个文件")
+            
+            if not plan['files']:
+                raise Exception("文件夹中没有找到任何文件")
+            
+            if dry_run:
+                self.print_plan(self.estimate_plan(plan))
+                return plan
+            
+            for filepath, reason in plan['excluded']:
+                print(f"  跳过 {os.path.basename(filepath)}: {reason}")
+            
+            # 打印分类结果用于调试
+            counts = collections.Counter(item['doc_type'] for item in plan['documents'])
+            for doc_type in self.OUTPUT_ORDER:
+                if counts[doc_type]:
+                    print(f"{doc_type}: {counts[doc_type]} 个文件")
+            if plan['unclassified']:
+                print(f"未分类: {len(plan['unclassified'])} 个文件")
+            
+            if not plan['documents']:
+                raise Exception("没有找到可识别的文档类型，请检查文件名是否包含正确的关键字")
+            
+            progress.emit('convert', "正在转换文档...", fraction=0.0)
+            
+            pdf_temp_dir = tempfile.mkdtemp(prefix='pdf_temp_')
+            
+            # 处理清单：未变化的文件沿用上次记录的哈希
+            manifest = FolderManifest(folder_path)
+            settings = self._run_settings()
+            
+            jobs, job_keys, slots = self._plan_jobs(plan, manifest, pdf_temp_dir, cancel_token)
+            
+            if manifest.is_unchanged(output_pdf, settings):
+                print(f"文件夹与上次处理时相同，跳过: {output_pdf}")
+                shutil.rmtree(pdf_temp_dir, ignore_errors=True)
+                progress.emit('done', "文件未变化，已跳过", fraction=1.0)
+                return True
+            
+            if len(jobs) < len(slots):
+                print(f"共 {len(slots)} 份文档，去重后需转换 {len(jobs)} 个文件")
+            
+            folder_failures = []
+            documents = self._convert_and_merge(jobs, job_keys, slots, output_pdf, progress,
+                                                folder_failures, cancel_token)
+            if failures is not None:
+                failures.extend(folder_failures)
+            if not documents:
+                raise Exception("没有成功转换任何文档，请检查文件格式是否支持")
+            
+            print(f"共合并 {documents} 份文档")
+            print(f"PDF已合并: {output_pdf}")
+            if folder_failures:
+                # 有文件转换失败时不保存清单，下次处理时会重新尝试这些文件
+                print(f"⚠️ {len(folder_failures)} 个文件转换失败，未包含在输出中:")
+                for filepath, reason in folder_failures:
+                    print(f"  ✗ {os.path.basename(filepath)}: {reason}")
+            else:
+                manifest.save(output_pdf, settings)
+            
+            if pdf_temp_dir and os.path.exists(pdf_temp_dir):
+                shutil.rmtree(pdf_temp_dir, ignore_errors=True)
+            
+            progress.emit('done', "完成！", fraction=1.0, done=len(jobs), total=len(jobs))
+            
+            return True
+        except Exception as e:
+            # 清理临时文件
+            if pdf_temp_dir and os.path.exists(pdf_temp_dir):
+                shutil.rmtree(pdf_temp_dir, ignore_errors=True)
+            if isinstance(e, Cancelled):
+                print("处理已取消")
+            else:
+                print(f"处理出错: {str(e)}")
+            raise e
+    
+    def _plan_jobs(self, plan: dict, manifest: FolderManifest, pdf_temp_dir: str,
+                   cancel_token: CancelToken = None) -> Tuple[list, List[str], List[int]]:
+        """
+        按输出顺序生成页位，同一内容的文件只生成一个转换任务
+        （如土地承包合同书需要4份副本，只转换一次，副本直接复用结果）
+        返回: (转换任务, 任务的源文件指纹, 页位)，见 _convert_and_merge
+        """
+        jobs = []
+        job_keys = []
+        slots = []
+        memo = {}
+        for i, item in enumerate(plan['documents']):
+            if cancel_token is not None:
+                cancel_token.check()
+            doc_type, filepath, converter = item['doc_type'], item['source'], item['converter']
+            key = manifest.source_key(filepath, doc_type, self._source_key, converter) + ':' + converter
+            if key not in memo:
+                memo[key] = len(jobs)
+                output_name = f"{len(jobs):03d}_{doc_type}_{i}.pdf"
+                jobs.append((doc_type, filepath, os.path.join(pdf_temp_dir, output_name), converter))
+                job_keys.append(key)
+            slots.extend([memo[key]] * item['copies'])
+        return jobs, job_keys, slots
+    
+    def preconvert(self, folder_path: str, cancel_token: CancelToken = None) -> int:
+        """
+        预转换：在用户选择保存位置的同时提前转换文件夹中的文档
+        结果保存到转换缓存（关闭缓存时保存到本次运行的暂存区），之后 process_folder 只需要合并。
+        这只是提前做的工作：出错时不报告（正式处理时会重新转换并报告），
+        不能与 process_folder 同时运行（取消时会结束共用进程池中的所有转换）
+        返回: 可以直接复用的文件数
+        """
+        if self.cache is None and self._staging is None:
+            self._staging = ConversionCache(tempfile.mkdtemp(prefix='docproc_staging_'))
+        pdf_temp_dir = tempfile.mkdtemp(prefix='pdf_temp_')
+        try:
+            plan = self.plan_folder(folder_path)
+            jobs, job_keys, _ = self._plan_jobs(plan, FolderManifest(folder_path), pdf_temp_dir, cancel_token)
+            if not jobs:
+                return 0
+            print(f"[预转换] 开始: {os.path.basename(folder_path)} ({len(jobs)} 个文件)")
+            failures = []
+            self._convert_and_merge(jobs, job_keys, list(range(len(jobs))), None,
+                                    failures=failures, cancel_token=cancel_token)
+            print(f"[预转换] 完成: {len(jobs) - len(failures)}/{len(jobs)} 个文件")
+            return len(jobs) - len(failures)
+        except Cancelled:
+            print("[预转换] 已取消")
+            return 0
+        except Exception as e:
+            print(f"[预转换] 出错（正式处理时重新转换）: {str(e)}")
+            return 0
+        finally:
+            shutil.rmtree(pdf_temp_dir, ignore_errors=True)
+    
+    def find_households(self, parent_dir: str) -> List[str]:
+        """列出批量处理目录下的所有农户子文件夹（按名称排序）"""
+        households = []
+        for name in sorted(os.listdir(parent_dir)):
+            path = os.path.join(parent_dir, name)
+            if os.path.isdir(path) and not name.startswith('.'):
+                households.append(path)
+        return households
+    
+    def process_batch(self, parent_dir: str, output_dir: str, progress_callback=None,
+                      dry_run: bool = False, resume: bool = False, cancel_token: CancelToken = None,
+                      name_pattern: str = '{name}_合并.pdf') -> dict:
+        """
+        批量处理：父目录下每个农户子文件夹输出一个合并PDF
+        所有农户共用同一个进程池，单个农户失败不影响其他农户
+        每完成一个农户都写入检查点；resume为True时跳过上次已完成的农户（见batch_checkpoint.py）
+        返回: {'succeeded': [输出PDF, ...], 'failed': [(农户文件夹, 错误信息), ...], 'resumed': 跳过的农户数,
+               'failed_files': [(源文件, 原因), ...]（转换失败、未包含在输出中的单个文件）}
+        dry_run为True时只打印每个农户的执行计划，返回值另含 'plans': [计划, ...]
+        取消时抛出 Cancelled，检查点保留，之后可以继续处理
+        progress_callback: 进度监听函数 callback(ProgressEvent)，农户内的事件换算为整批的进度和剩余时间，
+        并带上农户文件夹名和序号
+        name_pattern: 输出文件名，{name} 替换为农户文件夹名
+        """
+        progress = ProgressStream.of(progress_callback)
+        if not os.path.isdir(parent_dir):
+            raise Exception("选择的路径不是有效的文件夹")
+        
+        if not dry_run:
+            os.makedirs(output_dir, exist_ok=True)
+        output_real = os.path.realpath(output_dir)
+        households = [h for h in self.find_households(parent_dir)
+                      if os.path.realpath(h) != output_real]
+        if not households:
+            raise Exception("批量目录下没有找到农户文件夹")
+        
+        print(f"批量处理: 共 {len(households)} 个农户文件夹")
+        summary = {'succeeded': [], 'failed': [], 'resumed': 0, 'failed_files': []}
+        if dry_run:
+            summary['plans'] = []
+        total = len(households)
+        
+        checkpoint = None
+        saved_cache = self.cache
+        if not dry_run:
+            checkpoint = BatchCheckpoint(parent_dir, output_dir)
+            if not resume:
+                checkpoint.reset()
+            if self.cache is None:
+                # 未启用转换缓存时，已完成的转换保存在检查点目录中，中断后可以继续
+                self.cache = checkpoint.conversion_cache()
+        
+        batch_start = time.perf_counter()
+        try:
+            for index, folder in enumerate(households):
+                name = os.path.basename(folder)
+                output_pdf = os.path.join(output_dir, name_pattern.format(name=name))
+                # 本次运行已处理的农户数（不含上次已完成而跳过的）
+                processed = index - summary['resumed']
+                
+                def household_progress(event, index=index, name=name, processed=processed):
+                    fraction = event.fraction or 0.0
+                    event.fraction = (index + fraction) / total
+                    event.household, event.household_index, event.households = name, index + 1, total
+                    event.elapsed = time.perf_counter() - batch_start
+                    event.eta = None
+                    if processed:
+                        # 整批剩余时间：按本次运行每个农户的平均实际耗时推算
+                        per_household = (time.perf_counter() - batch_start) / (processed + fraction)
+                        event.eta = per_household * (total - index - fraction)
+                
+                if cancel_token is not None:
+                    cancel_token.check()
+                if checkpoint is not None and checkpoint.is_done(folder, output_pdf):
+                    print(f"\n[{index + 1}/{total}] 上次已完成，跳过: {name}")
+                    summary['succeeded'].append(output_pdf)
+                    summary['resumed'] += 1
+                    continue
+                
+                print(f"\n[{index + 1}/{total}] 处理农户: {name}")
+                try:
+                    result = self.process_folder(folder, output_pdf, progress.child(household_progress),
+                                                 dry_run=dry_run, failures=summary['failed_files'],
+                                                 cancel_token=cancel_token)
+                    if dry_run:
+                        summary['plans'].append(result)
+                    summary['succeeded'].append(output_pdf)
+                    if checkpoint is not None:
+                        checkpoint.mark_done(folder, output_pdf)
+                except Cancelled:
+                    raise
+                except Exception as e:
+                    summary['failed'].append((folder, str(e)))
+                    if checkpoint is not None:
+                        checkpoint.mark_failed(folder, str(e))
+        finally:
+            self.cache = saved_cache
+        
+        # 全部成功后不再需要检查点；有失败时保留，修正后可以继续处理
+        if checkpoint is not None and not summary['failed']:
+            checkpoint.remove()
+        
+        print("\n" + "=" * 50)
+        if summary['resumed']:
+            print(f"继续上次的批量处理: 跳过已完成的 {summary['resumed']} 个农户")
+        if dry_run:
+            plans = summary['plans']
+            print(f"试运行: {len(plans)} 个农户, "
+                  f"{sum(len(p['documents']) for p in plans)} 份文档, "
+                  f"{sum(p['estimate']['pages'] for p in plans)} 页, "
+                  f"约{format_bytes(sum(p['estimate']['bytes'] for p in plans))}, "
+                  f"预计耗时约{sum(p['estimate']['wall_seconds'] for p in plans) / 60:.1f}分钟")
+        print(f"批量处理完成: 成功 {len(summary['succeeded'])} 个，失败 {len(summary['failed'])} 个")
+        for folder, error in summary['failed']:
+            print(f"  ✗ {os.path.basename(folder)}: {error}")
+        if summary['failed_files']:
+            print(f"转换失败的文件（已跳过）: {len(summary['failed_files'])} 个")
+            for filepath, reason in summary['failed_files']:
+                print(f"  ✗ {filepath}: {reason}")
+        print("=" * 50)
+        
+        progress.emit('done', f"批量处理完成: 成功 {len(summary['succeeded'])} 个，失败 {len(summary['failed'])} 个",
+                      fraction=1.0, done=len(summary['succeeded']), total=total)
+        
+        return summary
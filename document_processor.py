@@ -2,46 +2,70 @@
 # -*- coding: utf-8 -*-
 """
 文档处理器 
+图形界面和授权；处理引擎见 docproc_engine.py
+
+启动时只导入标准库和tkinter，窗口立即显示；处理引擎、授权管理器（云端授权会导入requests）、
+Word转换器检测都在窗口显示之后（后台线程或第一次使用时）才加载。
 """
 
 import os
 import sys
-import re
-import shutil
-import tempfile
-import tkinter as tk
-from tkinter import filedialog, messagebox
-from pathlib import Path
 import subprocess
-from typing import List, Tuple
-from PIL import Image
-import img2pdf
+import queue
+import time
+import threading
+import multiprocessing
+from typing import Tuple
 import hashlib
 import json
 import uuid
 import platform
 from datetime import datetime
+from batch_checkpoint import BatchCheckpoint
+from cancellation import CancelToken, Cancelled
 
 # 消除macOS的Tk废弃警告
 os.environ['TK_SILENCE_DEPRECATION'] = '1'
 
-# 授权管理器选择：云端优先，本地备份
+# 界面库在创建界面时才导入（命令行版本不使用tkinter，见 docproc_cli.py）
+tk = filedialog = messagebox = None
+
+
+def _import_tkinter():
+    global tk, filedialog, messagebox
+    if tk is None:
+        import tkinter
+        from tkinter import filedialog as tk_filedialog, messagebox as tk_messagebox
+        tk, filedialog, messagebox = tkinter, tk_filedialog, tk_messagebox
+
+# 授权管理器选择：云端优先，本地备份（cloud_license 在创建授权管理器时才导入）
 try:
     from license_config import USE_CLOUD
-    if USE_CLOUD:
-        from cloud_license import CloudLicenseManager as LicenseManager
-        print("[授权] 使用云端授权系统")
-    else:
-        # 使用下面定义的本地 LicenseManager
-        LicenseManager = None  # 稍后定义为 LocalLicenseManager
-        print("[授权] 使用本地授权系统")
 except (ImportError, Exception) as e:
-    # 如果没有配置文件或导入失败，使用本地授权
+    # 如果没有配置文件，使用本地授权
     USE_CLOUD = False
-    LicenseManager = None  # 稍后定义为 LocalLicenseManager
     print(f"[授权] 云端授权不可用 ({e})，使用本地授权系统")
 
 
+def __getattr__(name):
+    """
+    延迟导入的名称（兼容旧的导入方式）:
+    DocumentProcessor 来自 docproc_engine；LicenseManager 为当前使用的授权管理器类
+    """
+    if name == 'DocumentProcessor':
+        from docproc_engine import DocumentProcessor
+        return DocumentProcessor
+    if name == 'LicenseManager':
+        if USE_CLOUD:
+            try:
+                from cloud_license import CloudLicenseManager
+                return CloudLicenseManager
+            except ImportError:
+                pass
+        return LocalLicenseManager
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 # 本地授权管理器（备用方案）
 class LocalLicenseManager:
     """设备授权管理器"""
@@ -387,476 +411,143 @@ class LocalLicenseManager:
         return "正常"
 
 
-class DocumentProcessor:
-    """文档处理核心类"""
-    
-    # 文档类型关键字匹配规则
-    DOC_PATTERNS = {
-        '申请书': r'申请书',
-        '户主声明书': r'户主声明书',
-        '承包方调查表': r'承包方调查表',
-        '承包地块调查表': r'承包地块调查表',
-        '公示结果归户表': r'公示结果归户表',
-        '公示无异议声明书': r'公示无异议声明书',
-        '土地承包合同书': r'土地承包合同书|合同书',
-        '登记簿': r'登记簿',
-        '地块示意图': r'DKSYT\d{2}',
-        '确权登记声明书': r'确权登记声明书',
-        '承诺书': r'承诺书',
-    }
-    
-    def __init__(self):
-        self.temp_dir = None
-    
-    @staticmethod
-    def check_word_converter():
-        """检测Word转换器是否可用"""
-        import platform
-        is_windows = platform.system() == 'Windows'
-        
-        if is_windows:
-            # 检查Windows上的docx2pdf和Word
-            try:
-                import docx2pdf
-                # 尝试检测Word是否安装（通过COM）
-                try:
-                    import win32com.client
-                    word = win32com.client.Dispatch("Word.Application")
-                    word.Quit()
-                    return True, "✅ Microsoft Word 已安装"
-                except:
-                    return False, "⚠️ 未检测到 Microsoft Word\n\n程序无法转换 .docx 文件为PDF。\n\n解决方案：\n1. 安装 Microsoft Word (Office)\n2. 或手动将 .docx 转换为 .pdf\n\n其他文件(PDF、图片)可以正常处理。"
-            except ImportError:
-                return False, "⚠️ 缺少 docx2pdf 库"
-        else:
-            # 检查macOS/Linux上的LibreOffice
-            try:
-                result = subprocess.run(['which', 'soffice'], 
-                                      capture_output=True, 
-                                      text=True, 
-                                      timeout=5)
-                if result.returncode == 0:
-                    return True, "✅ LibreOffice 已安装"
-                else:
-                    return False, "⚠️ 未检测到 LibreOffice\n\n程序无法转换 .docx 文件为PDF。\n\n解决方案：\n安装 LibreOffice:\nbrew install --cask libreoffice\n\n或手动下载：\nhttps://www.libreoffice.org/\n\n其他文件(PDF、图片)可以正常处理。"
-            except:
-                return False, "⚠️ 未检测到 LibreOffice"
-    
-    def preprocess_word_files(self, folder_path: str, progress_callback=None):
-        """预处理：将所有.doc和.docx文件转换为PDF并保存到同目录"""
-        from docx import Document
-        from reportlab.lib.pagesizes import letter, A4
-        from reportlab.pdfgen import canvas
-        from reportlab.pdfbase import pdfmetrics
-        from reportlab.pdfbase.ttfonts import TTFont
-        from reportlab.lib.units import inch
-        import io
-        
-        print("\n" + "=" * 50)
-        print("开始预处理Word文档...")
-        print("=" * 50)
-        
-        # 查找所有.doc和.docx文件
-        word_files = []
-        for root, dirs, filenames in os.walk(folder_path):
-            for filename in filenames:
-                if (filename.lower().endswith('.docx') or filename.lower().endswith('.doc')) and not filename.startswith('~'):
-                    filepath = os.path.join(root, filename)
-                    word_files.append(filepath)
-        
-        if not word_files:
-            print("没有找到Word文档（.doc/.docx），跳过预处理")
-            return []
-        
-        print(f"找到 {len(word_files)} 个Word文档")
-        converted_files = []
-        
-        for i, word_path in enumerate(word_files):
-            try:
-                filename = os.path.basename(word_path)
-                print(f"\n[{i+1}/{len(word_files)}] 正在转换: {filename}")
-                
-                if progress_callback:
-                    progress = int((i / len(word_files)) * 20)  # 预处理占20%
-                    progress_callback(progress, f"预处理Word文档 ({i+1}/{len(word_files)})")
-                
-                # 生成PDF文件路径（同目录，同名，.pdf后缀）
-                pdf_path = os.path.splitext(word_path)[0] + '.pdf'
-                
-                # 如果PDF已存在，跳过
-                if os.path.exists(pdf_path):
-                    print(f"  PDF已存在，跳过: {os.path.basename(pdf_path)}")
-                    converted_files.append(pdf_path)
-                    continue
-                
-                # 检查文件扩展名
-                file_ext = os.path.splitext(word_path)[1].lower()
-                
-                # .doc文件无法直接用python-docx读取，跳过
-                if file_ext == '.doc':
-                    print(f"  ⚠️ .doc格式需要LibreOffice或Word转换，已跳过")
-                    print(f"  提示: 请手动在Word中打开并另存为.docx或.pdf")
-                    continue
-                
-                # 使用python-docx读取.docx内容
-                doc = Document(word_path)
-                
-                # 创建PDF，使用支持中文的方式
-                from reportlab.pdfbase.cidfonts import UnicodeCIDFont
-                from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-                from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
-                from reportlab.lib.enums import TA_LEFT, TA_CENTER
-                
-                # 创建PDF文档
-                pdf_doc = SimpleDocTemplate(pdf_path, pagesize=A4)
-                story = []
-                
-                # 注册中文字体
-                pdfmetrics.registerFont(UnicodeCIDFont('STSong-Light'))
-                
-                # 创建样式
-                styles = getSampleStyleSheet()
-                chinese_style = ParagraphStyle(
-                    'Chinese',
-                    parent=styles['Normal'],
-                    fontName='STSong-Light',
-                    fontSize=12,
-                    leading=20,
-                    alignment=TA_LEFT,
-                )
-                
-                title_style = ParagraphStyle(
-                    'ChineseTitle',
-                    parent=styles['Heading1'],
-                    fontName='STSong-Light',
-                    fontSize=16,
-                    leading=24,
-                    alignment=TA_CENTER,
-                )
-                
-                # 添加标题
-                story.append(Paragraph(filename, title_style))
-                story.append(Spacer(1, 20))
-                
-                # 添加段落内容
-                for paragraph in doc.paragraphs:
-                    if paragraph.text.strip():
-                        # 转义特殊字符
-                        text = paragraph.text.replace('&', '&amp;').replace('<', '&lt;').replace('>', '&gt;')
-                        try:
-                            p = Paragraph(text, chinese_style)
-                            story.append(p)
-                            story.append(Spacer(1, 12))
-                        except Exception as e:
-                            # 如果某个段落出错，跳过
-                            print(f"    警告: 段落处理失败，已跳过")
-                            continue
-                
-                # 生成PDF
-                pdf_doc.build(story)
-                converted_files.append(pdf_path)
-                print(f"  ✓ 转换成功: {os.path.basename(pdf_path)}")
-                
-            except Exception as e:
-                print(f"  ✗ 转换失败: {str(e)}")
-                continue
-        
-        print(f"\n预处理完成！成功转换 {len(converted_files)} 个文档")
-        print("=" * 50 + "\n")
-        return converted_files
-    
-    def find_files(self, directory: str) -> List[str]:
-        """递归查找所有文件"""
-        files = []
-        for root, dirs, filenames in os.walk(directory):
-            for filename in filenames:
-                if not filename.startswith('.'):
-                    files.append(os.path.join(root, filename))
-        return files
-    
-    def classify_file(self, filepath: str) -> Tuple[str, str]:
-        """分类文件"""
-        filename = os.path.basename(filepath)
-        for doc_type, pattern in self.DOC_PATTERNS.items():
-            if re.search(pattern, filename, re.IGNORECASE):
-                return (doc_type, filepath)
-        return ('未分类', filepath)
-    
-    def sort_files(self, files: List[str]) -> dict:
-        """按要求对文件分类和排序"""
-        classified = {
-            '申请书': [], '户主声明书': [], '承包方调查表': [], '承包地块调查表': [],
-            '公示结果归户表': [], '公示无异议声明书': [], '土地承包合同书': [],
-            '登记簿': [], '地块示意图': [], '确权登记声明书': [], '承诺书': [], '未分类': []
-        }
-        
-        for filepath in files:
-            doc_type, _ = self.classify_file(filepath)
-            classified[doc_type].append(filepath)
-        
-        if classified['地块示意图']:
-            classified['地块示意图'].sort(key=lambda x: self._extract_plot_number(x))
-        
-        return classified
-    
-    def _extract_plot_number(self, filepath: str) -> int:
-        """从地块示意图文件名中提取编号"""
-        filename = os.path.basename(filepath)
-        match = re.search(r'DKSYT(\d{2})', filename, re.IGNORECASE)
-        return int(match.group(1)) if match else 999
-    
-    def convert_to_pdf(self, filepath: str, output_pdf: str) -> bool:
-        """将文档转换为PDF"""
-        ext = os.path.splitext(filepath)[1].lower()
-        import platform
-        is_windows = platform.system() == 'Windows'
-        
+def create_license_manager():
+    """
+    创建授权管理器（界面和命令行共用），返回 (授权管理器, 是否允许使用, 错误信息)
+    云端授权不需要启动时检查，每次使用时检查；本地授权启动时检查设备绑定（不计数）
+    """
+    if USE_CLOUD:
         try:
-            if ext in ['.pdf']:
-                shutil.copy(filepath, output_pdf)
-                return True
-            elif ext in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']:
-                with open(output_pdf, 'wb') as f:
-                    img = Image.open(filepath)
-                    
-                    # 检查图片方向：如果宽度大于高度（横向），则旋转90度使其竖向
-                    width, height = img.size
-                    if width > height:
-                        print(f"检测到横向图片 {os.path.basename(filepath)} ({width}x{height})，旋转90度...")
-                        img = img.rotate(270, expand=True)
-                    else:
-                        print(f"图片 {os.path.basename(filepath)} 已是竖向 ({width}x{height})，无需旋转")
-                    
-                    if img.mode in ('RGBA', 'LA', 'P'):
-                        img = img.convert('RGB')
-                    
-                    # 保存到临时文件后再转换为PDF
-                    temp_img_path = output_pdf.replace('.pdf', '_temp.jpg')
-                    img.save(temp_img_path, 'JPEG', quality=95)
-                    
-                    # 转换为PDF
-                    pdf_bytes = img2pdf.convert(temp_img_path)
-                    f.write(pdf_bytes)
-                    
-                    # 删除临时图片
-                    if os.path.exists(temp_img_path):
-                        os.remove(temp_img_path)
-                return True
-            elif ext in ['.doc', '.docx']:
-                if is_windows:
-                    try:
-                        from docx2pdf import convert
-                        print(f"  [Windows] 使用docx2pdf转换Word文档...")
-                        convert(filepath, output_pdf)
-                        if os.path.exists(output_pdf):
-                            print(f"  ✓ Word转PDF成功")
-                            return True
-                        else:
-                            print(f"  ✗ 转换失败: PDF文件未生成")
-                            return False
-                    except Exception as e:
-                        print(f"  ✗ Word转PDF失败: {str(e)}")
-                        print(f"  提示: 请确保已安装Microsoft Word，docx2pdf需要Word才能工作")
-                        return False
-                else:
-                    # macOS/Linux: 使用LibreOffice
-                    print(f"  [macOS/Linux] 使用LibreOffice转换Word文档...")
-                    try:
-                        result = subprocess.run(
-                            ['soffice', '--headless', '--convert-to', 'pdf', '--outdir',
-                             os.path.dirname(output_pdf), filepath],
-                            capture_output=True, timeout=30, text=True
-                        )
-                        expected_pdf = os.path.join(
-                            os.path.dirname(output_pdf),
-                            os.path.splitext(os.path.basename(filepath))[0] + '.pdf'
-                        )
-                        if os.path.exists(expected_pdf):
-                            if expected_pdf != output_pdf:
-                                shutil.move(expected_pdf, output_pdf)
-                            print(f"  ✓ Word转PDF成功")
-                            return True
-                        else:
-                            print(f"  ✗ 转换失败: PDF文件未生成")
-                            if result.stderr:
-                                print(f"  错误信息: {result.stderr}")
-                            print(f"  提示: 请安装LibreOffice: brew install --cask libreoffice")
-                            return False
-                    except FileNotFoundError:
-                        print(f"  ✗ 找不到soffice命令")
-                        print(f"  提示: 请安装LibreOffice: brew install --cask libreoffice")
-                        return False
-                    except subprocess.TimeoutExpired:
-                        print(f"  ✗ 转换超时(30秒)")
-                        return False
-                    except Exception as e:
-                        print(f"  ✗ Word转PDF失败: {str(e)}")
-                        return False
-                return False
-            return False
-        except Exception as e:
-            print(f"转换失败 {filepath}: {str(e)}")
-            return False
-    
-    def merge_pdfs(self, pdf_files: List[str], output_path: str):
-        """合并多个PDF文件"""
-        from PyPDF2 import PdfMerger
-        merger = PdfMerger()
-        for pdf_file in pdf_files:
-            if os.path.exists(pdf_file):
-                merger.append(pdf_file)
-        merger.write(output_path)
-        merger.close()
-    
-    def process_folder(self, folder_path: str, output_pdf: str, progress_callback=None):
-        """处理文件夹的主流程"""
-        pdf_temp_dir = None
+            from cloud_license import CloudLicenseManager
+        except ImportError as e:
+            print(f"[授权] 云端授权不可用 ({e})，使用本地授权系统")
+        else:
+            manager = CloudLicenseManager()
+            print("[授权] 云端授权系统已初始化")
+            return manager, True, ""
+    print("[授权] 使用本地授权系统")
+    manager = LocalLicenseManager()
+    can_use, message = manager.check_device()
+    return manager, can_use, message
+
+
+def _detect_word_converter():
+    """在后台线程中检测Word转换器（结果有缓存，通常不需要启动Word/LibreOffice）"""
+    if platform.system() == 'Windows':
+        # 在新线程中通过COM启动Word需要先初始化COM
         try:
-            if not os.path.isdir(folder_path):
-                raise Exception("选择的路径不是有效的文件夹")
-            
-            # 新增：预处理Word文档（.doc和.docx）
-            if progress_callback:
-                progress_callback(5, "预处理Word文档...")
-            
-            self.preprocess_word_files(folder_path, progress_callback)
-            
-            if progress_callback:
-                progress_callback(20, "正在扫描文件...")
-            
-            all_files = self.find_files(folder_path)
-            print(f"找到 {len(all_files)} 个文件")
-            
-            if not all_files:
-                raise Exception("文件夹中没有找到任何文件")
-            
-            classified = self.sort_files(all_files)
-            
-            # 打印分类结果用于调试
-            for doc_type, files in classified.items():
-                if files:
-                    print(f"{doc_type}: {len(files)} 个文件")
-            
-            if progress_callback:
-                progress_callback(40, "正在转换文档...")
-            
-            pdf_temp_dir = tempfile.mkdtemp(prefix='pdf_temp_')
-            ordered_pdfs = []
-            
-            order = [
-                '申请书', '户主声明书', '承包方调查表', '承包地块调查表',
-                '公示结果归户表', '公示无异议声明书', '土地承包合同书',
-                '登记簿', '地块示意图', '确权登记声明书', '承诺书'
-            ]
-            
-            total_files = sum(len(classified[t]) for t in order)
-            if total_files == 0:
-                raise Exception("没有找到可识别的文档类型，请检查文件名是否包含正确的关键字")
-            
-            processed = 0
-            
-            for doc_type in order:
-                files = classified[doc_type]
-                for i, filepath in enumerate(files):
-                    print(f"正在处理: {os.path.basename(filepath)}")
-                    repeat_count = 4 if doc_type == '土地承包合同书' else 1
-                    for repeat in range(repeat_count):
-                        output_name = f"{len(ordered_pdfs):03d}_{doc_type}_{i}_{repeat}.pdf"
-                        output = os.path.join(pdf_temp_dir, output_name)
-                        try:
-                            if self.convert_to_pdf(filepath, output):
-                                ordered_pdfs.append(output)
-                                print(f"  ✓ 转换成功")
-                            else:
-                                print(f"  ✗ 转换失败")
-                        except Exception as e:
-                            print(f"  ✗ 转换出错: {str(e)}")
-                    processed += 1
-                    if progress_callback and total_files > 0:
-                        progress = 40 + int((processed / total_files) * 45)
-                        progress_callback(progress, f"正在处理: {doc_type}... ({processed}/{total_files})")
-            
-            if not ordered_pdfs:
-                raise Exception("没有成功转换任何文档，请检查文件格式是否支持")
-            
-            print(f"共转换 {len(ordered_pdfs)} 个PDF页面")
-            
-            if progress_callback:
-                progress_callback(90, "正在合并PDF...")
-            
-            self.merge_pdfs(ordered_pdfs, output_pdf)
-            print(f"PDF已合并: {output_pdf}")
-            
-            if pdf_temp_dir and os.path.exists(pdf_temp_dir):
-                shutil.rmtree(pdf_temp_dir, ignore_errors=True)
-            
-            if progress_callback:
-                progress_callback(100, "完成！")
-            
-            return True
-        except Exception as e:
-            # 清理临时文件
-            if pdf_temp_dir and os.path.exists(pdf_temp_dir):
-                shutil.rmtree(pdf_temp_dir, ignore_errors=True)
-            print(f"处理出错: {str(e)}")
-            raise e
+            import pythoncom
+            pythoncom.CoInitialize()
+        except ImportError:
+            pass
+    from docproc_engine import DocumentProcessor
+    return DocumentProcessor.check_word_converter()
 
 
 class SimpleGUI:
     """简洁的图形界面"""
     
+    # 界面线程取出工作线程进度的间隔（毫秒）
+    POLL_MS = 50
+    # 关闭窗口时等待工作线程取消并清理临时文件的最长时间（秒）
+    CLOSE_TIMEOUT = 60
+    
     def __init__(self):
-        # 初始化授权管理器（云端或本地）
-        if USE_CLOUD:
-            # 云端授权：不需要启动时检查，每次使用时检查
-            from cloud_license import CloudLicenseManager
-            self.license_manager = CloudLicenseManager()
-            print("[授权] 云端授权系统已初始化")
-        else:
-            # 本地授权：启动时检查设备绑定（不计数）
-            self.license_manager = LocalLicenseManager()
-            can_use, message = self.license_manager.check_device()
-            
-            if not can_use:
-                # 创建临时窗口显示错误
-                root = tk.Tk()
-                root.withdraw()
-                messagebox.showerror(
-                    "程序已损坏", 
-                    f"抱歉，程序文件已损坏，无法继续使用。\n\n错误信息: {message}\n\n请联系技术支持获取新版本。"
-                )
-                root.destroy()
-                exit(1)
-        
+        _import_tkinter()
         self.root = tk.Tk()
         self.root.title("文档处理器")
-        self.root.geometry("600x600")  # 增加高度以容纳授权信息
+        self.root.geometry("600x770")  # 增加高度以容纳批量处理和取消按钮
         
         # 强制设置背景色
         self.root.configure(bg='#e8e8e8')
         
-        self.processor = DocumentProcessor()
+        self._processor = None  # 处理引擎，第一次使用时创建（见 processor）
+        self._processor_lock = threading.Lock()  # 后台线程也会第一次使用处理引擎
         self.selected_folder = None
+        self.cancel_token = None  # 正在进行的处理的取消标记
+        self.worker_thread = None  # 正在进行的处理的工作线程
+        self.preconvert_job = None  # 正在进行的预转换: (文件夹, 取消标记, 线程)
         self.output_pdf_path = None
+        self.exit_code = 0  # run() 结束后的退出码（授权检查未通过时为1）
         
-        # 检测Word转换器
-        self.word_available, self.word_message = DocumentProcessor.check_word_converter()
+        # Word转换器检测结果（窗口显示后在后台检测，完成前为None）
+        self.word_available, self.word_message = None, "正在检测Word转换器..."
         
         self.create_widgets()
         self.center_window()
         
-        # 显示授权信息（启动时不显示警告）
-        # self.show_license_info(message)
+        # 窗口显示之后再在后台初始化授权管理器（云端或本地）和检测Word转换器，
+        # 它们涉及磁盘读写、导入requests、启动Word/soffice，不阻塞窗口显示
+        self._license = None  # (授权管理器, 是否允许使用, 错误信息)
+        self._license_thread = self._in_background(self._init_license, self._license_ready)
+        self._in_background(_detect_word_converter, self._word_converter_ready)
+    
+    @property
+    def processor(self):
+        """处理引擎（第一次使用时导入并创建：读取耗时历史、检测CPU和内存都不在启动路径上）"""
+        with self._processor_lock:
+            if self._processor is None:
+                from docproc_engine import DocumentProcessor
+                self._processor = DocumentProcessor()
+        return self._processor
+    
+    def _in_background(self, fn, on_done) -> threading.Thread:
+        """在后台线程中执行 fn()，完成后在界面线程中调用 on_done(结果, 异常)"""
+        result = {}
+        
+        def run():
+            try:
+                result['value'] = fn()
+            except Exception as e:
+                result['error'] = e
+        
+        thread = threading.Thread(target=run, daemon=True)
+        thread.start()
+        
+        def poll():
+            if thread.is_alive():
+                self.root.after(self.POLL_MS, poll)
+            else:
+                on_done(result.get('value'), result.get('error'))
         
-        # 如果Word/LibreOffice不可用，显示警告
-        if not self.word_available:
-            self.show_word_warning()
+        self.root.after(self.POLL_MS, poll)
+        return thread
+    
+    def _init_license(self):
+        """后台线程：创建授权管理器"""
+        try:
+            self._license = create_license_manager()
+        except Exception as e:
+            self._license = (None, False, str(e))
+    
+    def _license_ready(self, result, error):
+        """授权管理器初始化完成（界面线程）：本地授权的设备检查未通过时退出"""
+        _, can_use, message = self._license
+        if not can_use:
+            messagebox.showerror(
+                "程序已损坏", 
+                f"抱歉，程序文件已损坏，无法继续使用。\n\n错误信息: {message}\n\n请联系技术支持获取新版本。"
+            )
+            self.exit_code = 1
+            self.root.destroy()
     
-    def show_word_warning(self):
-        """显示Word转换器不可用的警告"""
-        # 不立即弹窗，而是在界面上显示警告信息
-        # 用户可以选择继续（如果没有Word文档）或退出安装
-        pass  # 警告信息已在界面中显示
+    def _license_manager(self):
+        """授权管理器；启动时的后台初始化还没完成时等待，检查未通过时返回None（由 _license_ready 提示并退出）"""
+        self._license_thread.join()
+        manager, can_use, _ = self._license
+        return manager if can_use else None
+    
+    def _word_converter_ready(self, result, error):
+        """Word转换器检测完成（界面线程）：更新状态提示"""
+        if error is not None:
+            result = (False, f"⚠️ Word转换器检测失败: {error}")
+        self.word_available, self.word_message = result
+        if self.word_available:
+            self.status_label.config(text=self.word_message, fg='#27ae60')  # 绿色
+        else:
+            self.status_label.config(text=self.word_message.split('\n')[0], fg='#e67e22')  # 橙色，只显示第一行
+            # Word不可用，显示详细说明按钮
+            self.word_help_btn.pack(anchor=tk.W, pady=(5, 0))
     
     def show_license_info(self, message):
         """显示授权信息的提示框（已禁用）"""
@@ -873,7 +564,7 @@ class SimpleGUI:
         """窗口居中"""
         self.root.update_idletasks()
         width = 600
-        height = 600
+        height = 770
         x = (self.root.winfo_screenwidth() // 2) - (width // 2)
         y = (self.root.winfo_screenheight() // 2) - (height // 2)
         self.root.geometry(f'{width}x{height}+{x}+{y}')
@@ -894,39 +585,31 @@ class SimpleGUI:
         status_frame = tk.Frame(self.root, bg='#e8e8e8')
         status_frame.pack(fill=tk.X, padx=20, pady=(0, 10))
         
-        if self.word_available:
-            status_text = self.word_message
-            status_color = '#27ae60'  # 绿色
-        else:
-            status_text = self.word_message.split('\n')[0]  # 只显示第一行
-            status_color = '#e67e22'  # 橙色
-        
-        status_label = tk.Label(
+        # 检测完成前显示"正在检测"（见 _word_converter_ready）
+        self.status_label = tk.Label(
             status_frame,
-            text=status_text,
+            text=self.word_message,
             font=("Arial", 10),
             bg='#e8e8e8',
-            fg=status_color,
+            fg='#7f8c8d',
             wraplength=550,
             justify=tk.LEFT
         )
-        status_label.pack(anchor=tk.W)
-        
-        # 如果Word不可用，显示详细说明按钮
-        if not self.word_available:
-            help_btn = tk.Button(
-                status_frame,
-                text="查看详细说明",
-                command=self.show_word_help,
-                bg='#3498db',
-                fg='white',
-                font=("Arial", 9),
-                cursor='hand2',
-                relief=tk.FLAT,
-                padx=10,
-                pady=2
-            )
-            help_btn.pack(anchor=tk.W, pady=(5, 0))
+        self.status_label.pack(anchor=tk.W)
+        
+        # Word不可用时显示的详细说明按钮
+        self.word_help_btn = tk.Button(
+            status_frame,
+            text="查看详细说明",
+            command=self.show_word_help,
+            bg='#3498db',
+            fg='white',
+            font=("Arial", 9),
+            cursor='hand2',
+            relief=tk.FLAT,
+            padx=10,
+            pady=2
+        )
         
         # 步骤1
         frame1 = tk.LabelFrame(
@@ -949,7 +632,7 @@ class SimpleGUI:
         )
         self.folder_label.pack(pady=5)
         
-        btn1 = tk.Button(
+        self.select_btn = tk.Button(
             frame1,
             text="选择文件夹",
             command=self.select_folder,
@@ -959,7 +642,7 @@ class SimpleGUI:
             padx=20,
             pady=8
         )
-        btn1.pack(pady=5)
+        self.select_btn.pack(pady=5)
         
         self.file_count_label = tk.Label(
             frame1,
@@ -1004,6 +687,17 @@ class SimpleGUI:
         )
         self.process_btn.pack(pady=5)
         
+        self.cancel_btn = tk.Button(
+            frame2,
+            text="取消处理",
+            command=self.cancel,
+            font=("Arial", 10),
+            padx=15,
+            pady=4,
+            state='disabled'
+        )
+        self.cancel_btn.pack(pady=(0, 5))
+        
         self.progress_label = tk.Label(
             frame2,
             text="等待选择文件夹...",
@@ -1012,6 +706,39 @@ class SimpleGUI:
             fg='#7f8c8d'
         )
         self.progress_label.pack(pady=10)
+        
+        # 批量处理
+        frame3 = tk.LabelFrame(
+            self.root,
+            text="批量处理：整村多个农户",
+            font=("Arial", 12, "bold"),
+            bg='white',
+            fg='#34495e',
+            padx=20,
+            pady=15
+        )
+        frame3.pack(fill=tk.X, padx=20, pady=10)
+        
+        batch_hint = tk.Label(
+            frame3,
+            text="选择包含多个农户文件夹的目录，每个农户输出一个合并PDF",
+            font=("Arial", 9),
+            bg='white',
+            fg='#7f8c8d'
+        )
+        batch_hint.pack(pady=(0, 10))
+        
+        self.batch_btn = tk.Button(
+            frame3,
+            text="📦 批量处理",
+            command=self.batch_process,
+            font=("Arial", 11),
+            bg='#9b59b6',
+            fg='white',
+            padx=20,
+            pady=8
+        )
+        self.batch_btn.pack(pady=5)
     
     def show_word_help(self):
         """显示Word转换器帮助信息"""
@@ -1028,22 +755,136 @@ class SimpleGUI:
             name = os.path.basename(folder)
             self.folder_label.config(text=f"已选择: {name}", fg='#27ae60')
             
+            # 第一次读取文件夹时还要导入处理引擎，在后台线程中生成执行计划，界面不等待
+            self.process_btn.config(state='disabled')
+            self.file_count_label.config(text="正在读取文件夹...")
+            self._in_background(lambda: self.processor.plan_folder(folder),
+                                lambda plan, error: self._folder_planned(folder, plan, error))
+    
+    def _folder_planned(self, folder: str, plan, error):
+        """执行计划生成完成（界面线程）"""
+        if folder != self.selected_folder:
+            # 期间又选择了其他文件夹
+            return
+        if error is not None:
+            self.file_count_label.config(text="")
+            messagebox.showerror("错误", f"读取文件夹失败: {str(error)}")
+            return
+        self.file_count_label.config(text=f"找到 {plan['files']} 个文件，可合并 {len(plan['documents'])} 份文档")
+        if self.cancel_token is None:
+            self.process_btn.config(state='normal')
+        self.progress_label.config(text="可以开始处理了")
+        # 用户选择保存位置的同时在后台提前转换，点击保存后只需要合并
+        self._start_preconvert(folder)
+    
+    def _start_preconvert(self, folder: str):
+        """在后台线程中预转换文件夹（之前的预转换先取消，新的预转换等它结束后开始）"""
+        previous = self._take_preconvert(None)
+        token = CancelToken()
+        
+        def run():
+            self._join_preconvert(previous)
+            self.processor.preconvert(folder, token)
+        
+        thread = threading.Thread(target=run, name='preconvert', daemon=True)
+        self.preconvert_job = (folder, token, thread)
+        thread.start()
+    
+    def _take_preconvert(self, folder):
+        """
+        取出正在进行的预转换（与正式处理共用进程池，不能同时运行）
+        预转换的是同一个文件夹时让它继续，结果会被正式处理直接复用；否则取消它
+        """
+        job, self.preconvert_job = self.preconvert_job, None
+        if job is not None and job[0] != folder:
+            job[1].cancel()
+        return job
+    
+    @staticmethod
+    def _join_preconvert(job, cancel_token: CancelToken = None):
+        """在工作线程中等待预转换结束；处理被取消时同时取消预转换"""
+        if job is None:
+            return
+        _, token, thread = job
+        while thread.is_alive():
+            if cancel_token is not None and cancel_token.cancelled:
+                token.cancel()
+            thread.join(0.05)
+    
+    def cancel(self):
+        """取消正在进行的处理"""
+        if self.cancel_token is not None:
+            print("用户取消处理")
+            self.cancel_token.cancel()
+            self.cancel_btn.config(state='disabled')
+            self.progress_label.config(text="正在取消...", fg='#e67e22')
+    
+    def _set_busy(self, busy: bool):
+        """处理期间禁用会开始新处理的按钮"""
+        state = 'disabled' if busy else 'normal'
+        self.select_btn.config(state=state)
+        self.batch_btn.config(state=state)
+        self.process_btn.config(state='normal' if not busy and self.selected_folder else 'disabled')
+        self.cancel_btn.config(state='normal' if busy else 'disabled')
+    
+    def _run_in_background(self, work, on_done):
+        """
+        在工作线程中执行 work(progress_callback, cancel_token)，界面线程不等待
+        进度事件（已由引擎合并限速）和结果通过队列交回界面线程（root.after 定时取出），
+        工作线程不调用任何界面代码。
+        结束后在界面线程中调用 on_done(结果, 异常)
+        """
+        self.cancel_token = CancelToken()
+        self._set_busy(True)
+        events = queue.Queue()
+        
+        def progress(event):
+            events.put(('progress', event))
+        
+        def run():
             try:
-                files = self.processor.find_files(folder)
-                self.file_count_label.config(text=f"找到 {len(files)} 个文件")
-                self.process_btn.config(state='normal')
-                self.progress_label.config(text="可以开始处理了")
+                result = work(progress, self.cancel_token)
             except Exception as e:
-                messagebox.showerror("错误", f"读取文件夹失败: {str(e)}")
+                if not isinstance(e, Cancelled):
+                    import traceback
+                    traceback.print_exc()
+                events.put(('done', (None, e)))
+            else:
+                events.put(('done', (result, None)))
+        
+        self.worker_thread = threading.Thread(target=run, name='processing', daemon=True)
+        self.worker_thread.start()
+        self.root.after(self.POLL_MS, self._drain_events, events, on_done)
     
-    def update_progress(self, value, message):
-        """更新进度"""
+    def _drain_events(self, events: queue.Queue, on_done):
+        """界面线程：取出工作线程的进度（只显示最新的一条）和结束事件"""
+        latest = None
+        while True:
+            try:
+                kind, payload = events.get_nowait()
+            except queue.Empty:
+                break
+            if kind == 'progress':
+                latest = payload
+                continue
+            if latest is not None:
+                self.update_progress(latest)
+            self.cancel_token = None
+            self._set_busy(False)
+            on_done(*payload)
+            return
+        if latest is not None:
+            self.update_progress(latest)
+        self.root.after(self.POLL_MS, self._drain_events, events, on_done)
+    
+    def update_progress(self, event):
+        """更新进度（界面线程）"""
         try:
-            self.progress_label.config(text=message)
-            self.root.update()
+            if not (self.cancel_token is not None and self.cancel_token.cancelled):
+                self.progress_label.config(text=str(event))
         except:
             # 如果UI组件失效，只打印到控制台
-            print(f"[{value}%] {message}")
+            print(f"[{event.percent}%] {event}")
     
     def process(self):
         """处理文档"""
@@ -1056,7 +897,10 @@ class SimpleGUI:
             return
         
         # 检查并更新使用次数
-        can_use, usage_message = self.license_manager.check_and_update_usage()
+        license_manager = self._license_manager()
+        if license_manager is None:
+            return
+        can_use, usage_message = license_manager.check_and_update_usage()
         if not can_use:
             messagebox.showerror(
                 "程序已损坏",
@@ -1067,9 +911,6 @@ class SimpleGUI:
         # 更新界面显示的使用次数
         self.update_license_display()
         
-        # 更新界面显示
-        self.update_license_display()
-        
         print(f"选择的文件夹: {self.selected_folder}")
         
         # 先让用户选择保存位置
@@ -1087,18 +928,42 @@ class SimpleGUI:
         
         print(f"保存路径: {save_path}")
         
-        # 禁用按钮
-        self.process_btn.config(state='disabled')
-        self.progress_label.config(text="正在准备处理...", fg='black')
-        self.root.update()  # 强制刷新界面
+        folder = self.selected_folder
+        preconvert_job = self._take_preconvert(folder)
+        if preconvert_job is not None and preconvert_job[2].is_alive():
+            self.progress_label.config(text="正在完成预转换...", fg='black')
+        else:
+            self.progress_label.config(text="正在准备处理...", fg='black')
+        failures = []
         
-        try:
+        def work(progress_callback, cancel_token):
+            self._join_preconvert(preconvert_job, cancel_token)
+            cancel_token.check()
             print("开始调用 process_folder...")
-            self.processor.process_folder(
-                self.selected_folder,
+            return self.processor.process_folder(
+                folder,
                 save_path,
-                progress_callback=self.update_progress
+                progress_callback=progress_callback,
+                failures=failures,
+                cancel_token=cancel_token
             )
+        
+        self._run_in_background(work, lambda result, error: self._process_done(save_path, failures, error))
+    
+    def _process_done(self, save_path: str, failures: list, error: Exception):
+        """处理结束（界面线程）"""
+        try:
+            if isinstance(error, Cancelled):
+                self.progress_label.config(text="已取消", fg='#7f8c8d')
+                return
+            if error is not None:
+                print(f"处理失败: {str(error)}")
+                messagebox.showerror("错误", f"处理失败:\n\n{str(error)}")
+                try:
+                    self.progress_label.config(text=f"❌ 错误: {str(error)}", fg='red')
+                except:
+                    pass
+                return
             
             print(f"处理完成，检查输出文件: {os.path.exists(save_path)}")
             
@@ -1106,14 +971,17 @@ class SimpleGUI:
                 self.progress_label.config(text="✅ 处理完成！", fg='#27ae60')
                 # 再次更新使用次数显示（确保显示最新状态）
                 self.update_license_display()
-                self.root.update()
             except:
                 pass
             
             # 询问是否打开文件夹
+            failed_note = ""
+            if failures:
+                failed_note = "\n\n以下文件转换失败，未包含在输出中:\n" + "\n".join(
+                    f"• {os.path.basename(path)}: {reason}" for path, reason in failures[:10])
             result = messagebox.askyesno(
                 "成功", 
-                f"文档处理完成！\n\nPDF已保存到:\n{save_path}\n\n是否打开文件所在文件夹？"
+                f"文档处理完成！\n\nPDF已保存到:\n{save_path}{failed_note}\n\n是否打开文件所在文件夹？"
             )
             
             if result:
@@ -1123,33 +991,131 @@ class SimpleGUI:
                     subprocess.run(['open', folder])
                 elif platform.system() == 'Windows':
                     os.startfile(folder)
+        finally:
+            print("处理流程结束")
+            print("=" * 50)
+    
+    def batch_process(self):
+        """批量处理整村农户文件夹"""
+        print("=" * 50)
+        print("批量处理按钮被点击")
+        
+        parent_dir = filedialog.askdirectory(title="选择包含所有农户文件夹的目录")
+        if not parent_dir:
+            return
+        
+        output_dir = filedialog.askdirectory(title="选择合并PDF的保存目录")
+        if not output_dir:
+            print("用户取消了保存")
+            return
+        
+        # 上次的批量处理被中断时，询问是否继续
+        resume = False
+        checkpoint = BatchCheckpoint(parent_dir, output_dir)
+        if checkpoint.exists():
+            done = len(checkpoint.data['done'])
+            resume = messagebox.askyesno(
+                "继续上次的批量处理",
+                f"检测到上次未完成的批量处理（已完成 {done} 个农户）。\n\n"
+                f"选择\"是\"跳过已完成的农户继续处理，\n选择\"否\"全部重新处理。"
+            )
+        
+        # 检查并更新使用次数
+        license_manager = self._license_manager()
+        if license_manager is None:
+            return
+        can_use, usage_message = license_manager.check_and_update_usage()
+        if not can_use:
+            messagebox.showerror(
+                "程序已损坏",
+                f"抱歉，程序文件已损坏，无法继续使用。\n\n错误信息: {usage_message}\n\n请联系技术支持获取新版本。"
+            )
+            return
+        
+        print(f"批量目录: {parent_dir}")
+        print(f"保存目录: {output_dir}")
+        
+        self.progress_label.config(text="正在准备批量处理...", fg='black')
+        preconvert_job = self._take_preconvert(None)
+        
+        def work(progress_callback, cancel_token):
+            self._join_preconvert(preconvert_job)
+            return self.processor.process_batch(parent_dir, output_dir, progress_callback=progress_callback,
+                                                resume=resume, cancel_token=cancel_token)
+        
+        self._run_in_background(work, lambda summary, error: self._batch_done(output_dir, summary, error))
+    
+    def _batch_done(self, output_dir: str, summary: dict, error: Exception):
+        """批量处理结束（界面线程）"""
+        try:
+            if isinstance(error, Cancelled):
+                # 检查点保留，下次选择同样的目录时可以继续
+                self.progress_label.config(text="已取消（下次可以继续处理）", fg='#7f8c8d')
+                return
+            if error is not None:
+                print(f"批量处理失败: {str(error)}")
+                messagebox.showerror("错误", f"批量处理失败:\n\n{str(error)}")
+                try:
+                    self.progress_label.config(text=f"❌ 错误: {str(error)}", fg='red')
+                except:
+                    pass
+                return
             
-        except Exception as e:
-            print(f"处理失败: {str(e)}")
-            import traceback
-            traceback.print_exc()
-            
-            messagebox.showerror("错误", f"处理失败:\n\n{str(e)}")
-            try:
-                self.progress_label.config(text=f"❌ 错误: {str(e)}", fg='red')
-            except:
-                pass
+            succeeded = len(summary['succeeded'])
+            failed = summary['failed']
+            self.progress_label.config(
+                text=f"✅ 批量处理完成：成功 {succeeded} 个，失败 {len(failed)} 个",
+                fg='#27ae60' if not failed else '#e67e22'
+            )
             
+            message = f"批量处理完成！\n\n成功: {succeeded} 个\n失败: {len(failed)} 个\n\nPDF已保存到:\n{output_dir}"
+            failed_files = summary['failed_files']
+            if failed_files:
+                details = "\n".join(f"• {os.path.basename(path)}: {reason}" for path, reason in failed_files[:10])
+                if len(failed_files) > 10:
+                    details += f"\n... 还有 {len(failed_files) - 10} 个"
+                message += f"\n\n以下文件转换失败，未包含在输出中:\n{details}"
+            if failed:
+                details = "\n".join(f"• {os.path.basename(folder)}: {error}" for folder, error in failed[:10])
+                if len(failed) > 10:
+                    details += f"\n... 还有 {len(failed) - 10} 个"
+                message += f"\n\n失败的农户:\n{details}"
+            if failed or failed_files:
+                messagebox.showwarning("批量处理完成", message)
+            else:
+                messagebox.showinfo("批量处理完成", message)
         finally:
-            try:
-                self.process_btn.config(state='normal')
-                self.root.update()
-            except:
-                pass
-            print("处理流程结束")
+            print("批量处理流程结束")
             print("=" * 50)
     
-    def run(self):
-        """运行程序"""
-        self.root.mainloop()
+    def run(self) -> int:
+        """运行程序，返回退出码"""
+        try:
+            self.root.mainloop()
+        finally:
+            self._cancel_on_close()
+            if self._processor is not None:
+                self._processor.shutdown()
+        return self.exit_code
+    
+    def _cancel_on_close(self):
+        """
+        窗口关闭后：取消正在进行的处理和预转换，等工作线程结束（删除未完成的输出和临时文件）
+        再关闭进程池；否则进程池要等正在转换的文件完成，解释器退出时工作线程也会被中途结束
+        """
+        if self.cancel_token is not None:
+            print("窗口已关闭，取消正在进行的处理")
+            self.cancel_token.cancel()
+        job = self._take_preconvert(None)  # 同时取消预转换
+        deadline = time.monotonic() + self.CLOSE_TIMEOUT
+        for thread in (self.worker_thread, job and job[2]):
+            if thread is not None:
+                thread.join(max(0, deadline - time.monotonic()))
 
 
 if __name__ == "__main__":
+    # 打包为exe后，进程池子进程需要此调用才能正常启动
+    multiprocessing.freeze_support()
     print("正在启动文档处理器...")
     app = SimpleGUI()
-    app.run()
+    sys.exit(app.run())
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文件夹处理清单
+每次 process_folder 成功后，在输入文件夹中写入 .docproc_manifest.json，记录：
+- 参与合并的文件（相对路径、大小、修改时间、内容哈希）及其分类和转换方式
+- 生成的输出PDF（路径、大小、修改时间）
+
+下次处理同一文件夹时：
+- 大小和修改时间都没变的文件直接使用记录的哈希，不再重新读取
+- 相关文件、转换方式和输出都没有变化时，整个文件夹跳过
+  （如上次没有LibreOffice时Word文档只按纯文字排版，安装后会重新转换）
+- 只有部分文件变化时，未变化的文件由转换缓存提供结果，只重新转换变化的文件
+
+输入文件夹不可写时（如只读共享目录），清单保存在本机缓存目录中。
+"""
+
+import os
+import json
+import hashlib
+from typing import Callable, Optional
+from cache_paths import cache_root
+
+MANIFEST_NAME = '.docproc_manifest.json'
+MANIFEST_VERSION = 1
+
+
+def _fallback_dir() -> str:
+    """输入文件夹不可写时的清单目录"""
+    return os.path.join(cache_root(), 'manifests')
+
+
+class FolderManifest:
+    """单个输入文件夹的处理清单"""
+
+    def __init__(self, folder: str):
+        self.folder = os.path.abspath(folder)
+        folder_id = hashlib.sha256(self.folder.encode('utf-8')).hexdigest()[:32]
+        self.paths = [
+            os.path.join(self.folder, MANIFEST_NAME),
+            os.path.join(_fallback_dir(), folder_id + '.json'),
+        ]
+        self.previous = self._load() or {}
+        self.files = {}  # 本次参与合并的文件
+
+    def _load(self) -> Optional[dict]:
+        for path in self.paths:
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                if data.get('version') == MANIFEST_VERSION and data.get('folder') == self.folder:
+                    return data
+            except (OSError, ValueError):
+                continue
+        return None
+
+    def _relpath(self, filepath: str) -> str:
+        return os.path.relpath(os.path.abspath(filepath), self.folder).replace(os.sep, '/')
+
+    def source_key(self, filepath: str, doc_type: str, compute: Callable[[str], str],
+                   converter: str = None) -> str:
+        """
+        获取文件的内容哈希：大小和修改时间与上次一致时直接使用记录的值，
+        否则调用compute重新计算；converter为执行计划选择的转换方式，一并记录
+        """
+        st = os.stat(filepath)
+        rel = self._relpath(filepath)
+        old = self.previous.get('files', {}).get(rel)
+        if old and old.get('size') == st.st_size and old.get('mtime') == st.st_mtime_ns:
+            key = old['hash']
+        else:
+            key = compute(filepath)
+        self.files[rel] = {'size': st.st_size, 'mtime': st.st_mtime_ns, 'hash': key, 'type': doc_type,
+                           'converter': converter}
+        return key
+
+    def is_unchanged(self, output_pdf: str, settings: dict) -> bool:
+        """相关文件（含各文件的转换方式）、转换设置和输出文件都与上次一致"""
+        if not self.previous:
+            return False
+        if self.previous.get('settings') != settings:
+            return False
+        if self.previous.get('files') != self.files:
+            return False
+        output = self.previous.get('output') or {}
+        if output.get('path') != os.path.abspath(output_pdf):
+            return False
+        try:
+            st = os.stat(output_pdf)
+        except OSError:
+            return False
+        return output.get('size') == st.st_size and output.get('mtime') == st.st_mtime_ns
+
+    def save(self, output_pdf: str, settings: dict):
+        """处理成功后保存清单（写临时文件后原子替换）"""
+        st = os.stat(output_pdf)
+        data = {
+            'version': MANIFEST_VERSION,
+            'folder': self.folder,
+            'settings': settings,
+            'files': self.files,
+            'output': {'path': os.path.abspath(output_pdf), 'size': st.st_size, 'mtime': st.st_mtime_ns},
+        }
+        for path in self.paths:
+            temp_path = path + '.tmp'
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(temp_path, 'w', encoding='utf-8') as f:
+                    json.dump(data, f, ensure_ascii=False, indent=1)
+                os.replace(temp_path, path)
+                return
+            except OSError:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+                continue
+        print(f"[清单] ⚠️ 无法保存处理清单: {self.folder}")
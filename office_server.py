@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+常驻LibreOffice转换服务
+启动一个headless的soffice监听本地socket，Word文档通过UNO接口发送过去转换，
+避免每个文件都冷启动一次LibreOffice（2-5秒）。
+
+- 第一次转换时才启动（延迟启动）
+- soffice崩溃或连接断开时自动重启并重试一次
+- 进程退出时自动关闭（包括进程池子进程）
+
+每个进程持有一个实例：并行转换时每个进程池子进程各有一个，组成一个小的服务池。
+需要LibreOffice自带的UNO模块（uno.py），不可用时 get_office_server() 返回 None，
+调用方应退回到每个文件单独调用soffice。服务启动失败（如soffice无法监听端口）时 convert()
+抛出 OfficeServerUnavailable，之后本进程的 get_office_server() 都返回 None，不再尝试启动。
+"""
+
+import os
+import sys
+import time
+import shutil
+import signal
+import socket
+import tempfile
+import threading
+import subprocess
+import multiprocessing.util
+from typing import Optional
+
+
+# 配置目录中记录常驻soffice进程号的文件（soffice以独立进程组启动，进程号即进程组号）
+LISTENER_PID_FILE = 'listener.pid'
+
+
+class OfficeServerUnavailable(RuntimeError):
+    """常驻转换服务无法启动（与文档无关），调用方应改为单次调用soffice"""
+
+
+class OfficeServer:
+    """单个常驻LibreOffice实例"""
+
+    def __init__(self, soffice: str, profile_dir: str, startup_timeout: int = 30, convert_timeout: int = 120):
+        self.soffice = soffice
+        self.profile_dir = profile_dir
+        self.startup_timeout = startup_timeout
+        self.convert_timeout = convert_timeout
+        self.process = None
+        self.port = None
+        self.desktop = None
+        self._lock = threading.Lock()
+
+    def is_alive(self) -> bool:
+        """soffice进程是否仍在运行"""
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        """启动soffice监听并建立UNO连接"""
+        self.stop()
+        self.port = _free_port()
+        from pathlib import Path
+        cmd = [
+            self.soffice, '--headless', '--invisible', '--nologo', '--norestore', '--nodefault',
+            '-env:UserInstallation=' + Path(self.profile_dir).as_uri(),
+            f'--accept=socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext',
+        ]
+        print(f"  [LibreOffice] 启动常驻转换服务 (端口 {self.port})...")
+        # 独立进程组，关闭时可以连同soffice.bin子进程一起结束
+        self.process = subprocess.Popen(
+            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            start_new_session=(os.name != 'nt')
+        )
+        # 本进程被强制结束时（如取消处理，正阻塞在UNO调用中来不及处理SIGTERM），
+        # 由进程池按这个记录结束soffice，见 kill_listener
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            with open(os.path.join(self.profile_dir, LISTENER_PID_FILE), 'w') as f:
+                f.write(str(self.process.pid))
+        except OSError:
+            pass
+
+        import uno
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            'com.sun.star.bridge.UnoUrlResolver', local_context
+        )
+        url = f'uno:socket,host=127.0.0.1,port={self.port};urp;StarOffice.ComponentContext'
+        deadline = time.time() + self.startup_timeout
+        while True:
+            try:
+                context = resolver.resolve(url)
+                self.desktop = context.ServiceManager.createInstanceWithContext('com.sun.star.frame.Desktop', context)
+                print(f"  [LibreOffice] ✓ 转换服务已就绪")
+                return
+            except Exception:
+                if not self.is_alive() or time.time() > deadline:
+                    self.stop()
+                    raise OfficeServerUnavailable("LibreOffice转换服务启动失败")
+                time.sleep(0.25)
+
+    def stop(self):
+        """关闭soffice（先正常退出，超时则强制结束）"""
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+            except Exception:
+                pass
+            self.desktop = None
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                kill_process(self.process)
+            self.process = None
+            try:
+                os.remove(os.path.join(self.profile_dir, LISTENER_PID_FILE))
+            except OSError:
+                pass
+
+    def _convert_once(self, source: str, output_pdf: str):
+        """通过UNO打开文档并导出PDF"""
+        import uno
+        from com.sun.star.beans import PropertyValue
+
+        def prop(name, value):
+            p = PropertyValue()
+            p.Name = name
+            p.Value = value
+            return p
+
+        # 超时则直接结束soffice，阻塞中的UNO调用会因连接断开而抛出异常
+        timed_out = threading.Event()
+
+        def on_timeout():
+            timed_out.set()
+            kill_process(self.process)
+
+        watchdog = threading.Timer(self.convert_timeout, on_timeout)
+        watchdog.daemon = True
+        watchdog.start()
+        try:
+            document = self.desktop.loadComponentFromURL(
+                uno.systemPathToFileUrl(os.path.abspath(source)), '_blank', 0,
+                (prop('Hidden', True), prop('ReadOnly', True))
+            )
+            if document is None:
+                raise RuntimeError("LibreOffice无法打开文档")
+            try:
+                document.storeToURL(
+                    uno.systemPathToFileUrl(os.path.abspath(output_pdf)),
+                    (prop('FilterName', 'writer_pdf_Export'),)
+                )
+            finally:
+                document.close(True)
+        except Exception:
+            if timed_out.is_set():
+                raise TimeoutError(f"转换超时({self.convert_timeout}秒)")
+            raise
+        finally:
+            watchdog.cancel()
+
+    def convert(self, source: str, output_pdf: str) -> bool:
+        """
+        转换一个Word文档为PDF，服务异常时自动重启并重试一次
+        返回False表示文档转换失败；服务无法启动时抛出 OfficeServerUnavailable（不重试启动）
+        """
+        with self._lock:
+            for attempt in range(2):
+                if not self.is_alive() or self.desktop is None:
+                    try:
+                        self.start()
+                    except Exception as e:
+                        _disable_office_server()
+                        print(f"  ⚠️ {e}，本进程改为单次调用soffice转换")
+                        raise OfficeServerUnavailable(str(e)) from e
+                try:
+                    self._convert_once(source, output_pdf)
+                    return os.path.exists(output_pdf)
+                except TimeoutError as e:
+                    # 文档本身导致卡死，重试也没有意义；下次转换时会重新启动服务
+                    print(f"  ✗ {e}")
+                    self.stop()
+                    return False
+                except Exception as e:
+                    if self.is_alive():
+                        # 服务仍在运行，说明是文档本身的问题
+                        print(f"  ✗ LibreOffice转换失败: {e}")
+                        return False
+                    print(f"  ⚠️ LibreOffice转换服务异常，正在重启: {e}")
+                    self.stop()
+            return False
+
+
+def _free_port() -> int:
+    """找一个本机空闲端口"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def kill_process(process):
+    """强制结束soffice及其子进程（soffice以独立进程组启动）"""
+    if process is None or process.poll() is not None:
+        return
+    try:
+        if os.name != 'nt':
+            os.killpg(process.pid, signal.SIGKILL)
+        else:
+            process.kill()
+        process.wait(timeout=5)
+    except Exception:
+        pass
+
+
+def kill_listener(profile_dir: str):
+    """结束配置目录中记录的常驻soffice（其所属的进程被强制结束、来不及关闭它时调用）"""
+    try:
+        with open(os.path.join(profile_dir, LISTENER_PID_FILE)) as f:
+            pid = int(f.read().strip())
+    except (OSError, ValueError):
+        return
+    try:
+        if os.name != 'nt':
+            os.killpg(pid, signal.SIGKILL)
+        else:
+            os.kill(pid, signal.SIGTERM)
+        print(f"  [LibreOffice] 已结束遗留的常驻转换服务 (进程 {pid})")
+    except OSError:
+        pass
+
+
+def _find_uno(soffice: str) -> bool:
+    """尝试导入LibreOffice的UNO模块（必要时把LibreOffice的program目录加入搜索路径）"""
+    try:
+        import uno  # noqa: F401
+        return True
+    except ImportError:
+        pass
+    program_dir = os.path.dirname(os.path.realpath(soffice))
+    for candidate in (program_dir, os.path.join(os.path.dirname(program_dir), 'Resources')):
+        if os.path.exists(os.path.join(candidate, 'uno.py')) and candidate not in sys.path:
+            sys.path.append(candidate)
+    try:
+        import uno  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+
+# 每个进程一个实例
+_server = None
+_server_checked = False
+_finalizer_registered = False
+# 服务启动失败过：本进程不再使用常驻服务（关闭、取消处理后也不重置）
+_server_unusable = False
+
+
+def _disable_office_server():
+    global _server_unusable
+    _server_unusable = True
+
+
+def get_office_server() -> Optional[OfficeServer]:
+    """获取本进程的常驻转换服务（不会立即启动soffice）；UNO不可用或服务启动失败过时返回None"""
+    global _server, _server_checked, _finalizer_registered
+    if _server_unusable:
+        return None
+    if _server_checked:
+        return _server
+    _server_checked = True
+
+    from converter_probe import locate_converter
+    kind, soffice = locate_converter()
+    if kind != 'libreoffice' or not soffice or not _find_uno(soffice):
+        print("  [LibreOffice] UNO接口不可用，使用单次调用soffice的方式转换")
+        return None
+
+    profile_dir = os.path.join(tempfile.gettempdir(), f'docproc_lo_server_{os.getpid()}')
+    _server = OfficeServer(soffice, profile_dir)
+    if not _finalizer_registered:
+        # 进程退出时关闭服务（multiprocessing子进程不会执行atexit，Finalize在主进程和子进程都会执行）
+        multiprocessing.util.Finalize(None, shutdown_office_server, exitpriority=10)
+        _finalizer_registered = True
+    return _server
+
+
+def abort_office_server():
+    """立即结束本进程的常驻转换服务（取消处理时使用，不等待正常退出），并清理配置目录"""
+    global _server, _server_checked
+    if _server is not None:
+        kill_process(_server.process)
+        _server.process = None
+        _server.desktop = None
+        shutil.rmtree(_server.profile_dir, ignore_errors=True)
+    _server = None
+    _server_checked = False
+
+
+def shutdown_office_server():
+    """关闭本进程的常驻转换服务并清理其配置目录"""
+    global _server, _server_checked
+    if _server is not None:
+        _server.stop()
+        shutil.rmtree(_server.profile_dir, ignore_errors=True)
+    _server = None
+    _server_checked = False
@@ -0,0 +1,170 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+进度事件
+处理流程在各个阶段发出结构化的进度事件（阶段、当前文件、已处理的字节数和页数、已用时间、剩余时间），
+界面、命令行和日志使用同一个事件流。
+
+引擎每完成一个文件都可以调用 emit()，代价只是创建一个对象；ProgressStream 把事件合并后
+以固定的频率交给监听者：同一阶段内两次送达至少间隔 interval 秒，期间的事件只保留最新的一条。
+阶段变化的事件和 'done' 事件立即送达；需要时调用 flush() 送出被合并的最后一条。
+"""
+
+import time
+import threading
+from typing import Callable, Optional
+
+
+# 阶段：扫描文件、转换、合并写出、完成
+STAGES = ('scan', 'convert', 'merge', 'done')
+
+
+def format_duration(seconds: float) -> str:
+    """剩余时间的可读形式"""
+    if seconds < 60:
+        return f"约{max(1, round(seconds))}秒"
+    if seconds < 3600:
+        return f"约{round(seconds / 60)}分钟"
+    return f"约{seconds / 3600:.1f}小时"
+
+
+def format_bytes(size: int) -> str:
+    """文件大小的可读形式"""
+    for unit in ('B', 'KB', 'MB'):
+        if size < 1024:
+            return f"{size:.0f} {unit}"
+        size /= 1024
+    return f"{size:.1f} GB"
+
+
+class ProgressEvent:
+    """
+    一条进度事件
+    fraction: 整体完成比例（0~1，按预计耗时加权），未知时为None
+    item: 当前的文件（转换时为刚完成的文件）
+    done/total: 当前阶段已完成/总的条目数
+    bytes/pages: 已处理的源文件字节数和页数（估计值）
+    elapsed: 开始以来的秒数
+    eta: 预计剩余秒数，未知时为None
+    household/household_index/households: 批量处理时当前的农户文件夹名及其序号（从1开始）和总数
+    """
+
+    __slots__ = ('stage', 'message', 'fraction', 'item', 'done', 'total', 'bytes', 'pages', 'elapsed', 'eta',
+                 'household', 'household_index', 'households')
+
+    def __init__(self, stage: str, message: str = '', fraction: Optional[float] = None, item: str = None,
+                 done: int = 0, total: int = 0, bytes: int = 0, pages: int = 0, elapsed: float = 0.0,
+                 eta: Optional[float] = None, household: str = None, household_index: int = 0,
+                 households: int = 0):
+        self.stage = stage
+        self.message = message
+        self.fraction = fraction
+        self.item = item
+        self.done = done
+        self.total = total
+        self.bytes = bytes
+        self.pages = pages
+        self.elapsed = elapsed
+        self.eta = eta
+        self.household = household
+        self.household_index = household_index
+        self.households = households
+
+    @property
+    def percent(self) -> Optional[int]:
+        return None if self.fraction is None else int(self.fraction * 100)
+
+    def to_dict(self) -> dict:
+        """转换为可以写成JSON的字典（命令行、日志）"""
+        data = {name: getattr(self, name) for name in self.__slots__}
+        data['percent'] = self.percent
+        return data
+
+    def __str__(self) -> str:
+        text = self.message
+        if self.household:
+            text = f"[{self.household_index}/{self.households}] {self.household}: {text}"
+        if self.eta is not None and self.stage != 'done':
+            text += f"，预计剩余{format_duration(self.eta)}"
+        return text
+
+
+class ProgressStream:
+    """
+    合并、限速后把进度事件交给监听者 listener(event)
+    没有监听者时 emit() 直接返回
+    """
+
+    DEFAULT_INTERVAL = 0.2  # 同一阶段内两次送达的最短间隔（秒）
+
+    def __init__(self, listener: Callable[[ProgressEvent], None] = None, interval: float = None):
+        self.listener = listener
+        self.interval = self.DEFAULT_INTERVAL if interval is None else interval
+        self.started = time.monotonic()
+        self._lock = threading.Lock()
+        self._pending = None
+        self._last_stage = None
+        self._last_time = 0.0
+        self._parent = None
+
+    @classmethod
+    def of(cls, progress) -> 'ProgressStream':
+        """progress 可以是监听函数、ProgressStream 或 None"""
+        return progress if isinstance(progress, ProgressStream) else cls(progress)
+
+    def child(self, transform: Callable[[ProgressEvent], None]) -> 'ProgressStream':
+        """
+        子流程（如批量处理中的一个农户）使用的事件流：
+        事件经 transform 修改（如换算为整批的进度）后交给本事件流，由本事件流统一合并限速
+        """
+        def forward(event):
+            transform(event)
+            self.publish(event)
+
+        stream = ProgressStream(forward if self.listener is not None else None, interval=0)
+        stream._parent = self
+        return stream
+
+    def emit(self, stage: str, message: str = '', **fields):
+        """发出一条事件（fields 见 ProgressEvent）"""
+        if self.listener is None:
+            return
+        fields.setdefault('elapsed', time.monotonic() - self.started)
+        self.publish(ProgressEvent(stage, message, **fields))
+
+    def publish(self, event: ProgressEvent):
+        """发出已经创建好的事件（如转发子流程的事件）"""
+        if self.listener is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if event.stage == self._last_stage and event.stage != 'done' and now - self._last_time < self.interval:
+                self._pending = event
+                return
+            self._pending = None
+            self._last_stage = event.stage
+            self._last_time = now
+        self.listener(event)
+
+    def tick(self):
+        """送出已经等够间隔的合并事件（在没有新事件的等待循环中定期调用）"""
+        if self._parent is not None:
+            self._parent.tick()
+        if self._pending is None:
+            return
+        now = time.monotonic()
+        with self._lock:
+            event = self._pending
+            if event is None or now - self._last_time < self.interval:
+                return
+            self._pending = None
+            self._last_time = now
+        self.listener(event)
+
+    def flush(self):
+        """立即送出被合并的最后一条事件"""
+        with self._lock:
+            event, self._pending = self._pending, None
+            self._last_time = time.monotonic()
+        if event is not None:
+            self.listener(event)
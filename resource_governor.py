@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+并行转换的资源控制
+- 可用CPU数：考虑进程的CPU亲和性（taskset、任务管理器设置）和容器的cgroup CPU配额
+- 可用内存：考虑系统当前可用内存和容器的cgroup内存上限
+- MemoryGovernor：按每个任务预计的内存占用（如图片解码后的大小）决定是否可以再启动一个任务，
+  内存不够时等待正在运行的任务结束，避免老电脑（8GB内存）因同时解码多张大图而使用交换分区
+
+只使用标准库；无法获取可用内存时不限制。
+"""
+
+import os
+import platform
+import threading
+from typing import Optional
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _cgroup_cpu_limit() -> Optional[float]:
+    """容器的CPU配额（核数），没有限制时返回None"""
+    # cgroup v2
+    value = _read('/sys/fs/cgroup/cpu.max')
+    if value:
+        quota, _, period = value.partition(' ')
+        if quota != 'max' and period:
+            return int(quota) / int(period)
+        return None
+    # cgroup v1
+    quota = _read('/sys/fs/cgroup/cpu/cpu.cfs_quota_us')
+    period = _read('/sys/fs/cgroup/cpu/cpu.cfs_period_us')
+    if quota and period and int(quota) > 0:
+        return int(quota) / int(period)
+    return None
+
+
+def available_cpus() -> int:
+    """本进程实际可用的CPU核数"""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        count = os.cpu_count() or 1
+    limit = _cgroup_cpu_limit()
+    if limit:
+        count = min(count, max(1, int(limit)))
+    return max(1, count)
+
+
+def _cgroup_memory_available() -> Optional[int]:
+    """容器内存上限减去已使用量，没有限制时返回None"""
+    for limit_path, usage_path in (
+        ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory.current'),
+        ('/sys/fs/cgroup/memory/memory.limit_in_bytes', '/sys/fs/cgroup/memory/memory.usage_in_bytes'),
+    ):
+        limit, usage = _read(limit_path), _read(usage_path)
+        if limit and usage and limit.isdigit() and usage.isdigit():
+            # cgroup v1 没有限制时是一个接近2^63的数
+            if int(limit) < (1 << 60):
+                return max(0, int(limit) - int(usage))
+            return None
+    return None
+
+
+def _system_memory_available() -> Optional[int]:
+    """系统当前可用内存（字节）"""
+    system = platform.system()
+    if system == 'Linux':
+        meminfo = _read('/proc/meminfo') or ''
+        for line in meminfo.splitlines():
+            if line.startswith('MemAvailable:'):
+                return int(line.split()[1]) * 1024
+        return None
+    if system == 'Windows':
+        import ctypes
+
+        class MEMORYSTATUSEX(ctypes.Structure):
+            _fields_ = [
+                ('dwLength', ctypes.c_ulong), ('dwMemoryLoad', ctypes.c_ulong),
+                ('ullTotalPhys', ctypes.c_ulonglong), ('ullAvailPhys', ctypes.c_ulonglong),
+                ('ullTotalPageFile', ctypes.c_ulonglong), ('ullAvailPageFile', ctypes.c_ulonglong),
+                ('ullTotalVirtual', ctypes.c_ulonglong), ('ullAvailVirtual', ctypes.c_ulonglong),
+                ('ullAvailExtendedVirtual', ctypes.c_ulonglong),
+            ]
+
+        status = MEMORYSTATUSEX()
+        status.dwLength = ctypes.sizeof(MEMORYSTATUSEX)
+        if ctypes.windll.kernel32.GlobalMemoryStatusEx(ctypes.byref(status)):
+            return int(status.ullAvailPhys)
+        return None
+    if system == 'Darwin':
+        # 空闲页 + 可回收的非活跃页
+        import subprocess
+        try:
+            output = subprocess.run(['vm_stat'], capture_output=True, text=True, timeout=5).stdout
+        except (OSError, subprocess.SubprocessError):
+            return None
+        page_size = 4096
+        pages = 0
+        for line in output.splitlines():
+            if 'page size of' in line:
+                page_size = int(line.split('page size of')[1].split()[0])
+            elif line.startswith(('Pages free:', 'Pages inactive:', 'Pages speculative:')):
+                pages += int(line.split(':')[1].strip().rstrip('.'))
+        return pages * page_size or None
+    return None
+
+
+def available_memory() -> Optional[int]:
+    """本进程可以使用的内存（字节），无法获取时返回None"""
+    values = [v for v in (_system_memory_available(), _cgroup_memory_available()) if v is not None]
+    return min(values) if values else None
+
+
+class MemoryGovernor:
+    """
+    按预计内存占用放行任务
+    正在运行的任务预计占用之和不超过预算；没有任务在运行时总是放行（单个超大任务也能执行）
+    """
+
+    # 预算占可用内存的比例，留出余量给系统和合并线程
+    BUDGET_RATIO = 0.7
+
+    def __init__(self, budget: Optional[int] = None):
+        if budget is None:
+            available = available_memory()
+            budget = int(available * self.BUDGET_RATIO) if available is not None else None
+        self.budget = budget
+        self.in_use = 0
+        self.running = 0
+        self._lock = threading.Lock()
+
+    def try_acquire(self, footprint: int) -> bool:
+        """预算足够时占用并返回True"""
+        with self._lock:
+            if self.budget is not None and self.running and self.in_use + footprint > self.budget:
+                return False
+            self.in_use += footprint
+            self.running += 1
+            return True
+
+    def release(self, footprint: int):
+        with self._lock:
+            self.in_use -= footprint
+            self.running -= 1
+
+
+if __name__ == "__main__":
+    memory = available_memory()
+    print(f"可用CPU: {available_cpus()} 核")
+    print(f"可用内存: {memory / 1024 ** 3:.1f} GB" if memory is not None else "可用内存: 未知")
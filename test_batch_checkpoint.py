@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试批量处理检查点：中断后继续处理时跳过已完成的农户
+"""
+
+import os
+import sys
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from PIL import Image
+from docproc_engine import DocumentProcessor
+from batch_checkpoint import BatchCheckpoint, CHECKPOINT_NAME
+
+
+def make_village(parent):
+    """生成3个农户文件夹"""
+    for name in ('农户A', '农户B', '农户C'):
+        folder = os.path.join(parent, name)
+        os.makedirs(folder)
+        Image.new('RGB', (800, 1200), (255, 255, 255)).save(os.path.join(folder, '申请书.jpg'))
+        Image.new('RGB', (810, 1210), (255, 255, 255)).save(os.path.join(folder, '承诺书.jpg'))
+
+
+def test_resume_skips_finished_households():
+    """第二个农户处理时中断，继续处理时只处理剩下的农户"""
+    parent = tempfile.mkdtemp(prefix='docproc_test_')
+    output_dir = tempfile.mkdtemp(prefix='docproc_out_')
+    try:
+        make_village(parent)
+        processor = DocumentProcessor(max_workers=1, use_cache=False, isolate=False)
+        original = processor.process_folder
+        processed = []
+
+        def interrupted(folder, output_pdf, progress_callback=None, dry_run=False, failures=None, cancel_token=None):
+            if os.path.basename(folder) == '农户B':
+                raise KeyboardInterrupt  # 模拟程序被关闭
+            processed.append(os.path.basename(folder))
+            return original(folder, output_pdf, progress_callback, dry_run, failures, cancel_token)
+
+        processor.process_folder = interrupted
+        try:
+            processor.process_batch(parent, output_dir)
+            assert False, "应当被中断"
+        except KeyboardInterrupt:
+            pass
+        assert processed == ['农户A']
+        checkpoint = BatchCheckpoint(parent, output_dir)
+        assert checkpoint.exists()
+        assert checkpoint.is_done(os.path.join(parent, '农户A'), os.path.join(output_dir, '农户A_合并.pdf'))
+
+        def counting(folder, output_pdf, progress_callback=None, dry_run=False, failures=None, cancel_token=None):
+            processed.append(os.path.basename(folder))
+            return original(folder, output_pdf, progress_callback, dry_run, failures, cancel_token)
+
+        processed.clear()
+        processor.process_folder = counting
+        summary = processor.process_batch(parent, output_dir, resume=True)
+        assert processed == ['农户B', '农户C']
+        assert summary['resumed'] == 1
+        assert len(summary['succeeded']) == 3 and not summary['failed']
+        # 全部完成后检查点被删除
+        assert not os.path.exists(os.path.join(output_dir, CHECKPOINT_NAME))
+        print("✓ 继续处理时跳过了已完成的农户")
+    finally:
+        shutil.rmtree(parent, ignore_errors=True)
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_resume_skips_finished_households()
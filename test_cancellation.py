@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试取消处理：约1秒内停止，正在执行的转换子进程被结束，不生成输出文件，不留下临时文件
+"""
+
+import os
+import sys
+import glob
+import time
+import threading
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from cancellation import CancelToken, Cancelled
+from progress_events import ProgressStream
+from worker_pool import IsolatedPool, WorkerCrashed
+from docproc_engine import DocumentProcessor, PdfPageWriter
+from test_parallel_convert import make_household
+from test_worker_pool import _context, _sleep, _square
+
+
+def test_cancel_all_stops_running_task():
+    """cancel_all 立即结束正在执行的任务，进程池之后仍可使用"""
+    pool = IsolatedPool(1, mp_context=_context())
+    try:
+        assert pool.submit(_square, 3).result() == 9
+        running = pool.submit(_sleep, limited=False)
+        queued = pool.submit(_square, 4)
+        time.sleep(0.5)
+        start = time.monotonic()
+        pool.cancel_all()
+        try:
+            running.result(timeout=10)
+            assert False, "正在执行的任务应当被结束"
+        except WorkerCrashed:
+            pass
+        latency = time.monotonic() - start
+        print(f"正在执行的任务 {latency:.2f} 秒后结束")
+        assert latency < 1.0
+        assert queued.cancelled()
+        assert pool.submit(_square, 5).result() == 25
+        print("✓ 正在执行的任务已结束")
+    finally:
+        pool.shutdown()
+
+
+def test_cancel_during_conversion():
+    """转换过程中取消：抛出 Cancelled，不生成输出文件和临时目录"""
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    temp_root = tempfile.gettempdir()
+    try:
+        make_household(folder)
+        output_pdf = os.path.join(folder, '.merged.pdf')
+        temp_before = set(glob.glob(os.path.join(temp_root, 'pdf_temp_*')))
+        token = CancelToken()
+        cancelled_at = []
+
+        def progress(event):
+            # 第一个文件转换完成后取消
+            if event.stage == 'convert' and event.done and not token.cancelled:
+                cancelled_at.append(time.monotonic())
+                token.cancel()
+
+        with DocumentProcessor(max_workers=1, use_cache=False) as processor:
+            try:
+                processor.process_folder(folder, output_pdf, ProgressStream(progress, interval=0),
+                                         cancel_token=token)
+                assert False, "应当被取消"
+            except Cancelled:
+                latency = time.monotonic() - cancelled_at[0]
+        print(f"取消后 {latency:.2f} 秒停止")
+        assert latency < 1.0
+        assert not os.path.exists(output_pdf)
+        assert not glob.glob(output_pdf + '*')
+        assert set(glob.glob(os.path.join(temp_root, 'pdf_temp_*'))) <= temp_before
+        print("✓ 取消后没有输出文件和临时文件")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+class CancelAfter(CancelToken):
+    """第count次检查时取消"""
+
+    def __init__(self, count):
+        super().__init__()
+        self.count = count
+
+    def check(self):
+        self.count -= 1
+        if self.count <= 0:
+            self.cancel()
+        super().check()
+
+
+def test_cancel_during_write():
+    """写出合并结果的过程中取消：不生成输出文件和临时的.part文件"""
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    try:
+        make_household(folder)
+        writer = PdfPageWriter()
+        for name in sorted(os.listdir(folder)):
+            pdf = os.path.join(folder, name + '.pdf')
+            DocumentProcessor(max_workers=1, use_cache=False, isolate=False).convert_to_pdf(
+                os.path.join(folder, name), pdf)
+            writer.append(pdf)
+        output_pdf = os.path.join(folder, '.merged.pdf')
+        try:
+            writer.write(output_pdf, CancelAfter(10))
+            assert False, "应当被取消"
+        except Cancelled:
+            pass
+        finally:
+            writer.close()
+        assert not os.path.exists(output_pdf)
+        assert not os.path.exists(output_pdf + '.part')
+        print("✓ 写出过程中取消，没有输出文件")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_closing_window_cancels_work():
+    """关闭窗口：取消正在进行的处理和预转换，并等工作线程结束（不创建窗口）"""
+    from document_processor import SimpleGUI
+
+    def worker(token):
+        while not token.cancelled:
+            time.sleep(0.01)
+        # 模拟取消后的清理
+        time.sleep(0.2)
+        finished.append(token)
+
+    finished = []
+    app = SimpleGUI.__new__(SimpleGUI)
+    app.cancel_token, preconvert_token = CancelToken(), CancelToken()
+    app.worker_thread = threading.Thread(target=worker, args=(app.cancel_token,))
+    preconvert_thread = threading.Thread(target=worker, args=(preconvert_token,))
+    app.preconvert_job = ('农户', preconvert_token, preconvert_thread)
+    app.worker_thread.start()
+    preconvert_thread.start()
+
+    app._cancel_on_close()
+    assert app.cancel_token.cancelled and preconvert_token.cancelled
+    assert not app.worker_thread.is_alive() and not preconvert_thread.is_alive()
+    assert len(finished) == 2
+    print("✓ 关闭窗口时取消处理并等待清理完成")
+
+
+if __name__ == "__main__":
+    test_cancel_all_stops_running_task()
+    test_cancel_during_conversion()
+    test_cancel_during_write()
+    test_closing_window_cancels_work()
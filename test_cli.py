@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试命令行版本：JSON行进度、退出码，不导入tkinter
+"""
+
+import os
+import sys
+import io
+import json
+import tempfile
+import shutil
+import subprocess
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import docproc_cli
+from test_parallel_convert import make_household, page_sizes
+from test_batch_checkpoint import make_village
+
+CLI = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'docproc_cli.py')
+
+
+def run_cli(args):
+    out = io.StringIO()
+    code = docproc_cli.run(docproc_cli.parse_args(args), out)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+    return code, records
+
+
+def test_folder_json_progress():
+    """单个文件夹：每行一条JSON，最后一行是结果；有文件转换失败时退出码为1"""
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    try:
+        make_household(folder)
+        output_pdf = os.path.join(folder, '.merged.pdf')
+        code, records = run_cli([folder, '-o', output_pdf, '--no-cache', '--progress', 'json'])
+        assert code == docproc_cli.EXIT_OK
+        assert records[-1]['event'] == 'result' and records[-1]['outputs'] == [output_pdf]
+        progress = records[:-1]
+        assert progress[0]['stage'] == 'scan' and progress[-1]['stage'] == 'done'
+        assert len(page_sizes(output_pdf)) == 6
+
+        with open(os.path.join(folder, 'DKSYT03.tiff'), 'wb') as f:
+            f.write(b'II*\x00' + os.urandom(2048))
+        code, records = run_cli([folder, '-o', output_pdf, '--no-cache', '--progress', 'json'])
+        assert code == docproc_cli.EXIT_PARTIAL
+        assert [os.path.basename(item['file']) for item in records[-1]['failed_files']] == ['DKSYT03.tiff']
+        print("✓ JSON进度和退出码正确")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_batch_output_pattern():
+    """批量处理：输出文件名按 {name} 模式生成"""
+    parent = tempfile.mkdtemp(prefix='docproc_test_')
+    output_dir = tempfile.mkdtemp(prefix='docproc_out_')
+    try:
+        make_village(parent)
+        pattern = os.path.join(output_dir, '{name}.pdf')
+        code, records = run_cli(['--batch', parent, '-o', pattern, '--no-cache', '--progress', 'json'])
+        assert code == docproc_cli.EXIT_OK
+        assert sorted(os.listdir(output_dir)) == ['农户A.pdf', '农户B.pdf', '农户C.pdf']
+        assert {r['household'] for r in records if r.get('household')} == {'农户A', '农户B', '农户C'}
+        print("✓ 批量处理按模式输出")
+    finally:
+        shutil.rmtree(parent, ignore_errors=True)
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+def test_headless_dry_run():
+    """在子进程中运行：标准输出只有JSON，不导入tkinter，参数错误时退出码为2"""
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    try:
+        make_household(folder)
+        env = dict(os.environ)
+        env.pop('DISPLAY', None)
+        process = subprocess.run([sys.executable, '-X', 'importtime', CLI, folder, '--dry-run', '--progress', 'json'],
+                                 capture_output=True, text=True, env=env, timeout=120)
+        assert process.returncode == docproc_cli.EXIT_OK, process.stderr[-2000:]
+        records = [json.loads(line) for line in process.stdout.splitlines()]
+        assert records[-1]['event'] == 'result' and records[-1]['estimate']['pages'] > 0
+        assert '| tkinter' not in process.stderr
+
+        process = subprocess.run([sys.executable, CLI, os.path.join(folder, 'missing')],
+                                 capture_output=True, text=True, timeout=60)
+        assert process.returncode == docproc_cli.EXIT_USAGE
+        print("✓ 命令行不依赖界面")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_folder_json_progress()
+    test_batch_output_pattern()
+    test_headless_dry_run()
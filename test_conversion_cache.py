@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试转换缓存：命中、设置变化失效、超出容量按LRU淘汰
+"""
+
+import os
+import sys
+import time
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from conversion_cache import ConversionCache
+
+
+def write_file(path, size):
+    with open(path, 'wb') as f:
+        f.write(os.urandom(size))
+
+
+def test_cache_hit_and_lru_eviction():
+    """最近使用过的条目在淘汰时保留"""
+    workdir = tempfile.mkdtemp(prefix='docproc_test_')
+    try:
+        cache = ConversionCache(os.path.join(workdir, 'cache'), max_bytes=2500)
+        settings = {'version': 1, 'ext': '.jpg'}
+        keys = [cache.make_key(f'hash{n}', settings) for n in range(3)]
+        for n, key in enumerate(keys[:2]):
+            pdf = os.path.join(workdir, f'{n}.pdf')
+            write_file(pdf, 1000)
+            cache.put(key, pdf)
+            time.sleep(0.05)
+
+        # 设置不同，键不同
+        assert cache.make_key('hash0', {'version': 2, 'ext': '.jpg'}) != keys[0]
+
+        # 访问第一个条目，使第二个成为最久未使用
+        assert cache.get(keys[0], os.path.join(workdir, 'hit.pdf'))
+        time.sleep(0.05)
+
+        pdf = os.path.join(workdir, '2.pdf')
+        write_file(pdf, 1000)
+        cache.put(keys[2], pdf)
+
+        assert cache.get(keys[0], os.path.join(workdir, 'a.pdf'))
+        assert not cache.get(keys[1], os.path.join(workdir, 'b.pdf'))
+        assert cache.get(keys[2], os.path.join(workdir, 'c.pdf'))
+        assert cache.stats()['entries'] == 2
+
+        cache.clear()
+        assert cache.stats()['entries'] == 0
+        print("✓ 缓存命中与LRU淘汰正确")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_cache_hit_and_lru_eviction()
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试Word转换器检测的缓存：有效期内复用结果，程序文件变化或超过有效期后重新检测
+使用一个假的soffice脚本（记录被调用的次数），不需要安装LibreOffice
+界面的检测与处理时实际调用的程序一致
+"""
+
+import os
+import sys
+import time
+import tempfile
+import shutil
+import platform
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import converter_probe
+from converter_probe import ConverterProbe
+
+FAKE_SOFFICE = """#!{python}
+# 假的soffice：记录每次调用的参数；--convert-to 时为每个文档写出 <outdir>/<文件名>.pdf，内容为源文件路径
+# 文件名包含"批量失败"的文档只有单独转换时才输出（模拟一个文档使soffice中止批量转换）
+# 环境变量 FAKE_SOFFICE_DELAY: 写出前等待的秒数（模拟同时进行的转换）
+import os, sys, time
+with open({calls!r}, 'a') as f:
+    f.write(' '.join(sys.argv[1:]) + '\\n')
+if '--version' in sys.argv:
+    print('LibreOffice {version} abcdef 00(Build:1)')
+    sys.exit(0)
+args = sys.argv[1:]
+outdir = args[args.index('--outdir') + 1]
+sources = args[args.index('--outdir') + 2:]
+time.sleep(float(os.environ.get('FAKE_SOFFICE_DELAY', 0)))
+for source in sources:
+    if '批量失败' in source and len(sources) > 1:
+        continue
+    name = os.path.splitext(os.path.basename(source))[0] + '.pdf'
+    with open(os.path.join(outdir, name), 'w') as f:
+        f.write(source)
+"""
+
+
+def write_soffice(bin_dir, calls, version='7.6.4.1'):
+    """在bin_dir中写一个假的soffice，调用记录追加到calls文件"""
+    path = os.path.join(bin_dir, 'soffice')
+    with open(path, 'w') as f:
+        f.write(FAKE_SOFFICE.format(python=sys.executable, calls=calls, version=version))
+    os.chmod(path, 0o755)
+    return path
+
+
+def count_calls(calls) -> int:
+    if not os.path.exists(calls):
+        return 0
+    with open(calls) as f:
+        return len(f.readlines())
+
+
+def test_cache_and_invalidation():
+    """第二次检测使用缓存；程序被替换、超过有效期时重新检测；找不到程序时不缓存"""
+    if platform.system() == 'Windows':
+        print("- Windows上检测的是Microsoft Word，跳过")
+        return
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    old_path = os.environ.get('PATH', '')
+    try:
+        bin_dir = os.path.join(folder, 'bin')
+        os.makedirs(bin_dir)
+        calls = os.path.join(folder, 'calls.txt')
+        soffice = write_soffice(bin_dir, calls, '7.6.4.1')
+        os.environ['PATH'] = bin_dir + os.pathsep + old_path
+        probe = ConverterProbe(os.path.join(folder, 'converter.json'))
+
+        info = probe.detect()
+        assert info['available'] and not info['cached']
+        assert info['path'] == os.path.realpath(soffice)
+        assert info['version'] == '7.6.4.1'
+        assert 'docx' in info['capabilities']
+        assert count_calls(calls) == 1
+
+        info = probe.detect()
+        assert info['cached'] and info['version'] == '7.6.4.1'
+        assert count_calls(calls) == 1
+        print("✓ 有效期内使用缓存，没有运行soffice")
+
+        # 升级：程序文件的大小和修改时间变化
+        write_soffice(bin_dir, calls, '24.2.0.3')
+        os.utime(soffice, (time.time() + 10, time.time() + 10))
+        info = probe.detect()
+        assert not info['cached'] and info['version'] == '24.2.0.3'
+        assert count_calls(calls) == 2
+        print("✓ 程序文件变化后重新检测")
+
+        expired = ConverterProbe(probe.cache_path, ttl=0)
+        assert not expired.detect()['cached']
+        assert count_calls(calls) == 3
+        print("✓ 超过有效期后重新检测")
+
+        os.remove(soffice)
+        os.environ['PATH'] = bin_dir
+        info = probe.detect()
+        assert not info['available'] and not info['cached']
+        print("✓ 卸载后检测为不可用")
+    finally:
+        os.environ['PATH'] = old_path
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_engine_uses_located_converter():
+    """soffice不在PATH中但在已知的安装位置（如macOS的LibreOffice.app）：检测和转换都使用它"""
+    if platform.system() == 'Windows':
+        print("- Windows上检测的是Microsoft Word，跳过")
+        return
+    from docproc_engine import DocumentProcessor
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    old_path = os.environ.get('PATH', '')
+    saved = converter_probe.SOFFICE_FALLBACKS
+    try:
+        app_dir = os.path.join(folder, 'LibreOffice.app')
+        os.makedirs(app_dir)
+        calls = os.path.join(folder, 'calls.txt')
+        soffice = write_soffice(app_dir, calls)
+        os.environ['PATH'] = os.path.join(folder, 'empty')
+        converter_probe.SOFFICE_FALLBACKS = [soffice]
+
+        info = ConverterProbe(os.path.join(folder, 'converter.json')).detect()
+        assert info['available'] and info['path'] == os.path.realpath(soffice)
+
+        processor = DocumentProcessor(max_workers=1, office_mode='process', use_cache=False, isolate=False)
+        assert processor.word_converter_available()
+        source = os.path.join(folder, '承诺书.docx')
+        with open(source, 'wb') as f:
+            f.write(b'word')
+        output_pdf = os.path.join(folder, 'out.pdf')
+        assert processor.convert_to_pdf(source, output_pdf, 'word')
+        with open(output_pdf) as f:
+            assert f.read() == source
+        print("✓ 检测和转换使用同一个soffice")
+    finally:
+        converter_probe.SOFFICE_FALLBACKS = saved
+        os.environ['PATH'] = old_path
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_cache_and_invalidation()
+    test_engine_uses_located_converter()
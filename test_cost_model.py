@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试转换耗时模型：从历史记录拟合，保存后重新加载结果一致
+"""
+
+import os
+import sys
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from cost_model import CostModel
+
+
+def test_fit_and_persist():
+    """按页数线性增长的耗时应被拟合出来；记录不足时不给出预测"""
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    try:
+        path = os.path.join(folder, 'cost_history.json')
+        model = CostModel(path)
+        for pages in range(1, 4):
+            model.record('word', {'pages': pages, 'mb': 0.1}, 1.5 + 0.5 * pages)
+        assert model.predict('word', {'pages': 2, 'mb': 0.1}) is None
+
+        for pages in range(4, 21):
+            model.record('word', {'pages': pages, 'mb': 0.1}, 1.5 + 0.5 * pages)
+        predicted = model.predict('word', {'pages': 30, 'mb': 0.1})
+        print(f"预测30页耗时: {predicted:.2f}秒")
+        assert abs(predicted - 16.5) < 0.5
+        assert model.predict('image', {'pages': 1}) is None
+
+        model.save()
+        reloaded = CostModel(path)
+        assert abs(reloaded.predict('word', {'pages': 30, 'mb': 0.1}) - predicted) < 1e-6
+        print("✓ 耗时模型拟合和保存正确")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_fit_and_persist()
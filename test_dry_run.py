@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试试运行：只输出执行计划和估算，不转换、不生成输出文件
+"""
+
+import os
+import sys
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from PIL import Image
+from PyPDF2 import PdfWriter
+from docproc_engine import DocumentProcessor
+
+
+def test_dry_run_estimates_without_converting():
+    """试运行返回计划和估算，不生成输出PDF"""
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    try:
+        Image.new('RGB', (800, 1200), (255, 255, 255)).save(os.path.join(folder, '申请书.jpg'))
+        Image.new('RGB', (1200, 800), (255, 255, 255)).save(os.path.join(folder, '登记簿.bmp'))
+        Image.new('RGB', (600, 800), (255, 255, 255)).save(
+            os.path.join(folder, '土地承包合同书.pdf'), save_all=True,
+            append_images=[Image.new('RGB', (600, 800), (255, 255, 255))] * 2
+        )
+        Image.new('RGB', (600, 800), (255, 255, 255)).save(os.path.join(folder, '其他材料.jpg'))
+        output_pdf = os.path.join(folder, '.merged.pdf')
+
+        processor = DocumentProcessor(max_workers=2, use_cache=False)
+        processor.convert_to_pdf = None  # 试运行不应转换任何文件
+        plan = processor.process_folder(folder, output_pdf, dry_run=True)
+
+        assert not os.path.exists(output_pdf)
+        by_type = {item['doc_type']: item for item in plan['documents']}
+        assert by_type['土地承包合同书']['estimate']['pages'] == 3
+        assert by_type['土地承包合同书']['copies'] == 4
+        assert by_type['登记簿']['estimate']['note'].endswith('需重新编码')
+        assert [os.path.basename(f) for f in plan['unclassified']] == ['其他材料.jpg']
+        # 申请书1页 + 合同书3页×4份 + 登记簿1页
+        assert plan['estimate']['pages'] == 14
+        assert plan['estimate']['bytes'] > 0 and plan['estimate']['wall_seconds'] > 0
+        print("✓ 试运行估算正确")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_pdf_page_count_from_page_tree_root():
+    """PDF页数取自页面树根节点的/Count；无法解析的文件按大小估算"""
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    try:
+        pdf = os.path.join(folder, '登记簿.pdf')
+        writer = PdfWriter()
+        for _ in range(7):
+            writer.add_blank_page(595, 842)
+        with open(pdf, 'wb') as f:
+            writer.write(f)
+        assert DocumentProcessor._pdf_page_count(pdf) == 7
+
+        broken = os.path.join(folder, '损坏.pdf')
+        with open(broken, 'wb') as f:
+            f.write(b'%PDF-1.4\n' + b'0' * (300 * 1024))
+        assert DocumentProcessor._pdf_page_count(broken) == 3
+        print("✓ PDF页数读取正确，损坏的文件按大小估算")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_dry_run_estimates_without_converting()
+    test_pdf_page_count_from_page_tree_root()
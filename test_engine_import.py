@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试处理引擎的导入：不加载界面、授权和重量级依赖，不输出内容，导入时间在预算内
+"""
+
+import os
+import sys
+import json
+import subprocess
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# 导入预算（毫秒）：没有字节码缓存时也应在此之内（有缓存时通常不到一半）
+IMPORT_BUDGET_MS = 150
+
+HEAVY_MODULES = ('tkinter', 'PIL', 'img2pdf', 'PyPDF2', 'docx', 'reportlab', 'requests',
+                 'license_config', 'cloud_license', 'document_processor')
+
+PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import docproc_engine
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({'ms': elapsed, 'loaded': [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def probe():
+    process = subprocess.run([sys.executable, '-c', PROBE], cwd=HERE, capture_output=True, text=True, timeout=60)
+    assert process.returncode == 0, process.stderr
+    lines = process.stdout.splitlines()
+    # 导入时不输出任何内容，只有探测脚本自己的一行
+    assert len(lines) == 1, process.stdout
+    return json.loads(lines[0])
+
+
+def test_engine_import_is_light():
+    """导入引擎不加载重量级依赖，导入时间在预算内（取3次中最快的一次）"""
+    results = [probe() for _ in range(3)]
+    assert results[0]['loaded'] == [], results[0]['loaded']
+    fastest = min(r['ms'] for r in results)
+    print(f"✓ 导入 docproc_engine: {fastest:.1f} ms（预算 {IMPORT_BUDGET_MS} ms）")
+    assert fastest < IMPORT_BUDGET_MS
+
+
+if __name__ == "__main__":
+    test_engine_import_is_light()
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试文件夹处理清单：未变化的文件夹跳过，只重新转换变化的文件，
+转换设置或转换方式（如安装LibreOffice后）变化时不跳过文件夹
+"""
+
+import os
+import sys
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from PIL import Image
+from docx import Document
+from docproc_engine import DocumentProcessor
+from cost_model import default_history_path
+from test_parallel_convert import make_household
+
+
+def make_folder(folder):
+    """一个Word文档和一张图片"""
+    document = Document()
+    document.add_paragraph('承诺书')
+    document.save(os.path.join(folder, '承诺书.docx'))
+    Image.new('RGB', (800, 1200), (255, 255, 255)).save(os.path.join(folder, '申请书.jpg'))
+
+
+def run(folder, output_pdf, word_available=None, cache_dir=None, version=None):
+    """处理文件夹，返回实际转换过的 (文件名, 转换方式)；version 用于模拟转换设置的变化"""
+    converted = []
+    processor = DocumentProcessor(max_workers=1, use_cache=cache_dir is not None, cache_dir=cache_dir,
+                                  isolate=False)
+    if word_available is not None:
+        processor._word_available = word_available
+    if version is not None:
+        processor.CONVERTER_VERSION = version
+    convert_to_pdf = processor.convert_to_pdf
+
+    def recording_convert(filepath, output, converter=None):
+        converted.append((os.path.basename(filepath), converter))
+        if converter == 'word':
+            # 没有LibreOffice：用纯文字排版代替，只记录调用
+            converter = 'reportlab'
+        return convert_to_pdf(filepath, output, converter)
+
+    processor.convert_to_pdf = recording_convert
+    processor.process_folder(folder, output_pdf)
+    return converted
+
+
+def test_unchanged_folder_skipped_and_changed_file_reconverted():
+    """第二次处理时跳过整个文件夹；只修改一个文件时只重新转换这个文件"""
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    try:
+        make_household(folder)
+        cache_dir = os.path.join(folder, '.cache')
+        output_pdf = os.path.join(folder, '.merged.pdf')
+        history = default_history_path()
+        history_before = os.stat(history).st_mtime_ns if os.path.exists(history) else None
+
+        assert len(run(folder, output_pdf, cache_dir=cache_dir)) == 6
+        # 耗时历史记录在指定的缓存目录中，不写入本机的历史文件
+        assert os.path.exists(os.path.join(cache_dir, 'cost_history.json'))
+        assert (os.stat(history).st_mtime_ns if os.path.exists(history) else None) == history_before
+        mtime = os.stat(output_pdf).st_mtime_ns
+        assert run(folder, output_pdf, cache_dir=cache_dir) == []
+        assert os.stat(output_pdf).st_mtime_ns == mtime
+        print("✓ 未变化的文件夹跳过，输出文件没有重写")
+
+        Image.new('RGB', (860, 1260), (255, 255, 255)).save(os.path.join(folder, '登记簿.jpg'))
+        assert run(folder, output_pdf, cache_dir=cache_dir) == [('登记簿.jpg', 'image')]
+        assert os.stat(output_pdf).st_mtime_ns != mtime
+        print("✓ 只重新转换变化的文件")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_settings_change_invalidates_folder():
+    """转换设置变化（转换器版本）后不跳过文件夹，缓存的结果也不再使用"""
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    try:
+        make_household(folder)
+        cache_dir = os.path.join(folder, '.cache')
+        output_pdf = os.path.join(folder, '.merged.pdf')
+
+        run(folder, output_pdf, cache_dir=cache_dir)
+        version = DocumentProcessor.CONVERTER_VERSION + 1
+        assert len(run(folder, output_pdf, cache_dir=cache_dir, version=version)) == 6
+        assert run(folder, output_pdf, cache_dir=cache_dir, version=version) == []
+        print("✓ 转换设置变化后重新转换")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_converter_change_invalidates_folder():
+    """上次Word文档按纯文字排版，有了Word转换器之后应重新转换，而不是跳过文件夹"""
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    try:
+        make_folder(folder)
+        output_pdf = os.path.join(folder, '.merged.pdf')
+
+        first = run(folder, output_pdf, word_available=False)
+        assert ('承诺书.docx', 'reportlab') in first
+        assert run(folder, output_pdf, word_available=False) == []
+        print("✓ 文件和转换方式都没变化时跳过")
+
+        third = run(folder, output_pdf, word_available=True)
+        assert ('承诺书.docx', 'word') in third
+        print("✓ 转换方式变化后重新转换")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_unchanged_folder_skipped_and_changed_file_reconverted()
+    test_settings_change_invalidates_folder()
+    test_converter_change_invalidates_folder()
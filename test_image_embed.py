@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试图片直接嵌入PDF：JPEG原样写入（/DCTDecode，字节不变），横向图片通过页面的/Rotate旋转，不重新栅格化
+"""
+
+import os
+import sys
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from PIL import Image
+from PyPDF2 import PdfReader
+from docproc_engine import DocumentProcessor
+
+
+def embedded_image(pdf_path):
+    """返回 (页面, 页面上唯一的图片对象)"""
+    page = PdfReader(pdf_path).pages[0]
+    xobjects = page['/Resources']['/XObject']
+    assert len(xobjects) == 1
+    return page, next(iter(xobjects.values())).get_object()
+
+
+def test_jpeg_embedded_unchanged():
+    """竖向和横向的基线JPEG都按原始字节嵌入；横向图片的页面为/Rotate 90"""
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    try:
+        processor = DocumentProcessor(max_workers=1, use_cache=False, isolate=False)
+        for name, size, rotate in (('portrait.jpg', (600, 900), 0), ('landscape.jpg', (900, 600), 90)):
+            source = os.path.join(folder, name)
+            Image.new('RGB', size, (200, 120, 40)).save(source, 'JPEG', quality=90)
+            output_pdf = os.path.join(folder, name + '.pdf')
+            assert processor.convert_to_pdf(source, output_pdf)
+
+            page, image = embedded_image(output_pdf)
+            assert image['/Filter'] == '/DCTDecode'
+            with open(source, 'rb') as f:
+                assert image._data == f.read()
+            # 像素没有旋转：图片仍是原来的宽高
+            assert (image['/Width'], image['/Height']) == size
+            assert page.get('/Rotate', 0) == rotate
+            print(f"✓ {name}: 原样嵌入，/Rotate {rotate}")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_jpeg_embedded_unchanged()
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试PDF合并：重复的文档共享页面内容，不会成倍增加文件大小
+"""
+
+import os
+import sys
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import img2pdf
+from PIL import Image
+from PyPDF2 import PdfReader
+from docproc_engine import DocumentProcessor
+
+
+def test_repeated_pages_share_content():
+    """同一份PDF合并4次，页数为4倍，文件大小基本不变"""
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    try:
+        image_path = os.path.join(folder, 'scan.jpg')
+        Image.effect_noise((600, 800), 60).convert('RGB').save(image_path, quality=90)
+        single_pdf = os.path.join(folder, 'single.pdf')
+        with open(single_pdf, 'wb') as f:
+            f.write(img2pdf.convert(image_path))
+        # 内容相同但路径不同的副本也应共享
+        copy_pdf = os.path.join(folder, 'copy.pdf')
+        shutil.copy(single_pdf, copy_pdf)
+
+        processor = DocumentProcessor(use_cache=False)
+        once_pdf = os.path.join(folder, 'once.pdf')
+        four_pdf = os.path.join(folder, 'four.pdf')
+        processor.merge_pdfs([single_pdf], once_pdf)
+        processor.merge_pdfs([single_pdf, copy_pdf, single_pdf, copy_pdf], four_pdf)
+
+        once_size = os.path.getsize(once_pdf)
+        four_size = os.path.getsize(four_pdf)
+        print(f"1份: {once_size} 字节, 4份: {four_size} 字节")
+        assert len(PdfReader(four_pdf).pages) == 4
+        assert four_size < once_size * 1.1
+        print("✓ 重复页面共享内容")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_repeated_pages_share_content()
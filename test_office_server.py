@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试常驻LibreOffice服务启动失败时的退回：只尝试启动一次，之后改为单次调用soffice
+以及转换子进程被强制结束后，结束它遗留的常驻soffice
+不需要安装LibreOffice：soffice和UNO检测、服务启动、单次调用soffice都被替换
+"""
+
+import os
+import sys
+import tempfile
+import shutil
+import platform
+import subprocess
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import office_server
+from office_server import OfficeServer, get_office_server, shutdown_office_server
+from docproc_engine import DocumentProcessor, _cleanup_worker
+
+
+def test_startup_failure_falls_back_to_soffice():
+    """服务启动失败：start()只调用一次，每个Word文档都改为单次调用soffice并转换成功"""
+    if platform.system() == 'Windows':
+        print("- Windows上使用Microsoft Word转换，跳过")
+        return
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    old_path = os.environ.get('PATH', '')
+    saved = (OfficeServer.start, office_server._find_uno)
+    starts = []
+    soffice_calls = []
+
+    def failing_start(self):
+        starts.append(self)
+        raise RuntimeError("无法监听端口")
+
+    def fake_run_soffice(filepaths, outdir, timeout):
+        soffice_calls.append(list(filepaths))
+        for path in filepaths:
+            name = os.path.splitext(os.path.basename(path))[0] + '.pdf'
+            with open(os.path.join(outdir, name), 'wb') as f:
+                f.write(b'%PDF-1.4\n')
+        return None
+
+    try:
+        bin_dir = os.path.join(folder, 'bin')
+        os.makedirs(bin_dir)
+        soffice = os.path.join(bin_dir, 'soffice')
+        with open(soffice, 'w') as f:
+            f.write('#!/bin/sh\nexit 0\n')
+        os.chmod(soffice, 0o755)
+        os.environ['PATH'] = bin_dir + os.pathsep + old_path
+        OfficeServer.start = failing_start
+        office_server._find_uno = lambda path: True
+        shutdown_office_server()
+        office_server._server_unusable = False
+
+        processor = DocumentProcessor(max_workers=1, use_cache=False, isolate=False)
+        processor._run_soffice = fake_run_soffice
+        for name in ('申请书.docx', '承诺书.doc'):
+            source = os.path.join(folder, name)
+            with open(source, 'wb') as f:
+                f.write(b'word')
+            output_pdf = os.path.join(folder, 'out', name + '.pdf')
+            os.makedirs(os.path.dirname(output_pdf), exist_ok=True)
+            assert processor.convert_to_pdf(source, output_pdf)
+            assert os.path.exists(output_pdf)
+
+        assert len(starts) == 1
+        assert len(soffice_calls) == 2
+        assert get_office_server() is None
+        print("✓ 服务启动失败后只尝试一次，Word文档改为单次调用soffice")
+    finally:
+        OfficeServer.start, office_server._find_uno = saved
+        os.environ['PATH'] = old_path
+        shutdown_office_server()
+        office_server._server_unusable = False
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_killed_worker_listener_is_stopped():
+    """子进程被强制结束后，清理函数按配置目录中的记录结束常驻soffice并删除配置目录"""
+    if platform.system() == 'Windows':
+        print("- Windows上使用Microsoft Word转换，跳过")
+        return
+    # 用一个不存在的进程号命名配置目录，代替已被结束的转换子进程
+    worker_pid = 4000000 + os.getpid()
+    profile_dir = os.path.join(tempfile.gettempdir(), f'docproc_lo_server_{worker_pid}')
+    # 代替常驻soffice：和 OfficeServer.start 一样以独立进程组启动
+    listener = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'],
+                                start_new_session=True)
+    try:
+        os.makedirs(profile_dir, exist_ok=True)
+        with open(os.path.join(profile_dir, office_server.LISTENER_PID_FILE), 'w') as f:
+            f.write(str(listener.pid))
+
+        _cleanup_worker(worker_pid)
+
+        assert listener.wait(timeout=5) is not None
+        assert not os.path.exists(profile_dir)
+        print("✓ 子进程被强制结束后，遗留的常驻soffice被结束")
+    finally:
+        if listener.poll() is None:
+            listener.kill()
+            listener.wait()
+        shutil.rmtree(profile_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_startup_failure_falls_back_to_soffice()
+    test_killed_worker_listener_is_stopped()
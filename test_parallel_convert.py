@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试并行转换：多进程转换后合并顺序与逐个转换一致
+"""
+
+import os
+import sys
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from PIL import Image
+from PyPDF2 import PdfReader
+from docproc_engine import DocumentProcessor
+
+
+def make_household(folder):
+    """生成一个测试用的农户文件夹（不同尺寸的图片用于区分页面）"""
+    samples = [
+        ('申请书.jpg', (800, 1200)),
+        ('户主声明书.png', (810, 1210)),
+        ('登记簿.jpg', (820, 1220)),
+        ('DKSYT02.jpg', (830, 1230)),
+        ('DKSYT01.jpg', (840, 1240)),
+        ('承诺书.jpg', (850, 1250)),
+    ]
+    for name, size in samples:
+        Image.new('RGB', size, (255, 255, 255)).save(os.path.join(folder, name))
+
+
+def page_sizes(pdf_path):
+    """读取每一页的尺寸，用于比较页面顺序"""
+    reader = PdfReader(pdf_path)
+    return [(round(float(p.mediabox.width)), round(float(p.mediabox.height))) for p in reader.pages]
+
+
+def test_parallel_matches_serial():
+    """并行与串行的输出页面顺序应完全一致"""
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    try:
+        make_household(folder)
+        serial_pdf = os.path.join(folder, '.serial.pdf')
+        parallel_pdf = os.path.join(folder, '.parallel.pdf')
+
+        DocumentProcessor(max_workers=1, use_cache=False, isolate=False).process_folder(folder, serial_pdf)
+        with DocumentProcessor(max_workers=4, use_cache=False) as processor:
+            processor.process_folder(folder, parallel_pdf)
+
+        serial = page_sizes(serial_pdf)
+        parallel = page_sizes(parallel_pdf)
+        print(f"串行: {serial}")
+        print(f"并行: {parallel}")
+        assert len(serial) == 6
+        assert serial == parallel
+        print("✓ 并行转换顺序正确")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_repeated_contract_converted_once():
+    """土地承包合同书需要4份副本，但只应转换一次"""
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    try:
+        make_household(folder)
+        Image.new('RGB', (860, 1260), (255, 255, 255)).save(os.path.join(folder, '土地承包合同书.jpg'))
+        output_pdf = os.path.join(folder, '.merged.pdf')
+
+        processor = DocumentProcessor(max_workers=1, use_cache=False, isolate=False)
+        converted = []
+        original = processor.convert_to_pdf
+
+        def counting_convert(filepath, output, converter=None):
+            converted.append(os.path.basename(filepath))
+            return original(filepath, output, converter)
+
+        processor.convert_to_pdf = counting_convert
+        processor.process_folder(folder, output_pdf)
+
+        sizes = page_sizes(output_pdf)
+        assert converted.count('土地承包合同书.jpg') == 1
+        # 页面顺序：申请书、户主声明书、合同书×4 ...
+        assert sizes[2:6] == [sizes[2]] * 4
+        assert sizes.count(sizes[2]) == 4
+        assert len(sizes) == 10
+        print("✓ 合同书只转换一次，输出4份")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_plan_picks_one_source_per_document():
+    """同名Word和PDF只选一个来源，输出文件和临时文件不参与合并"""
+    from reportlab.pdfgen import canvas
+    from docx import Document
+
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    try:
+        make_household(folder)
+        # 用户自己导出的PDF：优先使用PDF，跳过Word
+        Document().save(os.path.join(folder, '公示结果归户表.docx'))
+        Image.new('RGB', (600, 800), (255, 255, 255)).save(os.path.join(folder, '公示结果归户表.pdf'))
+        # 以前预处理生成的PDF（reportlab）：排除PDF，重新转换Word
+        Document().save(os.path.join(folder, '承包方调查表.docx'))
+        c = canvas.Canvas(os.path.join(folder, '承包方调查表.pdf'))
+        c.drawString(100, 700, 'old')
+        c.save()
+        Document().save(os.path.join(folder, '~$承包方调查表.docx'))
+        output_pdf = os.path.join(folder, '申请书_合并.pdf')
+        shutil.copyfile(os.path.join(folder, '申请书.jpg'), output_pdf)
+
+        plan = DocumentProcessor(max_workers=1, use_cache=False).plan_folder(folder, output_pdf)
+        sources = [os.path.basename(item['source']) for item in plan['documents']]
+        excluded = [os.path.basename(path) for path, _ in plan['excluded']]
+        print(f"计划: {sources}")
+        print(f"排除: {excluded}")
+        assert sources[:3] == ['申请书.jpg', '户主声明书.png', '承包方调查表.docx']
+        assert '公示结果归户表.pdf' in sources and '公示结果归户表.docx' not in sources
+        assert '承包方调查表.pdf' in excluded
+        assert '~$承包方调查表.docx' in excluded
+        assert '申请书_合并.pdf' in excluded and '申请书_合并.pdf' not in sources
+        assert len(sources) == len(set(sources))
+        print("✓ 每份文档只有一个来源")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_longest_job_first_keeps_output_order():
+    """预计耗时长的文件先转换，输出顺序不变；窗口被长任务占满时也不会卡住"""
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    try:
+        make_household(folder)
+        for i in range(6):
+            # 大尺寸BMP需要解码重新编码，预计耗时最长，且在输出顺序的最后
+            Image.new('RGB', (2000 + i, 3000), (255, 255, 255)).save(os.path.join(folder, f'DKSYT1{i}.bmp'))
+        expected_pdf = os.path.join(folder, '.expected.pdf')
+        output_pdf = os.path.join(folder, '.merged.pdf')
+
+        processor = DocumentProcessor(max_workers=1, use_cache=False, isolate=False)
+        converted = []
+        original = processor.convert_to_pdf
+
+        def recording_convert(filepath, output, converter=None):
+            converted.append(os.path.basename(filepath))
+            return original(filepath, output, converter)
+
+        processor.convert_to_pdf = recording_convert
+        processor.process_folder(folder, output_pdf)
+        print(f"转换顺序: {converted}")
+        assert converted[0].endswith('.bmp')
+
+        # 与按输出顺序逐个转换的结果一致
+        processor = DocumentProcessor(max_workers=1, use_cache=False, isolate=False)
+        processor._dispatch_order = lambda costs, hits: sorted(costs)
+        processor.process_folder(folder, expected_pdf)
+        assert page_sizes(output_pdf) == page_sizes(expected_pdf)
+        print("✓ 最长任务优先，输出顺序不变")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_parallel_matches_serial()
+    test_repeated_contract_converted_once()
+    test_plan_picks_one_source_per_document()
+    test_longest_job_first_keeps_output_order()
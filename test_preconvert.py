@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试预转换：选择文件夹后提前转换，正式处理时只需要合并
+"""
+
+import os
+import sys
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from cancellation import CancelToken
+from docproc_engine import DocumentProcessor
+from test_parallel_convert import make_household, page_sizes
+
+
+def test_process_reuses_preconverted_files():
+    """预转换后正式处理的所有文件都来自暂存区，输出与直接处理相同"""
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    try:
+        make_household(folder)
+        expected_pdf = os.path.join(folder, '.expected.pdf')
+        output_pdf = os.path.join(folder, '.merged.pdf')
+        with DocumentProcessor(max_workers=2, use_cache=False) as processor:
+            processor.process_folder(folder, expected_pdf)
+
+        with DocumentProcessor(max_workers=2, use_cache=False) as processor:
+            converted = processor.preconvert(folder)
+            assert converted > 0
+            staging = processor._staging
+            misses = staging.misses
+            processor.process_folder(folder, output_pdf)
+            assert staging.hits == converted and staging.misses == misses
+            staging_dir = staging.cache_dir
+        # 暂存区在关闭时删除
+        assert not os.path.exists(staging_dir)
+        assert page_sizes(output_pdf) == page_sizes(expected_pdf)
+        print("✓ 正式处理直接复用了预转换的结果")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_cancelled_preconvert_is_harmless():
+    """取消的预转换不影响之后的正式处理"""
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    try:
+        make_household(folder)
+        output_pdf = os.path.join(folder, '.merged.pdf')
+        token = CancelToken()
+        token.cancel()
+        with DocumentProcessor(max_workers=2, use_cache=False) as processor:
+            assert processor.preconvert(folder, token) == 0
+            processor.process_folder(folder, output_pdf)
+        assert len(page_sizes(output_pdf)) > 0
+        print("✓ 取消预转换后可以正常处理")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_process_reuses_preconverted_files()
+    test_cancelled_preconvert_is_harmless()
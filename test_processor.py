@@ -73,8 +73,8 @@ def test_processor():
         output_pdf = "test_output.pdf"
         print(f"\n开始处理，输出到: {output_pdf}")
         
-        def progress_callback(value, message):
-            print(f"  [{value}%] {message}")
+        def progress_callback(event):
+            print(f"  [{event.percent}%] {event}")
         
         try:
             processor.process_folder(test_folder, output_pdf, progress_callback)
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试进度事件：合并限速，处理流程和批量处理发出的结构化事件
+"""
+
+import os
+import sys
+import time
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from progress_events import ProgressStream
+from docproc_engine import DocumentProcessor
+from test_parallel_convert import make_household
+from test_batch_checkpoint import make_village
+
+
+def test_stream_coalesces_events():
+    """同一阶段的大量事件合并为少数几条，阶段变化和完成事件不丢失"""
+    received = []
+    stream = ProgressStream(received.append, interval=0.5)
+    stream.emit('scan', "正在扫描文件...")
+    for i in range(1, 10001):
+        stream.emit('convert', f"({i}/10000)", done=i, total=10000)
+    assert [e.stage for e in received] == ['scan', 'convert']
+    assert received[-1].done == 1
+    time.sleep(0.5)
+    stream.tick()
+    assert received[-1].done == 10000
+    stream.emit('convert', "", done=10000, total=10000)
+    stream.emit('done', "完成！", fraction=1.0)
+    stream.emit('done', "完成！", fraction=1.0)
+    assert [e.stage for e in received][-2:] == ['done', 'done']
+    assert len(received) == 5
+    print("✓ 10000 条事件合并为 5 条")
+
+
+def test_process_folder_events():
+    """处理流程依次发出扫描、转换、合并、完成事件"""
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    try:
+        make_household(folder)
+        events = []
+        stream = ProgressStream(events.append, interval=0)
+        with DocumentProcessor(max_workers=2, use_cache=False) as processor:
+            processor.process_folder(folder, os.path.join(folder, '.merged.pdf'), stream)
+        stages = [e.stage for e in events]
+        assert stages[0] == 'scan' and stages[-2:] == ['merge', 'done']
+        converted = [e for e in events if e.stage == 'convert' and e.done]
+        assert [e.done for e in converted] == list(range(1, converted[-1].total + 1))
+        assert all(e.item and e.pages > 0 and e.bytes > 0 for e in converted)
+        assert converted[-1].eta is None and converted[-1].fraction == 1.0
+        assert events[-1].to_dict()['percent'] == 100
+        print("✓ 处理流程的进度事件完整")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_batch_events_carry_household():
+    """批量处理的事件带有农户信息，整批进度递增"""
+    parent = tempfile.mkdtemp(prefix='docproc_test_')
+    output_dir = tempfile.mkdtemp(prefix='docproc_out_')
+    try:
+        make_village(parent)
+        events = []
+        with DocumentProcessor(max_workers=1, use_cache=False, isolate=False) as processor:
+            processor.process_batch(parent, output_dir, progress_callback=events.append)
+        households = [e for e in events if e.household]
+        assert {e.household for e in households} == {'农户A', '农户B', '农户C'}
+        assert all(e.households == 3 for e in households)
+        fractions = [e.fraction for e in events]
+        assert fractions == sorted(fractions) and fractions[-1] == 1.0
+        assert str(households[-1]).startswith('[3/3] 农户C: ')
+        print("✓ 批量处理的进度事件带有农户信息")
+    finally:
+        shutil.rmtree(parent, ignore_errors=True)
+        shutil.rmtree(output_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_stream_coalesces_events()
+    test_process_folder_events()
+    test_batch_events_carry_household()
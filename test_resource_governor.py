@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试资源控制：内存预算不足时任务逐个执行，结果与不限制时一致
+"""
+
+import os
+import sys
+import tempfile
+import shutil
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from PIL import Image
+from resource_governor import MemoryGovernor, available_cpus
+from docproc_engine import DocumentProcessor
+from test_parallel_convert import make_household, page_sizes
+
+
+def test_governor_admits_within_budget():
+    """预算内放行；没有任务在运行时，超出预算的单个任务也放行"""
+    governor = MemoryGovernor(budget=100)
+    assert governor.try_acquire(500)
+    assert not governor.try_acquire(1)
+    governor.release(500)
+    assert governor.try_acquire(60)
+    assert governor.try_acquire(40)
+    assert not governor.try_acquire(1)
+    assert available_cpus() >= 1
+    print("✓ 内存预算控制正确")
+
+
+def test_small_budget_keeps_output():
+    """内存预算很小时任务逐个提交，不会卡住，输出不变"""
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    try:
+        make_household(folder)
+        Image.new('RGB', (3000, 2000), (255, 255, 255)).save(os.path.join(folder, 'DKSYT03.bmp'))
+        expected_pdf = os.path.join(folder, '.expected.pdf')
+        output_pdf = os.path.join(folder, '.limited.pdf')
+
+        DocumentProcessor(max_workers=1, use_cache=False, isolate=False).process_folder(folder, expected_pdf)
+        with DocumentProcessor(max_workers=4, use_cache=False, memory_budget=1) as processor:
+            processor.process_folder(folder, output_pdf)
+        assert page_sizes(output_pdf) == page_sizes(expected_pdf)
+        print("✓ 内存预算不足时输出不变")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_governor_admits_within_budget()
+    test_small_budget_keeps_output()
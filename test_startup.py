@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试桌面程序的启动时间：窗口显示之前不加载处理引擎、授权和重量级依赖，不检测Word转换器
+"""
+
+import os
+import sys
+import json
+import subprocess
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# 导入 document_processor 的预算（毫秒，不含tkinter）
+IMPORT_BUDGET_MS = 150
+# 从启动到窗口第一次显示的预算（毫秒）
+FIRST_WINDOW_BUDGET_MS = 1000
+
+DEFERRED_MODULES = ('docproc_engine', 'PIL', 'img2pdf', 'PyPDF2', 'docx', 'reportlab', 'requests', 'cloud_license')
+
+IMPORT_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import document_processor
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({'ms': elapsed, 'loaded': [m for m in %r if m in sys.modules]}))
+""" % (DEFERRED_MODULES,)
+
+WINDOW_PROBE = """
+import sys, time, json
+start = time.perf_counter()
+import document_processor
+app = document_processor.SimpleGUI()
+app.root.update()
+elapsed = (time.perf_counter() - start) * 1000
+print(json.dumps({'ms': elapsed, 'word_checked': app.word_available is not None}))
+app.root.destroy()
+"""
+
+# 没有显示器时用假的tkinter创建窗口，检查授权管理器、Word转换器检测不在界面线程中执行
+HEADLESS_PROBE = """
+import sys, json, threading
+import document_processor
+
+class FakeWidget:
+    def __init__(self, *args, **kwargs):
+        pass
+    def __getattr__(self, name):
+        return lambda *args, **kwargs: FakeWidget()
+    def winfo_screenwidth(self):
+        return 1920
+    def winfo_screenheight(self):
+        return 1080
+
+class FakeTkinter:
+    def __getattr__(self, name):
+        return FakeWidget
+
+def import_fake_tkinter():
+    fake = FakeTkinter()
+    document_processor.tk = document_processor.filedialog = document_processor.messagebox = fake
+
+calls = []
+def record(name, value):
+    def fn():
+        calls.append((name, threading.current_thread() is threading.main_thread()))
+        return value
+    return fn
+
+document_processor._import_tkinter = import_fake_tkinter
+document_processor.create_license_manager = record('license', (None, True, ''))
+document_processor._detect_word_converter = record('word', (True, ''))
+app = document_processor.SimpleGUI()
+loaded = [m for m in %r if m in sys.modules]
+app._license_thread.join(10)
+print(json.dumps({'loaded': loaded, 'processor': app._processor is not None,
+                  'in_main_thread': [name for name, main in calls if main]}))
+""" % (DEFERRED_MODULES,)
+
+
+def run_probe(code):
+    process = subprocess.run([sys.executable, '-c', code], cwd=HERE, capture_output=True, text=True, timeout=120)
+    assert process.returncode == 0, process.stderr
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def has_display() -> bool:
+    return sys.platform in ('win32', 'darwin') or bool(os.environ.get('DISPLAY') or os.environ.get('WAYLAND_DISPLAY'))
+
+
+def test_import_defers_heavy_modules():
+    """导入界面模块不加载处理引擎、授权和图片/PDF库（取3次中最快的一次）"""
+    results = [run_probe(IMPORT_PROBE) for _ in range(3)]
+    assert results[0]['loaded'] == [], results[0]['loaded']
+    fastest = min(r['ms'] for r in results)
+    print(f"✓ 导入 document_processor: {fastest:.1f} ms（预算 {IMPORT_BUDGET_MS} ms）")
+    assert fastest < IMPORT_BUDGET_MS
+
+
+def test_init_defers_license_and_engine():
+    """创建窗口时不在界面线程中创建授权管理器、检测Word转换器，也不加载处理引擎（不需要显示器）"""
+    result = run_probe(HEADLESS_PROBE)
+    assert result['loaded'] == [], result['loaded']
+    assert not result['processor']
+    assert result['in_main_thread'] == [], result['in_main_thread']
+    print("✓ 授权和Word转换器检测在后台进行，处理引擎未加载")
+
+
+def test_first_window_within_budget():
+    """窗口在预算时间内显示，Word转换器检测在窗口显示之后进行（没有显示器时跳过）"""
+    if not has_display():
+        pytest.skip("没有显示器，跳过窗口启动时间测试")
+    result = min((run_probe(WINDOW_PROBE) for _ in range(3)), key=lambda r: r['ms'])
+    print(f"✓ 窗口显示: {result['ms']:.1f} ms（预算 {FIRST_WINDOW_BUDGET_MS} ms）")
+    assert not result['word_checked']
+    assert result['ms'] < FIRST_WINDOW_BUDGET_MS
+
+
+if __name__ == "__main__":
+    test_import_defers_heavy_modules()
+    test_init_defers_license_and_engine()
+    if has_display():
+        test_first_window_within_budget()
+    else:
+        print("- 没有显示器，跳过窗口启动时间测试")
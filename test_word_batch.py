@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试调用soffice转换Word文档：同名文件分到不同批次，结果对应回各自的源文件，
+批量调用没有生成的PDF单独转换；同时单独转换的同名文档互不覆盖
+（使用假的soffice，不需要安装LibreOffice）
+"""
+
+import os
+import sys
+import tempfile
+import shutil
+import platform
+import threading
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from docproc_engine import DocumentProcessor
+from test_converter_probe import write_soffice
+
+
+def read_calls(calls):
+    with open(calls) as f:
+        return [line.split() for line in f]
+
+
+def test_batch_rounds_and_fallback():
+    """两个文件夹中的同名文档分两次调用；批量中失败的文档单独转换；每个输出PDF对应自己的源文件"""
+    if platform.system() == 'Windows':
+        print("- Windows上使用Microsoft Word转换，跳过")
+        return
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    old_path = os.environ.get('PATH', '')
+    try:
+        bin_dir = os.path.join(folder, 'bin')
+        os.makedirs(bin_dir)
+        calls = os.path.join(folder, 'calls.txt')
+        write_soffice(bin_dir, calls)
+        os.environ['PATH'] = bin_dir + os.pathsep + old_path
+
+        sources = []
+        for relpath in ('张三/承诺书.docx', '李四/承诺书.docx', '张三/申请书.doc', '张三/批量失败.docx'):
+            source = os.path.join(folder, 'in', relpath)
+            os.makedirs(os.path.dirname(source), exist_ok=True)
+            with open(source, 'wb') as f:
+                f.write(b'word')
+            sources.append(source)
+        out_dir = os.path.join(folder, 'out')
+        os.makedirs(out_dir)
+        pairs = [(source, os.path.join(out_dir, f'{n:03d}.pdf')) for n, source in enumerate(sources)]
+
+        processor = DocumentProcessor(max_workers=1, office_mode='batch', use_cache=False, isolate=False)
+        assert processor.convert_word_batch(pairs) == [True] * 4
+        for source, output_pdf in pairs:
+            with open(output_pdf) as f:
+                assert f.read() == source
+        print("✓ 每个输出PDF对应自己的源文件")
+
+        converted = [[arg for arg in call if arg in sources] for call in read_calls(calls)]
+        assert len(converted) == 3
+        assert sorted(converted[0]) == sorted([sources[0], sources[2], sources[3]])
+        assert converted[1] == [sources[1]]
+        assert converted[2] == [sources[3]]
+        print("✓ 同名文档分两批转换，批量中失败的文档单独转换")
+    finally:
+        os.environ['PATH'] = old_path
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_parallel_single_conversions_same_name():
+    """不同文件夹中的同名文档同时单独转换：输出到同一目录也不会互相覆盖"""
+    if platform.system() == 'Windows':
+        print("- Windows上使用Microsoft Word转换，跳过")
+        return
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    old_path = os.environ.get('PATH', '')
+    try:
+        bin_dir = os.path.join(folder, 'bin')
+        os.makedirs(bin_dir)
+        write_soffice(bin_dir, os.path.join(folder, 'calls.txt'))
+        os.environ['PATH'] = bin_dir + os.pathsep + old_path
+        os.environ['FAKE_SOFFICE_DELAY'] = '0.3'
+
+        out_dir = os.path.join(folder, 'out')
+        os.makedirs(out_dir)
+        pairs = []
+        for n, household in enumerate(('张三', '李四')):
+            source = os.path.join(folder, 'in', household, '申请书.docx')
+            os.makedirs(os.path.dirname(source))
+            with open(source, 'wb') as f:
+                f.write(b'word')
+            pairs.append((source, os.path.join(out_dir, f'{n:03d}.pdf')))
+
+        processor = DocumentProcessor(max_workers=2, office_mode='process', use_cache=False, isolate=False)
+        results = {}
+
+        def convert(source, output_pdf):
+            results[output_pdf] = processor.convert_to_pdf(source, output_pdf, 'word')
+
+        threads = [threading.Thread(target=convert, args=pair) for pair in pairs]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        for source, output_pdf in pairs:
+            assert results[output_pdf]
+            with open(output_pdf) as f:
+                assert f.read() == source
+        assert sorted(os.listdir(out_dir)) == ['000.pdf', '001.pdf']
+        print("✓ 同时转换的同名文档互不覆盖")
+    finally:
+        os.environ.pop('FAKE_SOFFICE_DELAY', None)
+        os.environ['PATH'] = old_path
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_batch_rounds_and_fallback()
+    test_parallel_single_conversions_same_name()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+测试隔离转换进程：崩溃、超出限制只影响单个任务，其他任务和后续任务正常执行
+"""
+
+import os
+import sys
+import time
+import tempfile
+import shutil
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from worker_pool import IsolatedPool, TaskLimits, WorkerCrashed, TaskTimeout
+from docproc_engine import DocumentProcessor
+from test_parallel_convert import make_household, page_sizes
+
+
+def _square(x):
+    return x * x
+
+
+def _crash():
+    os._exit(3)
+
+
+def _spin():
+    while True:
+        pass
+
+
+# 地址空间限制和略超过限制的分配量（不设限制时应能成功分配）
+MEMORY_LIMIT = 256 * 1024 * 1024
+ALLOCATION = MEMORY_LIMIT + 64 * 1024 * 1024
+
+
+def _allocate():
+    return len(bytearray(ALLOCATION))
+
+
+def _sleep():
+    time.sleep(30)
+
+
+def _reject_limits():
+    """子进程初始化：模拟系统不接受设置限制（如容器内受限）"""
+    import resource
+
+    def setrlimit(which, limit):
+        raise ValueError("not allowed")
+    resource.setrlimit = setrlimit
+
+
+def _context():
+    methods = multiprocessing.get_all_start_methods()
+    return multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+
+
+def expect_error(future, error_type):
+    try:
+        future.result()
+    except error_type as e:
+        print(f"  {error_type.__name__}: {e}")
+        return
+    assert False, f"应当抛出 {error_type.__name__}"
+
+
+def test_failures_are_isolated():
+    """崩溃、超时、超出CPU时间/内存的任务各自失败，进程池继续可用"""
+    limits = TaskLimits(cpu_seconds=1, memory_bytes=MEMORY_LIMIT, wall_seconds=3)
+    pool = IsolatedPool(2, mp_context=_context(), limits=limits)
+    try:
+        expect_error(pool.submit(_crash), WorkerCrashed)
+        expect_error(pool.submit(_sleep), TaskTimeout)
+        if sys.platform != 'win32':
+            expect_error(pool.submit(_spin), WorkerCrashed)
+            expect_error(pool.submit(_allocate), MemoryError)
+        # 不设限制的任务不受影响
+        assert pool.submit(_allocate, limited=False).result() == ALLOCATION
+        assert [pool.submit(_square, i).result() for i in range(4)] == [0, 1, 4, 9]
+        print("✓ 单个任务失败不影响进程池")
+    finally:
+        pool.shutdown()
+
+
+def test_rejected_limits_do_not_crash_worker():
+    """系统不接受资源限制时，任务不受该限制照常执行，而不是子进程崩溃"""
+    if sys.platform == 'win32':
+        print("- Windows上不设置CPU时间/内存限制，跳过")
+        return
+    limits = TaskLimits(cpu_seconds=5, memory_bytes=MEMORY_LIMIT)
+    pool = IsolatedPool(1, mp_context=_context(), initializer=_reject_limits, limits=limits)
+    try:
+        assert [pool.submit(_square, i).result() for i in range(3)] == [0, 1, 4]
+        print("✓ 无法设置限制时任务照常执行")
+    finally:
+        pool.shutdown()
+
+
+def test_bad_file_becomes_file_failure():
+    """损坏的文件记为单个文件失败，其他文件正常合并"""
+    folder = tempfile.mkdtemp(prefix='docproc_test_')
+    try:
+        make_household(folder)
+        with open(os.path.join(folder, 'DKSYT03.tiff'), 'wb') as f:
+            f.write(b'II*\x00' + os.urandom(2048))
+        output_pdf = os.path.join(folder, '.merged.pdf')
+
+        failures = []
+        with DocumentProcessor(max_workers=2, use_cache=False) as processor:
+            processor.process_folder(folder, output_pdf, failures=failures)
+        assert [os.path.basename(path) for path, _ in failures] == ['DKSYT03.tiff']
+        assert len(page_sizes(output_pdf)) == 6
+        print("✓ 损坏文件被跳过并记录")
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_failures_are_isolated()
+    test_rejected_limits_do_not_crash_worker()
+    test_bad_file_becomes_file_failure()
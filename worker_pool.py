@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+隔离的转换进程池
+每个转换任务在独立的子进程中执行，单个文件出问题只影响这一个文件：
+- 子进程崩溃（段错误、被系统结束）：该任务失败，自动启动新的子进程继续处理其他任务
+- CPU时间限制：超过后子进程被系统结束（RLIMIT_CPU）
+- 地址空间限制：超过后分配内存失败（RLIMIT_AS），通常表现为MemoryError
+- 运行时间限制：超时后结束子进程（处理不消耗CPU的卡死）
+
+与 concurrent.futures.ProcessPoolExecutor 不同，一个子进程崩溃不会使整个进程池失效，
+其他正在运行和排队的任务不受影响。
+
+CPU时间和地址空间限制依赖 resource 模块（macOS/Linux），Windows上只有运行时间限制。
+"""
+
+import time
+import queue
+import threading
+import multiprocessing
+from concurrent.futures import Future
+from typing import Callable, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+class WorkerCrashed(Exception):
+    """转换子进程异常退出（崩溃、超出限制被结束）"""
+
+
+class TaskTimeout(Exception):
+    """任务超过运行时间限制，子进程已被结束"""
+
+
+class TaskLimits:
+    """单个任务的资源限制（None表示不限制）"""
+
+    def __init__(self, cpu_seconds: Optional[int] = None, memory_bytes: Optional[int] = None,
+                 wall_seconds: Optional[float] = None):
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_bytes
+        self.wall_seconds = wall_seconds
+
+
+def _set_limit(which, limit, name):
+    """设置一项限制；系统不接受时（如容器内受限、数值超出范围）只提示，任务照常执行"""
+    try:
+        resource.setrlimit(which, limit)
+    except (ValueError, OSError) as e:
+        print(f"[进程池] ⚠️ 无法设置{name}限制，本任务不受此限制: {e}")
+
+
+def _apply_limits(cpu_seconds, memory_bytes):
+    """在子进程中设置本任务的限制，返回原来的限制以便任务结束后恢复"""
+    if resource is None:
+        return None
+    saved = (resource.getrlimit(resource.RLIMIT_CPU), resource.getrlimit(resource.RLIMIT_AS))
+    if cpu_seconds:
+        # RLIMIT_CPU是进程累计的CPU时间，子进程会执行多个任务，所以在已用时间的基础上加
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        soft = int(usage.ru_utime + usage.ru_stime) + int(cpu_seconds)
+        hard = saved[0][1]
+        if hard == resource.RLIM_INFINITY or soft < hard:
+            _set_limit(resource.RLIMIT_CPU, (soft, hard), 'CPU时间')
+    if memory_bytes:
+        hard = saved[1][1]
+        if hard == resource.RLIM_INFINITY or memory_bytes < hard:
+            _set_limit(resource.RLIMIT_AS, (int(memory_bytes), hard), '内存')
+    return saved
+
+
+def _restore_limits(saved):
+    if saved is not None:
+        _set_limit(resource.RLIMIT_CPU, saved[0], 'CPU时间')
+        _set_limit(resource.RLIMIT_AS, saved[1], '内存')
+
+
+def _worker_main(conn, initializer):
+    """子进程主循环：逐个接收任务、执行并返回结果，收到None时退出"""
+    if initializer is not None:
+        initializer()
+    while True:
+        try:
+            task = conn.recv()
+        except EOFError:
+            break
+        if task is None:
+            break
+        fn, args, cpu_seconds, memory_bytes = task
+        saved = _apply_limits(cpu_seconds, memory_bytes)
+        try:
+            result = ('ok', fn(*args))
+        except BaseException as e:
+            result = ('error', e)
+        finally:
+            _restore_limits(saved)
+        try:
+            conn.send(result)
+        except Exception:
+            # 结果或异常对象无法序列化时只传回文字
+            conn.send(('error', RuntimeError(repr(result[1]))))
+
+
+class IsolatedPool:
+    """
+    固定数量的转换子进程，每个子进程同一时间只执行一个任务
+    submit() 返回 Future；任务失败（含崩溃、超时）时 Future 的结果为对应的异常
+    """
+
+    def __init__(self, max_workers: int, mp_context=None, initializer: Callable = None,
+                 limits: TaskLimits = None, on_worker_exit: Callable[[int], None] = None):
+        self.max_workers = max_workers
+        self._context = mp_context or multiprocessing.get_context()
+        self._initializer = initializer
+        self.limits = limits or TaskLimits()
+        # 子进程异常退出后的清理（参数为子进程pid），如删除它的临时配置目录
+        self._on_worker_exit = on_worker_exit
+        self._tasks = queue.Queue()
+        self._threads = []
+        self._active = {}  # 执行槽 -> 正在执行任务的子进程
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+    def submit(self, fn: Callable, *args, limited: bool = True) -> Future:
+        """
+        提交任务；limited为False时不设置CPU时间/地址空间/运行时间限制
+        （如调用soffice的任务：soffice有自己的超时，且会继承子进程的限制）
+        """
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("进程池已关闭")
+            self._tasks.put((future, fn, args, limited))
+            if len(self._threads) < self.max_workers:
+                thread = threading.Thread(target=self._run_slot, name=f'convert-slot-{len(self._threads)}',
+                                          daemon=True)
+                self._threads.append(thread)
+                thread.start()
+        return future
+
+    def _start_process(self):
+        parent_conn, child_conn = self._context.Pipe()
+        process = self._context.Process(target=_worker_main, args=(child_conn, self._initializer), daemon=True)
+        process.start()
+        child_conn.close()
+        return process, parent_conn
+
+    def _stop_process(self, process, conn, kill: bool):
+        """结束子进程；kill为True时强制结束并执行清理"""
+        if kill:
+            process.kill()
+        else:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+        process.join(timeout=10)
+        if process.is_alive():
+            process.kill()
+            process.join()
+        conn.close()
+        if kill and self._on_worker_exit is not None:
+            try:
+                self._on_worker_exit(process.pid)
+            except Exception:
+                pass
+
+    def _run_slot(self):
+        """一个执行槽：持有一个子进程，依次执行队列中的任务"""
+        process, conn = None, None
+        while True:
+            item = self._tasks.get()
+            if item is None:
+                break
+            future, fn, args, limited = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            if process is None or not process.is_alive():
+                process, conn = self._start_process()
+
+            limits = self.limits if limited else TaskLimits()
+            slot = threading.get_ident()
+            with self._lock:
+                self._active[slot] = process
+            try:
+                conn.send((fn, args, limits.cpu_seconds, limits.memory_bytes))
+                ready = conn.poll(limits.wall_seconds)
+                if not ready:
+                    self._stop_process(process, conn, kill=True)
+                    process = None
+                    future.set_exception(TaskTimeout(f"转换超时({limits.wall_seconds:.0f}秒)，已结束转换进程"))
+                    continue
+                status, value = conn.recv()
+            except (EOFError, OSError):
+                # 子进程在执行任务时退出：崩溃、超出CPU时间限制被系统结束，或被cancel_all结束
+                process.join(timeout=5)
+                exitcode = process.exitcode
+                self._stop_process(process, conn, kill=True)
+                process = None
+                future.set_exception(WorkerCrashed(f"转换进程异常退出 (退出码 {exitcode})"))
+                continue
+            finally:
+                with self._lock:
+                    self._active.pop(slot, None)
+            if status == 'ok':
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+        if process is not None:
+            self._stop_process(process, conn, kill=False)
+
+    def cancel_all(self, grace: float = 0.5):
+        """
+        取消所有任务：排队中的任务取消，正在执行的子进程先收到SIGTERM（清理soffice后退出），
+        grace秒后仍未退出的强制结束。进程池之后仍可使用（按需启动新的子进程）
+        """
+        while True:
+            try:
+                item = self._tasks.get_nowait()
+            except queue.Empty:
+                break
+            if item is None:
+                # 关闭标记放回队列
+                self._tasks.put(None)
+                break
+            item[0].cancel()
+        with self._lock:
+            processes = list(self._active.values())
+        for process in processes:
+            process.terminate()
+        deadline = time.monotonic() + grace
+        for process in processes:
+            process.join(timeout=max(0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+
+    def shutdown(self, wait: bool = True):
+        """关闭进程池：排队中的任务取消，子进程执行完当前任务后退出"""
+        with self._lock:
+            self._shutdown = True
+            threads = list(self._threads)
+        while True:
+            try:
+                item = self._tasks.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                item[0].cancel()
+        for _ in threads:
+            self._tasks.put(None)
+        if wait:
+            for thread in threads:
+                thread.join()